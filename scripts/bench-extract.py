@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF extraction in ingest-arxiv.py, serial against page-sharded.
+
+Extracts a multi-page PDF (a synthetic paper with chapter, section and
+subsection headings in different font sizes on different pages, or the
+given --pdf) with one whole-document to_markdown call and with
+extract_markdown on a process pool, checks that both give the same
+markdown page for page (heading levels included), and prints the timings.
+Also checks that streaming extraction (iter_page_chunks, serial and on
+the pool) yields the same pages, and that the --stream pipeline
+(iter_sections) gives the same sections and content hashes as the
+default one (segment_document), and that running header removal keeps
+numbered chapter headings that open consecutive pages while removing
+headers that alternate between odd and even pages.
+
+Usage:
+  python scripts/bench-extract.py
+  python scripts/bench-extract.py --pdf paper.pdf --workers 8
+  python scripts/bench-extract.py --legacy    # pymupdf4llm without the layout engine
+
+Requires:
+  pip install arxiv pymupdf4llm   (ingest-arxiv.py imports them)
+"""
+
+import argparse
+import importlib.util
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+def load_ingest_arxiv():
+    """Import scripts/ingest-arxiv.py (its file name is not a valid module name).
+
+    The module is registered in sys.modules so pool workers can unpickle
+    its functions.
+    """
+    path = Path(__file__).with_name("ingest-arxiv.py")
+    spec = importlib.util.spec_from_file_location("ingest_arxiv", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_pdf(ingest, path: Path, pages: int, seed: int = 0) -> None:
+    """Write a paper-like PDF: a numbered chapter heading every 6 pages,
+    sections and subsections in smaller fonts, and a running header."""
+    rng = random.Random(seed)
+    vocabulary = "the model attention layer results training data we show that of".split()
+    doc = ingest.pymupdf.open()
+    for p in range(pages):
+        page = doc.new_page()
+        chapter, section = p // 6 + 1, p % 6 + 1
+        y = 72
+        headings = [(16, f"{chapter}.{section} Section")]
+        if p % 6 == 0:
+            headings.insert(0, (22, f"{chapter} Chapter"))
+        if p % 3:
+            headings.append((13, f"{chapter}.{section}.1 Details"))
+        for size, heading in headings:
+            page.insert_text((72, y), heading, fontsize=size, fontname="hebo")
+            y += size + 12
+            for _ in range(6):
+                page.insert_text((72, y), " ".join(rng.choices(vocabulary, k=12)), fontsize=10)
+                y += 14
+            y += 10
+        page.insert_text((72, 40), f"Synthetic Paper, page {p + 1}", fontsize=8)
+    doc.save(str(path))
+    doc.close()
+
+
+def check_page_cleaner(ingest, pages: int = 8) -> None:
+    """Chapter headings at the top of every page survive cleaning; the running
+    headers above them (alternating odd/even, as in journals) and the footer
+    below the text do not, not even on their first pages."""
+    rng = random.Random(0)
+    vocabulary = "the model attention layer results training data we show that of".split()
+    chunks = []
+    headings = []
+    for p in range(1, pages + 1):
+        page_headings = [f"**Chapter {p}**", f"## {p} Methods"]
+        headings += page_headings
+        chunks.append("\n\n".join([
+            "Journal of Machine Learning Research 21 (2020) 1-67" if p % 2 else "Smith, Jones and Lee",
+            *page_headings,
+            *(" ".join(rng.choices(vocabulary, k=12)) for _ in range(3)),
+            f"Page {p} of {pages}",
+        ]) + "\n\n")
+    text = ingest.clean_page_artifacts(chunks)
+    missing = [h for h in headings if h not in text]
+    if missing:
+        raise SystemExit(f"Error: cleaning removed page-top headings: {missing}")
+    kept = [line for line in ("Journal of Machine", "Smith, Jones", "Page ") if line in text]
+    if kept:
+        raise SystemExit(f"Error: cleaning kept running headers or footers: {kept}")
+
+
+def section_rows(ingest, pages, stream: bool) -> list[dict]:
+    """Cleaned and segmented pages as output rows, the way each mode builds them."""
+    if stream:
+        doc = None
+        sections = list(ingest.iter_sections(ingest.iter_lines(ingest.clean_pages(pages))))
+        if not sections:
+            # stream_sections' fallback: the whole text as one section
+            sections = ingest.segment_sections("".join(ingest.clean_pages(pages)))
+    else:
+        doc = ingest.Document("".join(ingest.clean_pages(pages)))
+        sections = ingest.segment_document(doc)
+    return [ingest.build_row(section, "bench", "bench", doc) for section in sections]
+
+
+def first_difference(expected: list, actual: list) -> int:
+    return next(
+        (i for i, (a, b) in enumerate(zip(expected, actual)) if a != b),
+        min(len(expected), len(actual)),
+    )
+
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark serial vs page-sharded PDF extraction")
+    parser.add_argument("--pdf", type=Path, help="PDF to extract (default: a synthetic paper)")
+    parser.add_argument("--pages", type=int, default=24, help="Pages of the synthetic paper")
+    parser.add_argument("--workers", type=int, default=4, help="Extraction processes")
+    parser.add_argument(
+        "--legacy", action="store_true",
+        help="Use pymupdf4llm without the layout engine (shares heading levels via IdentifyHeaders)"
+    )
+    args = parser.parse_args()
+
+    ingest = load_ingest_arxiv()
+    check_page_cleaner(ingest)
+    if args.legacy:
+        ingest.pymupdf4llm.use_layout(False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            pdf_path = Path(tmp) / "synthetic.pdf"
+            synthetic_pdf(ingest, pdf_path, args.pages)
+        engine = "legacy" if ingest.header_info(str(pdf_path)) is not None else "layout"
+        print(f"PDF: {pdf_path.name} ({engine} engine)")
+
+        serial_time, serial = timed(ingest.to_page_chunks, str(pdf_path))
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            sharded_time, sharded = timed(ingest.extract_markdown, pdf_path, pool, args.workers)
+            streamed = {
+                "streaming": list(ingest.iter_page_chunks(pdf_path)),
+                "sharded streaming": list(ingest.iter_page_chunks(pdf_path, pool, args.workers)),
+            }
+
+    streamed["sharded"] = sharded
+    for name, pages in streamed.items():
+        if pages != serial:
+            page = first_difference(serial, pages)
+            raise SystemExit(f"Error: {name} extraction differs from serial on page {page + 1}")
+
+    rows = section_rows(ingest, serial, stream=False)
+    stream_rows = section_rows(ingest, streamed["sharded streaming"], stream=True)
+    if stream_rows != rows:
+        section = first_difference(rows, stream_rows)
+        raise SystemExit(f"Error: --stream sections differ from the default ones at section {section}")
+
+    print(f"  Pages: {len(serial)}, identical markdown; {len(rows)} identical sections")
+    print(f"  serial:                 {serial_time:8.2f} s")
+    print(f"  sharded ({args.workers} workers):    {sharded_time:8.2f} s")
+    print(f"  Speedup: {serial_time / sharded_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
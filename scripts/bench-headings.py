@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark heading detection in ingest-arxiv.py on a large synthetic document.
+
+Compares the per-line path (detect_heading on every line, then the
+top-level filter) with the single-pass scan_headings scanner, checks that
+both produce the same headings, and prints the timings.
+
+Usage:
+  python scripts/bench-headings.py
+  python scripts/bench-headings.py --lines 500000 --repeat 5
+
+Requires:
+  pip install arxiv pymupdf4llm   (ingest-arxiv.py imports them)
+"""
+
+import argparse
+import importlib.util
+import random
+import re
+import time
+from pathlib import Path
+
+
+def load_ingest_arxiv():
+    """Import scripts/ingest-arxiv.py (its file name is not a valid module name)."""
+    path = Path(__file__).with_name("ingest-arxiv.py")
+    spec = importlib.util.spec_from_file_location("ingest_arxiv", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_document(num_lines: int, seed: int = 0) -> str:
+    """Build pymupdf4llm-like markdown: mostly prose, some bold text and headings."""
+    rng = random.Random(seed)
+    vocabulary = "the model attention layer results training data we show that of".split()
+    headings = [
+        "## {n} Introduction", "**{n}** **Method**", "# **{n}.{m} Setup**",
+        "**Abstract**", "## References", "**Conclusion**", "### {n}.{m}. Ablations",
+    ]
+    lines: list[str] = []
+    section = 1
+    while len(lines) < num_lines:
+        roll = rng.random()
+        if roll < 0.01:
+            lines.append(rng.choice(headings).format(n=section, m=rng.randint(1, 9)))
+            section += 1
+        elif roll < 0.05:
+            lines.append("**" + " ".join(rng.choices(vocabulary, k=6)) + "** and more text")
+        elif roll < 0.25:
+            lines.append("")
+        else:
+            lines.append(" ".join(rng.choices(vocabulary, k=rng.randint(5, 20))))
+    return "\n".join(lines)
+
+
+def per_line_headings(ingest, text: str) -> list[tuple[int, str, str]]:
+    """The previous segment_sections heading loop, kept as the reference."""
+    top_level = []
+    for i, line in enumerate(text.split("\n")):
+        result = ingest.detect_heading(line)
+        if result is None:
+            continue
+        num, title = result
+        if num == "" or re.match(r"^\d+$", num):
+            top_level.append((i, num, title))
+    return top_level
+
+
+def scanned_headings(ingest, text: str) -> list[tuple[int, str, str]]:
+    return [
+        (h["line"], h["number"], h["title"])
+        for h in ingest.scan_headings(text)
+        if h["top_level"]
+    ]
+
+
+def best_of(repeat: int, fn, *args) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark arXiv heading detection")
+    parser.add_argument("--lines", type=int, default=200_000, help="Document size in lines")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant (best is kept)")
+    args = parser.parse_args()
+
+    ingest = load_ingest_arxiv()
+    text = synthetic_document(args.lines)
+    print(f"Document: {args.lines} lines, {len(text)} chars")
+
+    old_time, old_headings = best_of(args.repeat, per_line_headings, ingest, text)
+    new_time, new_headings = best_of(args.repeat, scanned_headings, ingest, text)
+
+    if old_headings != new_headings:
+        raise SystemExit("Error: scan_headings output differs from detect_heading")
+
+    print(f"  Headings found: {len(new_headings)}")
+    print(f"  detect_heading per line: {old_time * 1000:8.1f} ms")
+    print(f"  scan_headings:           {new_time * 1000:8.1f} ms")
+    print(f"  Speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
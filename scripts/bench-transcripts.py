@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark transcript segmentation in ingest-youtube.py on a long synthetic
+transcript (a multi-hour livestream's worth of caption snippets).
+
+Compares the previous pipeline (sequential artifact patterns, word-by-word
+stutter removal, per-snippet greedy loop) with the fused cleaner and the
+array-backed segment_transcript, checks that both produce the same sections
+for several chunk sizes, and prints the timings. Also times --chunking
+balanced and compares the spread of chunk sizes of both engines, and
+measures (with tracemalloc) the memory held by the transcript as a list of
+dicts versus a compact Snippets container, and the peak while segmenting.
+
+Usage:
+  python scripts/bench-transcripts.py
+  python scripts/bench-transcripts.py --hours 10 --repeat 5
+
+Requires:
+  pip install youtube-transcript-api   (ingest-youtube.py imports it)
+  pip install numpy                    (optional; the fallback is pure Python)
+"""
+
+import argparse
+import importlib.util
+import random
+import re
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+
+def load_ingest_youtube():
+    """Import scripts/ingest-youtube.py (its file name is not a valid module name)."""
+    path = Path(__file__).with_name("ingest-youtube.py")
+    spec = importlib.util.spec_from_file_location("ingest_youtube", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_transcript(hours: float, seed: int = 0) -> list[dict]:
+    """Caption-like snippets: 1-5 s each, short pauses, occasional long silences,
+    artifacts ([Music], also split across snippets), stutters and empty snippets."""
+    rng = random.Random(seed)
+    vocabulary = "so um the model we like you know attention layer results the data".split()
+    endings = ["", "", "", ".", "?", ",", ":"]
+    snippets: list[dict] = []
+    t = 0.0
+    while t < hours * 3600:
+        roll = rng.random()
+        if roll < 0.01:
+            text = rng.choice(["[Music]", "[APPLAUSE]", "so [Background", "noise] the"])
+        elif roll < 0.02:
+            text = "  "
+        elif roll < 0.03:
+            text = " ".join([rng.choice(vocabulary).capitalize()] * rng.randint(2, 6))
+        else:
+            text = " ".join(rng.choices(vocabulary, k=rng.randint(3, 12))) + rng.choice(endings)
+        duration = rng.uniform(1.0, 5.0)
+        snippets.append({"text": text, "start": round(t, 3), "duration": round(duration, 3)})
+        pause = rng.uniform(5.0, 12.0) if rng.random() < 0.03 else rng.uniform(0.0, 0.5)
+        t += duration + pause
+    return snippets
+
+
+# The previous cleaner, kept as the reference
+ARTIFACT_PATTERNS = [
+    re.compile(r"\[Music\]", re.IGNORECASE),
+    re.compile(r"\[Applause\]", re.IGNORECASE),
+    re.compile(r"\[Laughter\]", re.IGNORECASE),
+    re.compile(r"\[Silence\]", re.IGNORECASE),
+    re.compile(r"\[Background noise\]", re.IGNORECASE),
+    re.compile(r"\[Inaudible\]", re.IGNORECASE),
+    re.compile(r"^\s*$"),
+]
+
+
+def sequential_clean_text(text: str) -> str:
+    for pattern in ARTIFACT_PATTERNS:
+        text = pattern.sub("", text)
+    return text.strip()
+
+
+def word_by_word_dedupe(words: list[str], max_repeat: int = 3) -> list[str]:
+    if not words:
+        return words
+    result = [words[0]]
+    repeat_count = 1
+    for i in range(1, len(words)):
+        if words[i].lower() == words[i - 1].lower():
+            repeat_count += 1
+            if repeat_count <= max_repeat:
+                result.append(words[i])
+        else:
+            repeat_count = 1
+            result.append(words[i])
+    return result
+
+
+def sequential_clean_chunk(raw_text: str) -> str:
+    for pattern in ARTIFACT_PATTERNS:
+        raw_text = pattern.sub("", raw_text)
+    raw_text = " ".join(word_by_word_dedupe(raw_text.split()))
+    raw_text = re.sub(r" {2,}", " ", raw_text)
+    raw_text = "\n".join(line.strip() for line in raw_text.split("\n"))
+    raw_text = re.sub(r"\n{3,}", "\n\n", raw_text)
+    return raw_text.strip()
+
+
+def greedy_segment(ingest, snippets: list[dict], chunk_size: int = 500) -> list[dict]:
+    """The previous segment_transcript loop, kept as the reference."""
+    if not snippets:
+        return []
+
+    processed: list[dict] = []
+    for i, s in enumerate(snippets):
+        text = sequential_clean_text(s["text"])
+        if not text:
+            continue
+        start = s["start"]
+        end = start + s["duration"]
+        gap_after = 0.0
+        if i < len(snippets) - 1:
+            gap_after = snippets[i + 1]["start"] - end
+        processed.append({"text": text, "start": start, "end": end, "gap_after": gap_after})
+
+    if not processed:
+        return []
+
+    sections: list[dict] = []
+    current_texts: list[str] = []
+    current_word_count = 0
+    chunk_start = processed[0]["start"]
+
+    for i, snippet in enumerate(processed):
+        current_texts.append(snippet["text"])
+        current_word_count += len(snippet["text"].split())
+        chunk_end = snippet["end"]
+
+        should_break = False
+        if i == len(processed) - 1:
+            should_break = True
+        elif current_word_count >= chunk_size:
+            if snippet["gap_after"] >= ingest.SILENCE_GAP_THRESHOLD:
+                should_break = True
+            elif current_word_count >= chunk_size * 1.3:
+                should_break = True
+            elif snippet["text"].rstrip().endswith((".", "!", "?", ":", ";")):
+                should_break = True
+        elif current_word_count >= chunk_size * 0.7:
+            if snippet["gap_after"] >= ingest.SILENCE_GAP_THRESHOLD:
+                should_break = True
+
+        if should_break and current_texts:
+            joined = sequential_clean_chunk(" ".join(current_texts))
+            word_count = len(joined.split())
+            if word_count > 0:
+                sections.append({
+                    "text": joined,
+                    "start": chunk_start,
+                    "end": chunk_end,
+                    "word_count": word_count,
+                })
+            current_texts = []
+            current_word_count = 0
+            if i < len(processed) - 1:
+                chunk_start = processed[i + 1]["start"]
+
+    return sections
+
+
+def traced(fn) -> tuple[int, int, object]:
+    """(bytes still held, peak bytes, result) of fn(), as seen by tracemalloc."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return held, peak, result
+
+
+def memory_report(ingest, snippets: list[dict], chunk_size: int) -> None:
+    compact = ingest.Snippets.from_rows(snippets)
+    # Fresh copies, so each representation owns all of its strings
+    dict_bytes, _, rows = traced(lambda: list(compact))
+    compact_bytes, _, compact = traced(lambda: ingest.Snippets.from_rows(rows))
+    _, greedy_peak, _ = traced(lambda: greedy_segment(ingest, rows, chunk_size))
+    _, new_peak, _ = traced(lambda: ingest.segment_transcript(compact, chunk_size))
+
+    mb = 1 << 20
+    print(f"  Memory ({len(rows)} snippets):")
+    print(f"    list of dicts:      {dict_bytes / mb:7.2f} MB held")
+    print(f"    Snippets:           {compact_bytes / mb:7.2f} MB held "
+          f"({dict_bytes / compact_bytes:.1f}x smaller)")
+    print(f"    previous pipeline:  {greedy_peak / mb:7.2f} MB peak while segmenting")
+    print(f"    segment_transcript: {new_peak / mb:7.2f} MB peak while segmenting")
+
+
+def best_of(repeat: int, fn, *args) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark YouTube transcript segmentation")
+    parser.add_argument("--hours", type=float, default=8.0, help="Transcript length in hours")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Target words per chunk")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant (best is kept)")
+    args = parser.parse_args()
+
+    ingest = load_ingest_youtube()
+    snippets = synthetic_transcript(args.hours)
+    # What fetch_transcript returns
+    compact = ingest.Snippets.from_rows(snippets)
+    print(f"Transcript: {args.hours:g} h, {len(snippets)} snippets "
+          f"({'numpy' if ingest.np is not None else 'pure Python'} arrays)")
+
+    for chunk_size in sorted({50, 200, args.chunk_size, 1000}):
+        if greedy_segment(ingest, snippets, chunk_size) != ingest.segment_transcript(compact, chunk_size):
+            raise SystemExit(f"Error: segment_transcript output differs at chunk size {chunk_size}")
+
+    old_time, old_sections = best_of(args.repeat, greedy_segment, ingest, snippets, args.chunk_size)
+    new_time, new_sections = best_of(args.repeat, ingest.segment_transcript, compact, args.chunk_size)
+
+    print(f"  Sections: {len(new_sections)} (~{args.chunk_size} words)")
+    print(f"  previous pipeline:   {old_time * 1000:8.1f} ms")
+    print(f"  segment_transcript:  {new_time * 1000:8.1f} ms")
+    print(f"  Speedup: {old_time / new_time:.1f}x")
+
+    balanced_time, balanced_sections = best_of(
+        args.repeat, lambda: ingest.segment_transcript(compact, args.chunk_size, chunking="balanced")
+    )
+    print(f"  balanced chunking:   {balanced_time * 1000:8.1f} ms")
+    for name, sections in (("greedy", new_sections), ("balanced", balanced_sections)):
+        sizes = [s["word_count"] for s in sections]
+        print(f"  {name + ':':<10} {len(sizes):4d} chunks, words min {min(sizes)} "
+              f"max {max(sizes)} last {sizes[-1]} stdev {statistics.pstdev(sizes):.1f}")
+
+    memory_report(ingest, snippets, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
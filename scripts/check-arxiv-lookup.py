@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Check batched arXiv metadata lookups in ingest-arxiv.py against a local
+stand-in API (ingestlib/standin.py).
+
+One id_list query covers a whole batch. The check asks for a batch that
+mixes papers the stand-in knows, one ID it rejects as malformed (HTTP 400
+for any query naming it) and one it has never heard of, and checks that
+every known paper is still found, that only the malformed ID is reported
+as a query error, that the unknown ID is reported as missing rather than
+as an error, and how many queries the batch split cost.
+
+Usage:
+  python scripts/check-arxiv-lookup.py
+  python scripts/check-arxiv-lookup.py --papers 200 --batch-size 100
+
+Requires:
+  pip install arxiv pymupdf4llm   (ingest-arxiv.py imports them)
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import math
+from pathlib import Path
+
+from ingestlib.standin import ArxivStandIn
+
+
+def load_ingest_arxiv():
+    """Import scripts/ingest-arxiv.py (its file name is not a valid module name)."""
+    path = Path(__file__).with_name("ingest-arxiv.py")
+    spec = importlib.util.spec_from_file_location("ingest_arxiv", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check arXiv lookups against a local stand-in")
+    parser.add_argument("--papers", type=int, default=40, help="Known papers in the batch")
+    parser.add_argument("--batch-size", type=int, default=100, help="IDs per id_list query")
+    args = parser.parse_args()
+
+    ingest = load_ingest_arxiv()
+    known = [f"2401.{i:05d}" for i in range(1, args.papers + 1)]
+    malformed = "2401.bad"
+    missing = "2402.99999"
+    requested = known[:len(known) // 2] + [malformed, missing] + known[len(known) // 2:]
+
+    with ArxivStandIn({f"{i}v1": b"" for i in known}, bad_ids={malformed}) as server:
+        client = ingest.make_client(server.api_url)
+        # The stand-in answers at once; don't wait between retries
+        client.delay_seconds = 0
+        client.num_retries = 0
+        errors: dict[str, str] = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            found = ingest.lookup_papers(client, requested, args.batch_size, errors=errors)
+        queries = len(server.queries())
+
+    lost = [i for i in known if i not in found]
+    if lost:
+        raise SystemExit(f"Error: {len(lost)} known paper(s) not found, e.g. {lost[0]}")
+    if set(errors) != {malformed}:
+        raise SystemExit(f"Error: query errors reported for {sorted(errors)}, expected [{malformed!r}]")
+    if missing in found:
+        raise SystemExit(f"Error: {missing} was found although the stand-in does not have it")
+
+    batches = math.ceil(len(requested) / args.batch_size)
+    limit = batches + 2 * math.ceil(math.log2(min(args.batch_size, len(requested))))
+    if queries > limit:
+        raise SystemExit(f"Error: {queries} queries for {batches} batch(es), expected at most {limit}")
+
+    print(f"Lookup of {len(requested)} IDs ({batches} batch(es) of up to {args.batch_size}):")
+    print(f"  found {len(found)}/{len(known)} known papers")
+    print(f"  query error only for {malformed}; {missing} reported as missing")
+    print(f"  {queries} queries (batch split around the failing ID)")
+
+
+if __name__ == "__main__":
+    main()
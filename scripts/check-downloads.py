@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Check resumable PDF downloads (ingestlib/download.py) against a local
+stand-in server (ingestlib/standin.py).
+
+The stand-in cuts the first response for one paper off part-way and closes
+the connection. The check downloads it and verifies that the retry resumed
+with a Range request from the bytes already on disk and that the file at
+dest is byte-for-byte the served PDF. It then checks that a half-written
+PDF left on disk (header but no %%EOF trailer) is not taken for a finished
+one, and that a server that only ever sends a truncated PDF makes the
+download fail instead of leaving the truncated file at dest.
+
+Usage:
+  python scripts/check-downloads.py
+  python scripts/check-downloads.py --size 5000000 --cut 1000000
+
+Requires:
+  pip install requests
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+from pathlib import Path
+
+from ingestlib.download import DownloadError, download_file, is_valid_pdf, make_session
+from ingestlib.standin import ArxivStandIn
+
+
+def fake_pdf(size: int, seed: int = 0) -> bytes:
+    """size bytes shaped like a PDF: header, opaque body, %%EOF trailer."""
+    head, tail = b"%PDF-1.7\n", b"\nstartxref\n0\n%%EOF\n"
+    body = random.Random(seed).randbytes(max(0, size - len(head) - len(tail)))
+    return head + body + tail
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check resumable downloads against a local stand-in")
+    parser.add_argument("--size", type=int, default=1_000_000, help="Bytes in the served PDF")
+    parser.add_argument("--cut", type=int, default=300_000, help="Bytes sent before the connection drops")
+    args = parser.parse_args()
+
+    pdf = fake_pdf(args.size)
+    papers = {"2401.00001v1": pdf, "2401.00002v1": pdf[:len(pdf) // 2]}
+
+    with tempfile.TemporaryDirectory() as tmp, ArxivStandIn(
+        papers, drop_after={"2401.00001v1": args.cut}
+    ) as server:
+        session = make_session()
+        log = io.StringIO()
+        dest = Path(tmp) / "resumed.pdf"
+        with contextlib.redirect_stdout(log):
+            download_file(session, f"{server.base_url}/pdf/2401.00001v1", dest, max_attempts=3)
+        ranges = [r for path, _, r in server.requests if path == "/pdf/2401.00001v1"]
+        if ranges != [None, f"bytes={args.cut}-"]:
+            raise SystemExit(f"Error: expected one full request and one resume from {args.cut}, got {ranges}")
+        if dest.read_bytes() != pdf:
+            raise SystemExit("Error: resumed download differs from the served PDF")
+        if dest.with_name(dest.name + ".part").exists():
+            raise SystemExit("Error: .part file left behind after a finished download")
+
+        half = Path(tmp) / "half.pdf"
+        half.write_bytes(pdf[:args.cut])
+        if is_valid_pdf(half) or not is_valid_pdf(dest):
+            raise SystemExit("Error: is_valid_pdf does not tell a half-written PDF from a complete one")
+
+        truncated = Path(tmp) / "truncated.pdf"
+        try:
+            with contextlib.redirect_stdout(log):
+                download_file(session, f"{server.base_url}/pdf/2401.00002v1", truncated, max_attempts=2)
+        except DownloadError:
+            pass
+        else:
+            raise SystemExit("Error: a PDF without %%EOF was accepted as a finished download")
+        if truncated.exists():
+            raise SystemExit("Error: truncated download left at dest")
+
+    print(f"Download of a {args.size}-byte PDF cut off after {args.cut} bytes:")
+    print(f"  resumed with Range: bytes={args.cut}-, identical bytes")
+    print("  half-written PDF on disk rejected; PDF served without %%EOF rejected")
+
+
+if __name__ == "__main__":
+    main()
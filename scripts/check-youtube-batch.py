@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Check concurrent batch ingestion in ingest-youtube.py against a stub
+transcript API, without the network.
+
+ingest_batch takes the API as a factory, so the check passes a stub with
+the YouTubeTranscriptApi list() interface: every video has one manual
+English transcript, except one that is unavailable. It checks that only
+that video is reported as failed, that every other video still gets its
+own sections file, that each worker thread made a single API client, and
+that no more than --workers transcripts were fetched at once.
+
+Usage:
+  python scripts/check-youtube-batch.py
+  python scripts/check-youtube-batch.py --videos 20 --workers 8
+
+Requires:
+  pip install youtube-transcript-api   (ingest-youtube.py imports it)
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Seconds each stub list() call takes, so fetches overlap
+LIST_DELAY = 0.05
+
+
+def load_ingest_youtube():
+    """Import scripts/ingest-youtube.py (its file name is not a valid module name)."""
+    path = Path(__file__).with_name("ingest-youtube.py")
+    spec = importlib.util.spec_from_file_location("ingest_youtube", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def stub_snippets(video_id: str, count: int = 300) -> list[dict]:
+    """Caption snippets with a pause every few lines, seeded by the video ID."""
+    rng = random.Random(video_id)
+    vocabulary = "so the model learns a representation of each token in context".split()
+    snippets = []
+    start = 0.0
+    for i in range(count):
+        duration = rng.uniform(1.5, 4.0)
+        snippets.append({"text": " ".join(rng.choices(vocabulary, k=8)), "start": start, "duration": duration})
+        start += duration + (2.0 if i % 7 == 6 else 0.1)
+    return snippets
+
+
+class StubTranscript:
+    language = "English"
+    language_code = "en"
+    is_generated = False
+
+    def __init__(self, video_id: str) -> None:
+        self.video_id = video_id
+
+    def fetch(self) -> list[dict]:
+        return stub_snippets(self.video_id)
+
+
+class StubTranscriptList:
+    def __init__(self, video_id: str) -> None:
+        self.transcripts = [StubTranscript(video_id)]
+
+    def __iter__(self):
+        return iter(self.transcripts)
+
+    def find_manually_created_transcript(self, language_codes: list[str]) -> StubTranscript:
+        return self.transcripts[0]
+
+
+class StubApi:
+    """YouTubeTranscriptApi stand-in; counts clients and concurrent list() calls."""
+
+    lock = threading.Lock()
+    clients = 0
+    active = 0
+    peak = 0
+    unavailable: set[str] = set()
+    error = Exception
+
+    def __init__(self) -> None:
+        with StubApi.lock:
+            StubApi.clients += 1
+
+    def list(self, video_id: str) -> StubTranscriptList:
+        with StubApi.lock:
+            StubApi.active += 1
+            StubApi.peak = max(StubApi.peak, StubApi.active)
+        try:
+            time.sleep(LIST_DELAY)
+            if video_id in StubApi.unavailable:
+                raise StubApi.error(video_id)
+            return StubTranscriptList(video_id)
+        finally:
+            with StubApi.lock:
+                StubApi.active -= 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check batch transcript ingestion against a stub API")
+    parser.add_argument("--videos", type=int, default=8, help="Videos in the batch")
+    parser.add_argument("--workers", type=int, default=4, help="Fetch threads")
+    args = parser.parse_args()
+
+    ingest = load_ingest_youtube()
+    video_ids = [f"video{i:06d}" for i in range(args.videos)]
+    failing = "gone0000000"
+    video_ids.insert(len(video_ids) // 2, failing)
+    StubApi.unavailable = {failing}
+    StubApi.error = ingest.VideoUnavailable
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        options = ingest.IngestOptions(output_dir=output_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = ingest.ingest_batch(video_ids, options, args.workers, api_factory=StubApi)
+        written = {
+            video_id for video_id in video_ids
+            if ingest.output_path(output_dir, f"youtube-{video_id}-sections").exists()
+        }
+
+    if set(failures) != {failing}:
+        raise SystemExit(f"Error: failures reported for {sorted(failures)}, expected [{failing!r}]")
+    missing = [video_id for video_id in video_ids if video_id != failing and video_id not in written]
+    if missing:
+        raise SystemExit(f"Error: no sections file for {len(missing)} video(s), e.g. {missing[0]}")
+    if failing in written:
+        raise SystemExit(f"Error: a sections file was written for the failing video {failing}")
+    threads = min(args.workers, len(video_ids))
+    if StubApi.clients > threads:
+        raise SystemExit(f"Error: {StubApi.clients} API clients for {threads} worker threads")
+    if StubApi.peak > threads:
+        raise SystemExit(f"Error: {StubApi.peak} concurrent fetches with {threads} workers")
+
+    print(f"Batch of {len(video_ids)} videos on {threads} workers (stub API):")
+    print(f"  {len(written)} sections files; only {failing} failed: {failures[failing]}")
+    print(f"  {StubApi.clients} API client(s), at most {StubApi.peak} fetches at once")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,118 @@
 #!/usr/bin/env python3
 """
-Ingest an arXiv paper: download PDF, extract text, segment by sections, save JSON.
+Ingest arXiv papers: download PDF, extract text, segment by sections, save JSON.
 
 Downloads the paper PDF via the arxiv library, extracts markdown text with
-pymupdf4llm, detects section headings (numbered and unnumbered), and outputs
-a JSON file matching the resource_sections format used by seed-sections.ts.
+pymupdf4llm page by page, removes page numbers and running headers/footers
+(lines that recur at page edges), detects section headings (numbered and
+unnumbered), and outputs a JSON file matching the resource_sections format
+used by seed-sections.ts.
+
+Most papers ship their LaTeX source, and by default (--engine auto) that
+is used instead: the e-print archive is downloaded, \input/\include are
+resolved, and \section/\subsection become the same markdown headings
+(see ingestlib/latex.py), which is faster and more accurate than PDF
+extraction. Papers without source fall back to the PDF. The engine that
+produced each output is recorded in its meta file.
+
+Sections are cut at top-level headings; subsections (3.1, 3.2) stay in
+their parent. With --max-section-words N, a section longer than N words
+is split at its subsection headings (neighbours merged while they fit),
+and a part still too long is cut at paragraph breaks into near-equal
+pieces, so downstream translation work is spread evenly.
+
+Several papers can be ingested in one run: metadata is looked up with one
+id_list query per batch, PDFs are downloaded by a bounded worker pool, and
+papers are extracted in order while later downloads are still in flight.
+Long documents can be extracted in page ranges on a process pool
+(--extract-workers); the shards are stitched back together in page order.
+Sharding needs heading levels computed once for the whole document
+(pymupdf4llm's IdentifyHeaders). Releases that default to the layout
+engine rank heading font sizes over all pages they are given and have no
+such hook, so with them --extract-workers above 1 is rejected rather than
+silently running serially.
+
+Raw and cleaned markdown are cached under {output-dir}/.cache, keyed by the
+PDF hash, extractor version and cleaning settings, so re-running after a
+segmentation tweak skips extraction. The cache and downloaded PDFs share a
+disk budget (--cache-max-mb) enforced with least-recently-used eviction.
+
+PDFs are streamed over a pooled HTTP session to a ".part" file; an
+interrupted download resumes with a Range request, retries back off
+exponentially with jitter, and a PDF is only renamed into place once its
+length and header check out.
+
+Metadata and PDF requests draw from two token buckets shared by every
+thread and process on the host (--api-rate, --pdf-rate), so parallel
+ingests queue behind each other instead of getting throttled by arXiv.
+The time spent waiting is reported at the end of the run.
+
+Every row carries a token_estimate (tiktoken when available, else a local
+estimator; see ingestlib/tokens.py), counted in batches and cached by
+content hash, and the paper's total is recorded in the meta file so
+over-budget resources can be rejected or split before any LLM stage.
+
+Batches are checkpointed in a SQLite manifest (ingest-manifest.sqlite):
+each paper's download, extract, segment, write and load steps are
+recorded as they finish. A restarted batch skips papers already written
+with the same settings, resumes the rest from the downloaded PDFs and
+extraction cache, and stops retrying a paper after --max-attempts failed
+or crashed runs. Per-step throughput and failures are printed at the end.
+
+The arXiv IDs a paper cites (mostly in its References, which are not
+output as a section) are recorded in its meta file. With
+--prefetch-citations N, up to N of them are looked up, downloaded and
+extracted into the cache in the background, at low priority, so the
+likely next ingests are served locally.
+
+Concurrent ingests of the same paper (two users, or a retry overlapping
+the original run) do not duplicate work: downloads, extraction and the
+writing of each paper's output run under cross-process file locks (see
+ingestlib/locks.py), so the first process does the work and the others
+wait for and reuse its result. Locks left by crashed processes are
+detected and taken over.
+
+Re-ingesting is incremental: every row carries a content_hash, the arXiv
+version and updated timestamp are recorded in a meta file, and each run
+writes a changes file with only the sections added, changed, moved or
+removed since the previous run, for downstream translation and seeding.
+A new arXiv version replaces the previously downloaded PDF.
+
+With --stream, pages flow through cleaning and heading detection as
+generators and each section is written as soon as the next heading closes
+it, so the cleaned text and the sections are never all in memory at once.
+PDF extraction itself streams a few pages at a time only where heading
+levels can be shared across page ranges (see --extract-workers above).
+On the layout engine the whole PDF is still extracted in one call, so
+peak memory includes every page's markdown and --stream saves only what
+the later stages would hold. --stream never changes the extracted text.
+--format ndjson writes one section per line instead of a pretty JSON
+array, and --compress gzip|zstd compresses the sections and changes files.
+With --load-db, each paper's sections are also upserted into
+resource_sections (see load-sections.py). Rows are matched by position
+(resource, concept, sort_order), so when sections shift, existing notes
+stay attached to whatever text now has their position. Rows past the new
+last section are kept unless --prune-db is given, since deleting them
+cascades to user data.
 
 Usage:
   python scripts/ingest-arxiv.py 2005.11401
   python scripts/ingest-arxiv.py 2005.11401 --concept-id rag-basics
+  python scripts/ingest-arxiv.py 2005.11401 1706.03762 2203.02155
+  python scripts/ingest-arxiv.py --ids-file reading-list.txt --download-workers 8
+  python scripts/ingest-arxiv.py 2005.11401 --extract-workers 4
+  python scripts/ingest-arxiv.py 2005.11401 --stream
+  python scripts/ingest-arxiv.py 2005.11401 --engine pdf
+  python scripts/ingest-arxiv.py 2005.11401 --max-section-words 1500
+  python scripts/ingest-arxiv.py --ids-file reading-list.txt --retry-failed
+  python scripts/ingest-arxiv.py 1706.03762 --prefetch-citations 20
+  python scripts/ingest-arxiv.py --ids-file books.txt --stream --format ndjson --compress zstd
 Output:
-  scripts/output/arxiv-2005.11401-sections.json
+  scripts/output/arxiv-2005.11401-sections.json   all sections
+  scripts/output/arxiv-2005.11401-changes.json    sections changed since last run
+  scripts/output/arxiv-2005.11401-meta.json       version, engine, section hashes
+  scripts/output/ingest-manifest.sqlite           batch checkpoints
+  (with --format ndjson / --compress: -sections.ndjson, -sections.ndjson.zst, ...)
 
 Requires:
   pip install arxiv pymupdf4llm
@@ -18,10 +120,20 @@ Requires:
 
 import argparse
 import json
+import os
+import queue
 import re
 import sys
-import time
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AbstractContextManager, ExitStack, nullcontext
+from dataclasses import dataclass
+from itertools import accumulate, islice
 from pathlib import Path
+from typing import Iterable, Iterator
 
 try:
     import arxiv
@@ -35,6 +147,124 @@ except ImportError:
     print("Install: pip install --break-system-packages pymupdf4llm")
     sys.exit(1)
 
+# PyMuPDF is installed with pymupdf4llm; releases before 1.24 only ship "fitz"
+try:
+    import pymupdf
+except ImportError:
+    import fitz as pymupdf
+
+# requests is a dependency of arxiv
+import requests
+
+from ingestlib.cache import ExtractionCache, cache_key, file_digest, touch
+from ingestlib.changes import SectionChanges, content_hash, index_entry
+from ingestlib.download import (
+    DEFAULT_MAX_ATTEMPTS,
+    DownloadError,
+    download_file,
+    is_valid_pdf,
+    make_session,
+)
+from ingestlib.files import atomic_writer
+from ingestlib.latex import CONVERTER_VERSION, convert_source, read_source
+from ingestlib.locks import LOCK_DIR, ArtifactLock
+from ingestlib.manifest import BatchManifest
+from ingestlib.output import (
+    COMPRESSIONS,
+    FORMATS,
+    SectionWriter,
+    check_output_format,
+    output_path,
+    read_rows,
+)
+from ingestlib.pgload import SectionLoader
+from ingestlib.ratelimit import RateLimitedAdapter, TokenBucket
+from ingestlib.tokens import TOKENIZERS, TokenEstimator, with_token_estimates
+
+
+# ============================================================================
+# Batch settings
+# ============================================================================
+
+# Papers per arXiv API metadata query (id_list batch)
+METADATA_BATCH_SIZE = 100
+
+# Concurrent PDF downloads
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+# Page-sharded extraction: shards per worker (for load balancing) and the
+# smallest document worth splitting
+SHARDS_PER_WORKER = 2
+MIN_PAGES_PER_SHARD = 4
+
+# Streaming mode: pages per extraction shard (bounds pages held in memory)
+STREAM_SHARD_PAGES = 8
+
+# Read size when streaming cached text
+READ_CHUNK_SIZE = 1 << 16
+
+# Runs a paper may fail (or crash in) before the batch stops retrying it
+DEFAULT_MAX_ATTEMPTS_PER_PAPER = 3
+
+# Disk budget for the extraction cache plus downloaded PDFs
+DEFAULT_CACHE_MAX_MB = 2048
+
+# Host-wide request rates (requests/second), shared by all concurrent ingests.
+# arXiv's API terms ask for no more than one request every three seconds.
+ARXIV_API_RATE = 1 / 3
+ARXIV_PDF_RATE = 1.0
+ARXIV_PDF_BURST = 4
+
+# Trailing version suffix on arXiv IDs: "2005.11401v3" -> "2005.11401"
+ARXIV_VERSION_RE = re.compile(r"v\d+$")
+
+# arXiv identifiers cited in the text: "arXiv:2005.11401v2", "arXiv preprint
+# arXiv 1706.03762", "arxiv.org/abs/hep-th/9901001", "CoRR abs/1810.04805"
+ARXIV_CITATION_RE = re.compile(
+    r"(?:\barxiv\s*:?\s*|arxiv\.org/(?:abs|pdf)/|\babs/)"
+    r"(\d{4}\.\d{4,5}|[a-z][a-z-]*(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?",
+    re.IGNORECASE,
+)
+
+# Text engines: LaTeX source when arXiv has it, else PDF extraction
+ENGINES = ("auto", "latex", "pdf")
+
+# Downloaded e-prints (tar.gz, gzipped .tex or plain .tex, as served)
+SOURCE_SUFFIX = ".eprint"
+
+# Cited papers are looked up in batches of at most this many IDs
+PREFETCH_LOOKUP_BATCH = 20
+
+
+class IngestError(Exception):
+    """A single paper could not be ingested (not found, download or extraction failed)."""
+
+
+@dataclass
+class IngestOptions:
+    """Settings shared by every paper in a run."""
+
+    output_dir: Path
+    resource_id: str | None = None
+    concept_id: str | None = None
+    extract_workers: int = 1
+    cache: ExtractionCache | None = None
+    stream: bool = False
+    output_format: str = "json"
+    compression: str | None = None
+    download_attempts: int = DEFAULT_MAX_ATTEMPTS
+    pdf_limiter: TokenBucket | None = None
+    loader: SectionLoader | None = None
+    # Delete the resource's rows the new sections file lacks (cascades to user data)
+    prune: bool = False
+    tokens: TokenEstimator | None = None
+    manifest: BatchManifest | None = None
+    resume: bool = True
+    paper_attempts: int = DEFAULT_MAX_ATTEMPTS_PER_PAPER
+    prefetch_citations: int = 0
+    max_section_words: int = 0
+    engine: str = "auto"
+
 
 # ============================================================================
 # Section heading patterns for research papers
@@ -69,7 +299,23 @@ UNNUMBERED_HEADING_RE = re.compile(
     re.IGNORECASE,
 )
 
+# Fused numbered/unnumbered heading pattern used by scan_headings.
+# Group 1/2: number and title of a numbered heading; group 3: known section name.
+HEADING_RE = re.compile(
+    rf"^(?:(\d+\.?\d*\.?)\s+(.+)|({KNOWN_SECTIONS}))$",
+    re.IGNORECASE,
+)
+
+# Heading candidates: lines whose first non-blank characters are "#" or "**".
+# Anchoring on a literal "\n" (instead of MULTILINE "^") lets the regex engine
+# jump between line starts; the first line is checked separately.
+HEADING_CANDIDATE_RE = re.compile(r"\n[^\S\n]*(?:#|\*\*)[^\n]*")
+FIRST_LINE_CANDIDATE_RE = re.compile(r"[^\S\n]*(?:#|\*\*)[^\n]*")
+
 # Sections to skip entirely (references, appendix, acknowledgments, etc.)
+# Shorter sections are dropped as artifacts, and never split off
+MIN_SECTION_WORDS = 20
+
 SKIP_SECTIONS = re.compile(
     r"^(References|Bibliography|"
     r"Appendix|Appendices|Supplementary|"
@@ -79,94 +325,766 @@ SKIP_SECTIONS = re.compile(
 )
 
 
-def download_paper(paper_id: str, output_dir: Path) -> tuple[str, Path]:
-    """Download an arXiv paper PDF. Returns (paper_title, pdf_path)."""
-    print(f"Searching arXiv for paper: {paper_id}")
+def strip_version(paper_id: str) -> str:
+    """Drop the version suffix from an arXiv ID ("2005.11401v3" -> "2005.11401")."""
+    return ARXIV_VERSION_RE.sub("", paper_id)
+
+
+def find_cited_ids(text: str, cited: dict[str, None]) -> None:
+    """Add the (version-less) arXiv IDs cited in text to cited, in order of appearance."""
+    for m in ARXIV_CITATION_RE.finditer(text):
+        cited.setdefault(m.group(1), None)
+
+
+def tap_cited_ids(lines: Iterable[str], cited: dict[str, None]) -> Iterator[str]:
+    """Pass lines through unchanged, collecting the arXiv IDs they cite."""
+    for line in lines:
+        if "arxiv" in line.lower() or "abs/" in line:
+            find_cited_ids(line, cited)
+        yield line
+
+
+def read_paper_ids(paper_ids: list[str], ids_file: str | None) -> list[str]:
+    """Collect paper IDs from the command line and an optional IDs file.
 
+    The file has one ID per line; blank lines and '#' comments are ignored.
+    Duplicates are dropped, keeping the first occurrence.
+    """
+    collected = list(paper_ids)
+    if ids_file:
+        for line in Path(ids_file).read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                collected.append(line)
+    return list(dict.fromkeys(collected))
+
+
+def make_client(
+    api_url: str | None = None, limiter: TokenBucket | None = None
+) -> arxiv.Client:
+    """Build the arxiv client, optionally pointed at a different API endpoint.
+
+    api_url lets a local stand-in server replace export.arxiv.org; the PDF
+    links in the feed it returns are downloaded as-is. With a limiter, the
+    client's own per-instance delay is replaced by the host-wide bucket.
+    """
     client = arxiv.Client()
-    search = arxiv.Search(id_list=[paper_id])
+    if api_url:
+        client.query_url_format = api_url.rstrip("?") + "?{}"
+    session = getattr(client, "_session", None)
+    if limiter is not None and session is not None:
+        adapter = RateLimitedAdapter(limiter)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        client.delay_seconds = 0
+    return client
+
+
+def query_batch(
+    client: arxiv.Client,
+    batch: list[str],
+    found: dict[str, arxiv.Result],
+    errors: dict[str, str],
+) -> None:
+    """One id_list query; if it fails, the halves are queried separately.
+
+    A malformed ID or a transient error thus costs only the IDs it affects:
+    an ID that still fails on its own is recorded in errors.
+    """
+    search = arxiv.Search(id_list=batch, max_results=len(batch))
+    by_id: dict[str, arxiv.Result] = {}
+    try:
+        for result in client.results(search):
+            short_id = result.get_short_id()
+            by_id[short_id] = result
+            by_id.setdefault(strip_version(short_id), result)
+    except Exception as e:
+        if len(batch) == 1:
+            print(f"  Warning: Metadata query failed for {batch[0]}: {e}")
+            errors[batch[0]] = str(e)
+            return
+        print(f"  Warning: Metadata query failed for {len(batch)} paper(s), splitting: {e}")
+        middle = len(batch) // 2
+        query_batch(client, batch[:middle], found, errors)
+        query_batch(client, batch[middle:], found, errors)
+        return
+
+    for paper_id in batch:
+        result = by_id.get(paper_id) or by_id.get(strip_version(paper_id))
+        if result is not None:
+            found[paper_id] = result
+
+
+def lookup_papers(
+    client: arxiv.Client,
+    paper_ids: list[str],
+    batch_size: int = METADATA_BATCH_SIZE,
+    errors: dict[str, str] | None = None,
+) -> dict[str, arxiv.Result]:
+    """Look up metadata for many papers with one id_list query per batch.
+
+    Returns {requested_id: result}. IDs that arXiv does not return are
+    absent; IDs whose query failed (see query_batch) are absent too, and
+    their errors are added to errors, if given.
+    """
+    found: dict[str, arxiv.Result] = {}
+    if errors is None:
+        errors = {}
+
+    for start in range(0, len(paper_ids), batch_size):
+        batch = paper_ids[start:start + batch_size]
+        print(f"Searching arXiv for {len(batch)} paper(s)...")
+        query_batch(client, batch, found, errors)
+
+    print(f"  Found {len(found)} of {len(paper_ids)} paper(s)")
+    return found
+
+
+def arxiv_version(result: arxiv.Result) -> str:
+    """Version suffix of a result ("v3"), or "" if the ID has none."""
+    m = ARXIV_VERSION_RE.search(result.get_short_id())
+    return m.group() if m else ""
+
 
+def meta_path(output_dir: Path, safe_id: str) -> Path:
+    return output_dir / f"arxiv-{safe_id}-meta.json"
+
+
+def load_meta(output_dir: Path, safe_id: str) -> dict | None:
+    """Read the metadata recorded by the previous ingest of a paper, if any.
+
+    {paper_id, arxiv_id, version, updated, title, sections: [index entries]}
+    """
     try:
-        result = next(client.results(search))
-    except StopIteration:
-        print(f"Error: Paper '{paper_id}' not found on arXiv.")
-        sys.exit(1)
+        return json.loads(meta_path(output_dir, safe_id).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
 
-    print(f"  Title: {result.title}")
-    print(f"  Authors: {', '.join(a.name for a in result.authors[:5])}")
-    print(f"  Published: {result.published.strftime('%Y-%m-%d')}")
-    print(f"  PDF URL: {result.pdf_url}")
 
+def load_previous_index(output_dir: Path, safe_id: str, meta: dict | None) -> list[dict]:
+    """Section index of the previous ingest, for change detection.
+
+    Comes from the meta file; outputs written before it existed are indexed
+    from the sections file itself.
+    """
+    if meta is not None:
+        return meta.get("sections", [])
+
+    sections_file = output_dir / f"arxiv-{safe_id}-sections.json"
+    try:
+        rows = json.loads(sections_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+    return [
+        index_entry({**row, "content_hash": content_hash(row["content_original"])})
+        for row in rows
+    ]
+
+
+def download_paper(
+    result: arxiv.Result,
+    paper_id: str,
+    output_dir: Path,
+    session: requests.Session,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> Path:
+    """Download an arXiv paper PDF. Returns pdf_path.
+
+    An existing PDF is reused if it looks complete, unless the previous
+    ingest recorded a different arXiv version, in which case the new
+    version is downloaded. Interrupted downloads resume from the partial
+    file on the next attempt (or the next run). Safe to call from worker
+    threads; messages are prefixed with the paper ID.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
     safe_id = paper_id.replace("/", "-")
     pdf_filename = f"arxiv-{safe_id}.pdf"
     pdf_path = output_dir / pdf_filename
 
     if pdf_path.exists():
-        print(f"  PDF already exists: {pdf_path}")
-        return result.title, pdf_path
+        meta = load_meta(output_dir, safe_id)
+        version = arxiv_version(result)
+        if not is_valid_pdf(pdf_path):
+            print(f"  [{paper_id}] Existing PDF is truncated or invalid, re-downloading")
+            pdf_path.unlink()
+        elif meta is None or meta.get("version") == version:
+            print(f"  [{paper_id}] PDF already exists: {pdf_path}")
+            return pdf_path
+        else:
+            print(f"  [{paper_id}] New arXiv version {meta.get('version')} -> {version}")
+            pdf_path.unlink()
+            pdf_path.with_name(pdf_filename + ".part").unlink(missing_ok=True)
 
-    print(f"  Downloading PDF...")
-    max_retries = 2
-    for attempt in range(max_retries):
-        try:
-            result.download_pdf(dirpath=str(output_dir), filename=pdf_filename)
-            print(f"  Saved to: {pdf_path}")
-            return result.title, pdf_path
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"  Download failed (attempt {attempt + 1}): {e}")
-                print(f"  Retrying in 3 seconds...")
-                time.sleep(3)
-            else:
-                print(f"Error: Failed to download PDF after {max_retries} attempts: {e}")
-                sys.exit(1)
+    print(f"  [{paper_id}] Downloading PDF from {result.pdf_url}")
+    try:
+        download_file(
+            session,
+            result.pdf_url,
+            pdf_path,
+            max_attempts=max_attempts,
+            log=lambda message: print(f"  [{paper_id}] {message}"),
+        )
+    except DownloadError as e:
+        raise IngestError(f"Failed to download PDF: {e}") from e
+    print(f"  [{paper_id}] Saved to: {pdf_path}")
+    return pdf_path
+
+
+def download_source(
+    result: arxiv.Result,
+    paper_id: str,
+    output_dir: Path,
+    session: requests.Session,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> Path | None:
+    """Download an arXiv paper's LaTeX e-print. Returns its path, or None if there is none.
+
+    PDF-only submissions (arXiv serves the PDF as the e-print) and archives
+    without a LaTeX main file count as having no source. A previous ingest
+    of the same version that fell back to the PDF is trusted, so the
+    e-print is not fetched again.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    safe_id = paper_id.replace("/", "-")
+    source_path = output_dir / f"arxiv-{safe_id}{SOURCE_SUFFIX}"
+    meta = load_meta(output_dir, safe_id)
+    version = arxiv_version(result)
+    same_version = meta is None or meta.get("version") == version
+
+    if source_path.exists():
+        if same_version:
+            print(f"  [{paper_id}] Source already exists: {source_path}")
+            return source_path
+        source_path.unlink()
+    elif meta is not None and same_version and meta.get("engine") == "pdf":
+        return None
 
-    # Unreachable, but satisfies type checker
-    sys.exit(1)
+    url = result.source_url()
+    if url is None:
+        return None
+    print(f"  [{paper_id}] Downloading LaTeX source from {url}")
+    try:
+        download_file(
+            session,
+            url,
+            source_path,
+            max_attempts=max_attempts,
+            magic=None,
+            min_size=1,
+            trailer=None,
+            log=lambda message: print(f"  [{paper_id}] {message}"),
+        )
+    except DownloadError as e:
+        print(f"  [{paper_id}] No source: {e}")
+        return None
+    if read_source(source_path) is None:
+        print(f"  [{paper_id}] No LaTeX source (PDF-only submission)")
+        source_path.unlink()
+        return None
+    print(f"  [{paper_id}] Saved to: {source_path}")
+    return source_path
 
 
-def extract_text(pdf_path: Path) -> str:
-    """Extract markdown text from PDF using pymupdf4llm."""
-    print(f"\nExtracting text from {pdf_path.name}...")
-    md = pymupdf4llm.to_markdown(str(pdf_path))
-    word_count = len(md.split())
-    print(f"  Raw extraction: {word_count} words, {len(md)} chars")
+def fetch_paper(
+    options: IngestOptions,
+    result: arxiv.Result,
+    paper_id: str,
+    session: requests.Session,
+) -> Path:
+    """Download what the engine needs: the LaTeX source, else (auto) the PDF.
+
+    Each file is downloaded under a cross-process lock, so concurrent
+    ingests of the same paper download it once and share it.
+    """
+    safe_id = paper_id.replace("/", "-")
+    lock_dir = options.output_dir / LOCK_DIR
+
+    def log(message: str) -> None:
+        print(f"  [{paper_id}] {message}")
+
+    if options.engine != "pdf":
+        with ArtifactLock(lock_dir, f"arxiv-{safe_id}{SOURCE_SUFFIX}", log):
+            source_path = download_source(
+                result, paper_id, options.output_dir, session, options.download_attempts
+            )
+        if source_path is not None:
+            return source_path
+        if options.engine == "latex":
+            raise IngestError("No LaTeX source on arXiv (use --engine auto or pdf)")
+    with ArtifactLock(lock_dir, f"arxiv-{safe_id}.pdf", log):
+        return download_paper(
+            result, paper_id, options.output_dir, session, options.download_attempts
+        )
+
+
+def paper_engine(path: Path) -> str:
+    """The engine a downloaded file is read with: "latex" or "pdf"."""
+    return "latex" if path.suffix == SOURCE_SUFFIX else "pdf"
+
+
+def download_step(
+    options: IngestOptions,
+    result: arxiv.Result,
+    paper_id: str,
+    session: requests.Session,
+) -> Path:
+    """fetch_paper as a manifest step. Runs on a download worker thread."""
+    with paper_step(options, paper_id, "download"):
+        return fetch_paper(options, result, paper_id, session)
+
+
+def split_page_ranges(page_count: int, shards: int) -> list[tuple[int, int]]:
+    """Split pages [0, page_count) into at most `shards` contiguous, near-equal ranges."""
+    shards = max(1, min(shards, page_count))
+    base, extra = divmod(page_count, shards)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for i in range(shards):
+        end = start + base + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def headers_shareable() -> bool:
+    """Whether pymupdf4llm can compute heading levels once and share them
+    between page ranges (only releases without the layout engine can)."""
+    return hasattr(pymupdf4llm, "IdentifyHeaders")
+
+
+def header_info(pdf: "str | pymupdf.Document") -> object | None:
+    """Document-wide heading levels for sharded extraction, if pymupdf4llm has them.
+
+    Releases with the layout engine no longer ship IdentifyHeaders: they
+    rank heading font sizes over the pages of each to_markdown call, so a
+    shard's levels depend on its pages. None means pages must be extracted
+    in one call to get the same markdown as a serial run.
+    """
+    return pymupdf4llm.IdentifyHeaders(pdf) if headers_shareable() else None
+
+
+def to_page_chunks(
+    pdf: "str | pymupdf.Document", hdr_info: object | None = None, **kwargs
+) -> list[str]:
+    """Run pymupdf4llm in page-chunk mode and return one markdown string per page."""
+    if hdr_info is not None:
+        kwargs["hdr_info"] = hdr_info
+    chunks = pymupdf4llm.to_markdown(pdf, page_chunks=True, **kwargs)
+    return [chunk["text"] for chunk in chunks]
+
+
+def extract_page_range(
+    pdf_path: str, start: int, end: int, hdr_info: object | None
+) -> list[str]:
+    """Extract markdown for pages [start, end). Runs in a worker process."""
+    return to_page_chunks(pdf_path, pages=list(range(start, end)), hdr_info=hdr_info)
+
+
+def extract_markdown(
+    pdf_path: Path,
+    pool: ProcessPoolExecutor | None = None,
+    workers: int = 1,
+) -> list[str]:
+    """Run pymupdf4llm over the whole PDF, sharded by page range when a pool is given.
+
+    Returns the markdown of each page, in page order; joined, they are the
+    same text as a whole-document to_markdown call. Heading levels depend
+    on font sizes across the document, so for sharded runs they are computed
+    once over all pages and shared with every shard; when pymupdf4llm
+    cannot share them (see header_info), the document is extracted serially.
+    """
+    if pool is None or workers <= 1:
+        return to_page_chunks(str(pdf_path))
+
+    with pymupdf.open(str(pdf_path)) as doc:
+        page_count = doc.page_count
+
+    shards = min(workers * SHARDS_PER_WORKER, page_count // MIN_PAGES_PER_SHARD)
+    if shards <= 1:
+        return to_page_chunks(str(pdf_path))
+
+    hdr_info = header_info(str(pdf_path))
+    if hdr_info is None:
+        print("  Heading levels cannot be shared between shards; extracting serially")
+        return to_page_chunks(str(pdf_path))
+    ranges = split_page_ranges(page_count, shards)
+    print(f"  Extracting {page_count} pages in {len(ranges)} shards on {workers} workers")
+    futures = [
+        pool.submit(extract_page_range, str(pdf_path), start, end, hdr_info)
+        for start, end in ranges
+    ]
+    return [page for f in futures for page in f.result()]
+
+
+def iter_page_chunks(
+    pdf_path: Path,
+    pool: ProcessPoolExecutor | None = None,
+    workers: int = 1,
+) -> Iterator[str]:
+    """Yield page markdown in page order, extracting a few pages at a time.
+
+    Streaming counterpart of extract_markdown, yielding the same pages.
+    Serially, pages are extracted one by one from a single open document;
+    with a pool, at most `workers` shards of STREAM_SHARD_PAGES pages are
+    in flight at once. Both need heading levels shared across calls (see
+    header_info); without them the document is extracted in one call and
+    only the later stages stream.
+    """
+    with pymupdf.open(str(pdf_path)) as doc:
+        page_count = doc.page_count
+        hdr_info = header_info(doc)
+        if hdr_info is None:
+            print("  Heading levels cannot be shared between page ranges; extracting in one pass")
+            yield from to_page_chunks(doc)
+            return
+        if pool is None or workers <= 1:
+            for pno in range(page_count):
+                yield from to_page_chunks(doc, pages=[pno], hdr_info=hdr_info)
+            return
+
+    ranges = iter(split_page_ranges(page_count, -(-page_count // STREAM_SHARD_PAGES)))
+    in_flight: deque[Future] = deque(
+        pool.submit(extract_page_range, str(pdf_path), start, end, hdr_info)
+        for start, end in islice(ranges, workers)
+    )
+    while in_flight:
+        pages = in_flight.popleft().result()
+        for start, end in islice(ranges, 1):
+            in_flight.append(
+                pool.submit(extract_page_range, str(pdf_path), start, end, hdr_info)
+            )
+        yield from pages
+
+
+def iter_extracted_pages(
+    pdf_path: Path,
+    pool: ProcessPoolExecutor | None = None,
+    workers: int = 1,
+) -> Iterator[str]:
+    """Streaming extract_text: yield pages, then apply the same sanity check."""
+    print(f"\nExtracting text from {pdf_path.name} (streaming)...")
+    page_count = word_count = char_count = 0
+    for page in iter_page_chunks(pdf_path, pool, workers):
+        page_count += 1
+        word_count += len(page.split())
+        char_count += len(page)
+        yield page
+    print(f"  Raw extraction: {page_count} pages, {word_count} words, {char_count} chars")
 
     if word_count < 50:
-        print("Error: Extraction produced almost no text. PDF may be image-only.")
-        sys.exit(1)
+        raise IngestError("Extraction produced almost no text. PDF may be image-only.")
 
-    return md
 
+def extract_text(
+    pdf_path: Path,
+    pool: ProcessPoolExecutor | None = None,
+    workers: int = 1,
+) -> list[str]:
+    """Extract markdown text from PDF using pymupdf4llm. Returns one string per page."""
+    print(f"\nExtracting text from {pdf_path.name}...")
+    pages = extract_markdown(pdf_path, pool, workers)
+    word_count = sum(len(page.split()) for page in pages)
+    char_count = sum(len(page) for page in pages)
+    print(f"  Raw extraction: {len(pages)} pages, {word_count} words, {char_count} chars")
 
-def clean_page_artifacts(text: str) -> str:
-    """Remove page headers, footers, page numbers, and excessive blank lines."""
-    lines = text.split("\n")
-    cleaned = []
+    if word_count < 50:
+        raise IngestError("Extraction produced almost no text. PDF may be image-only.")
 
-    for line in lines:
-        stripped = line.strip()
+    return pages
 
-        # Skip standalone page numbers (bold or plain)
-        if re.match(r"^\*?\*?\d+\*?\*?$", stripped):
-            continue
 
-        # Skip lines that look like "Author et al. | Page N" header/footer
-        if re.match(r"^.{0,60}\|\s*\d+\s*$", stripped):
-            continue
+# ============================================================================
+# Page artifact cleaning
+# ============================================================================
 
-        # Skip arXiv identifier lines repeated as headers
-        if re.match(r"^arXiv:\d{4}\.\d{4,5}", stripped):
-            continue
+# Lines dropped wherever they appear: standalone page numbers (bold or plain),
+# "Author et al. | Page N" headers/footers, and arXiv identifier stamps
+PAGE_ARTIFACT_RE = re.compile(
+    r"^(?:\*?\*?\d+\*?\*?$"
+    r"|.{0,60}\|\s*\d+\s*$"
+    r"|arXiv:\d{4}\.\d{4,5})"
+)
 
-        cleaned.append(line)
+# Running headers/footers: a line among the first/last RUNNING_EDGE_LINES
+# non-blank lines of a page that recurs at a page edge on at least
+# RUNNING_MIN_PAGES pages. Page-number-like tokens are ignored when
+# comparing ("Page 3" == "Page 4"), and only short lines that are not
+# headings are considered (see running_line_key).
+RUNNING_MIN_PAGES = 3
+RUNNING_EDGE_LINES = 3
+RUNNING_MAX_CHARS = 120
+# Bound on distinct edge lines tracked (least recently seen are dropped)
+RUNNING_TABLE_SIZE = 512
+
+# At most this many consecutive newlines survive (4+ blank lines -> 2)
+MAX_NEWLINES = 3
+
+# Page-number-like tokens: standalone integers, not parts of section
+# numbers ("2.1"), identifiers ("1706.03762", "v2") or words
+PAGE_NUMBER_RE = re.compile(r"(?<![\w.])\d+(?!\w|\.\w)")
+
+# Identifies the cleaning rules in cache keys; bump when the cleaner changes
+CLEANING_SETTINGS = (
+    f"page-cleaner/v4/min_pages={RUNNING_MIN_PAGES}/edge={RUNNING_EDGE_LINES}"
+    f"/max_chars={RUNNING_MAX_CHARS}/table={RUNNING_TABLE_SIZE}"
+)
 
-    result = "\n".join(cleaned)
-    # Collapse 4+ blank lines into 2
-    result = re.sub(r"\n{4,}", "\n\n\n", result)
 
-    return result
+def running_line_key(stripped: str) -> str | None:
+    """Comparison key for running header/footer lines, None for a heading.
+
+    Section headings (parse_heading_candidate) never count as running
+    lines, even at the top of every page. Other bold or "#" lines must
+    recur verbatim, so numbered titles such as "**Chapter 2**" and
+    "**Chapter 3**" stay distinct; in plain lines page numbers are ignored.
+    """
+    if stripped[0] in "#*":
+        if parse_heading_candidate(stripped) is not None:
+            return None
+        if is_bold_line(stripped):
+            return " ".join(stripped.lower().split())
+    return " ".join(PAGE_NUMBER_RE.sub("#", stripped).lower().split())
+
+
+class PageCleaner:
+    """Single-pass cleaner over a stream of page chunks.
+
+    Pages are held back for 2 x (RUNNING_MIN_PAGES - 1) pages of lookahead,
+    so a running header on page 1 is recognized once it has recurred on
+    pages 2 and 3, or on pages 3 and 5 when it alternates with another one
+    (odd/even page layouts). Edge-line counts live in a bounded LRU table: real running lines
+    recur every page or two and stay in it, one-off lines age out.
+    Page numbers and artifact lines are dropped and blank-line runs are
+    collapsed while the text is written out, with no extra full-text copy.
+    """
+
+    def __init__(
+        self,
+        min_pages: int = RUNNING_MIN_PAGES,
+        edge_lines: int = RUNNING_EDGE_LINES,
+        table_size: int = RUNNING_TABLE_SIZE,
+    ) -> None:
+        self.min_pages = min_pages
+        self.edge_lines = edge_lines
+        self.table_size = table_size
+        self.edge_counts: OrderedDict[str, int] = OrderedDict()
+        self.pending: deque[tuple[list[str], dict[int, str]]] = deque()
+        # Text after the last newline of the previous page (continues on the next)
+        self.carry = ""
+        self.newlines = 0
+        self.started = False
+        self.running_removed = 0
+
+    def feed(self, page: str) -> str:
+        """Add one page; return the cleaned text of pages that are now final."""
+        lines = (self.carry + page).split("\n")
+        self.carry = lines.pop()
+        edges = self.edge_keys(lines)
+
+        for key in set(edges.values()):
+            self.edge_counts[key] = self.edge_counts.get(key, 0) + 1
+            self.edge_counts.move_to_end(key)
+        while len(self.edge_counts) > self.table_size:
+            self.edge_counts.popitem(last=False)
+
+        self.pending.append((lines, edges))
+        out: list[str] = []
+        # Enough lookahead for a header on every other page to reach min_pages
+        while len(self.pending) > 2 * (self.min_pages - 1):
+            self.emit_page(*self.pending.popleft(), out)
+        return "".join(out)
+
+    def finish(self) -> str:
+        """Flush the held-back pages and the trailing partial line."""
+        out: list[str] = []
+        while self.pending:
+            self.emit_page(*self.pending.popleft(), out)
+        if not PAGE_ARTIFACT_RE.match(self.carry.strip()):
+            self.write(self.carry, out)
+        self.carry = ""
+        out.append("\n" * min(self.newlines, MAX_NEWLINES))
+        self.newlines = 0
+        return "".join(out)
+
+    def edge_keys(self, lines: list[str]) -> dict[int, str]:
+        """Map line index -> running-line key for the page's edge lines."""
+        content = []
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped and not PAGE_ARTIFACT_RE.match(stripped):
+                content.append((i, stripped))
+
+        edges: dict[int, str] = {}
+        for i, stripped in content[:self.edge_lines] + content[-self.edge_lines:]:
+            if len(stripped) <= RUNNING_MAX_CHARS:
+                key = running_line_key(stripped)
+                if key is not None:
+                    edges[i] = key
+        return edges
+
+    def emit_page(self, lines: list[str], edges: dict[int, str], out: list[str]) -> None:
+        for i, line in enumerate(lines):
+            if PAGE_ARTIFACT_RE.match(line.strip()):
+                continue
+            key = edges.get(i)
+            if key is not None and self.edge_counts.get(key, 0) >= self.min_pages:
+                self.running_removed += 1
+                continue
+            self.write(line, out)
+
+    def write(self, line: str, out: list[str]) -> None:
+        # Blank lines only add to the pending newline run, which is capped
+        # when the next non-blank line is written.
+        if self.started:
+            self.newlines += 1
+        self.started = True
+        if line:
+            out.append("\n" * min(self.newlines, MAX_NEWLINES))
+            out.append(line)
+            self.newlines = 0
+
+
+def clean_pages(pages: Iterable[str]) -> Iterator[str]:
+    """Stream cleaned text for a sequence of page chunks (see PageCleaner)."""
+    cleaner = PageCleaner()
+    for page in pages:
+        chunk = cleaner.feed(page)
+        if chunk:
+            yield chunk
+    yield cleaner.finish()
+    if cleaner.running_removed:
+        print(f"  Removed {cleaner.running_removed} running header/footer lines")
+
+
+def clean_page_artifacts(pages: list[str] | str) -> str:
+    """Remove running headers/footers, page numbers, and excessive blank lines.
+
+    Takes the extractor's page chunks (a plain string is treated as one page,
+    which disables running header detection).
+    """
+    if isinstance(pages, str):
+        pages = [pages]
+    return "".join(clean_pages(pages))
+
+
+def extractor_id() -> str:
+    """Name and version of the extractor, for cache keys."""
+    version = getattr(pymupdf4llm, "__version__", None) or getattr(pymupdf4llm, "version", "?")
+    return f"pymupdf4llm-{version}/pymupdf-{getattr(pymupdf, 'VersionBind', '?')}"
+
+
+def cache_pages(pages: Iterable[str], cache: ExtractionCache, key: str) -> Iterator[str]:
+    """Pass pages through while writing them to the cache, one JSON string per line."""
+    with cache.writer(key, "pages.jsonl") as out:
+        for page in pages:
+            out.write(json.dumps(page, ensure_ascii=False) + "\n")
+            yield page
+
+
+def iter_cleaned_chunks(
+    pdf_path: Path,
+    cache: ExtractionCache | None,
+    pool: ProcessPoolExecutor | None = None,
+    workers: int = 1,
+    stream: bool = False,
+) -> Iterator[str]:
+    """Yield the cleaned markdown of a PDF in chunks, extracting only on a cache miss.
+
+    The cache holds the raw page chunks (JSON lines) and the cleaned text;
+    both are written as the text flows through and only become visible once
+    complete. With stream=True pages are extracted incrementally
+    (iter_extracted_pages) instead of all at once.
+    """
+    def extracted() -> Iterable[str]:
+        if stream:
+            return iter_extracted_pages(pdf_path, pool, workers)
+        return extract_text(pdf_path, pool, workers)
+
+    if cache is None:
+        yield from clean_pages(extracted())
+        return
+
+    raw_key = cache_key(file_digest(pdf_path), extractor_id())
+    clean_key = cache_key(raw_key, CLEANING_SETTINGS)
+
+    with ExitStack() as stack:
+        cached_clean = cache.open(clean_key, "clean.md")
+        if cached_clean is None:
+            # Single flight: if another process is extracting this PDF,
+            # wait for it and read its result
+            stack.enter_context(
+                ArtifactLock(cache.root / LOCK_DIR, clean_key, lambda m: print(f"  {m}"))
+            )
+            cached_clean = cache.open(clean_key, "clean.md")
+        if cached_clean is not None:
+            print(f"\nUsing cached extraction for {pdf_path.name}")
+            with cached_clean:
+                yield from iter(lambda: cached_clean.read(READ_CHUNK_SIZE), "")
+            return
+
+        cached_pages = cache.open(raw_key, "pages.jsonl")
+        if cached_pages is None:
+            pages = cache_pages(extracted(), cache, raw_key)
+        else:
+            print(f"\nUsing cached raw extraction for {pdf_path.name}")
+            stack.enter_context(cached_pages)
+            pages = (json.loads(line) for line in cached_pages)
+
+        out = stack.enter_context(cache.writer(clean_key, "clean.md"))
+        for chunk in clean_pages(pages):
+            out.write(chunk)
+            yield chunk
+
+
+def load_source_text(source_path: Path, cache: ExtractionCache | None) -> str:
+    """Markdown rendered from a LaTeX e-print, converting only on a cache miss."""
+    if cache is None:
+        return render_source(source_path)
+
+    key = cache_key(file_digest(source_path), CONVERTER_VERSION)
+    cached = cache.get(key, "latex.md")
+    if cached is None:
+        with ArtifactLock(cache.root / LOCK_DIR, key, lambda m: print(f"  {m}")):
+            cached = cache.get(key, "latex.md")
+            if cached is None:
+                text = render_source(source_path)
+                cache.put(key, "latex.md", text)
+                return text
+    print(f"\nUsing cached conversion for {source_path.name}")
+    return cached
+
+
+def render_source(source_path: Path) -> str:
+    print(f"\nRendering LaTeX source {source_path.name}...")
+    text = convert_source(source_path)
+    if text is None:
+        raise IngestError(f"{source_path.name} is not a LaTeX source archive")
+    return text
+
+
+def iter_paper_chunks(
+    path: Path,
+    options: IngestOptions,
+    pool: ProcessPoolExecutor | None = None,
+    stream: bool = False,
+) -> Iterator[str]:
+    """The paper's markdown in chunks, from its LaTeX source or its PDF."""
+    if paper_engine(path) == "latex":
+        yield load_source_text(path, options.cache)
+    else:
+        yield from iter_cleaned_chunks(
+            path, options.cache, pool, options.extract_workers, stream=stream
+        )
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Split streamed text into lines; same lines as "".join(chunks).split("\n")."""
+    carry = ""
+    for chunk in chunks:
+        lines = (carry + chunk).split("\n")
+        carry = lines.pop()
+        yield from lines
+    yield carry
 
 
 def normalize_heading_line(line: str) -> str:
@@ -238,59 +1156,137 @@ def detect_heading(line: str) -> tuple[str, str] | None:
     return None
 
 
-def segment_sections(text: str) -> list[dict]:
-    """Split text into sections based on detected headings.
+def iter_heading_candidates(text: str) -> Iterator[tuple[int, str]]:
+    """Yield (line_start_offset, line) for lines that could be headings."""
+    m = FIRST_LINE_CANDIDATE_RE.match(text)
+    if m:
+        yield 0, m.group()
+    for m in HEADING_CANDIDATE_RE.finditer(text):
+        yield m.start() + 1, m.group()
 
-    Returns list of {section_title, content, sort_order}.
-    If no headings are found, returns the entire text as a single section.
+
+def scan_headings(text: str) -> list[dict]:
+    """Find every section heading in one pass over the text.
+
+    Equivalent to calling detect_heading on each line, but only lines that
+    start with "#" or "**" are looked at, and each candidate is normalized
+    with string operations and matched once against HEADING_RE.
+
+    Returns [{line, number, title, skip, top_level}] in document order.
+    top_level is True for unnumbered and single-number ("3") headings.
     """
-    lines = text.split("\n")
     headings: list[dict] = []
+    line_no = 0
+    pos = 0
 
-    for i, line in enumerate(lines):
-        result = detect_heading(line)
+    for line_start, line in iter_heading_candidates(text):
+        result = parse_heading_candidate(line.strip())
         if result is None:
             continue
 
-        num, title = result
+        line_no += text.count("\n", pos, line_start)
+        pos = line_start
+        headings.append(heading_record(line_no, *result))
 
-        # Skip references and appendix sections
-        if SKIP_SECTIONS.match(title):
-            headings.append({
-                "line": i,
-                "number": num,
-                "title": title,
-                "skip": True,
-            })
-            continue
+    return headings
+
+
+def parse_heading_candidate(stripped: str) -> tuple[str, str] | None:
+    """detect_heading for a stripped line that starts with "#" or "*".
+
+    Normalizes with string operations and matches HEADING_RE once.
+    """
+    if stripped[0] == "#":
+        # Same as normalize_heading_line's "^#{1,3}\s*" (whitespace is collapsed below)
+        hashes = len(stripped) - len(stripped.lstrip("#"))
+        body = stripped[min(hashes, 3):]
+    elif stripped.count("**") >= 2:
+        body = stripped
+    else:
+        return None
+
+    normalized = " ".join(body.replace("**", "").split())
+    if not normalized:
+        return None
+
+    hm = HEADING_RE.match(normalized)
+    if hm is None:
+        return None
+
+    if hm.group(1) is not None:
+        return hm.group(1).rstrip("."), hm.group(2).strip()
+    return "", hm.group(3).strip()
+
+
+def heading_record(line_no: int, number: str, title: str) -> dict:
+    return {
+        "line": line_no,
+        "number": number,
+        "title": title,
+        "skip": SKIP_SECTIONS.match(title) is not None,
+        "top_level": "." not in number,
+    }
+
+
+class Document:
+    """Cleaned text plus a line index, so sections never copy text.
+
+    line_starts[i] is the offset of line i in text (with one extra entry
+    past the end), and word_prefix[i] is the number of words on lines
+    [0, i). A range of lines maps to a text slice in O(1), and its word
+    count is a difference of prefix sums: lines are separated by whitespace,
+    so per-line counts add up to len(content.split()) exactly.
+    """
+
+    __slots__ = ("text", "line_starts", "word_prefix")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        lines = text.split("\n")
+        self.line_starts = array("q", accumulate((len(line) + 1 for line in lines), initial=0))
+        self.word_prefix = array("q", accumulate((len(line.split()) for line in lines), initial=0))
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) - 1
+
+    @property
+    def word_count(self) -> int:
+        return self.word_prefix[-1]
+
+    def words(self, start: int, end: int) -> int:
+        """Word count of lines [start, end)."""
+        return self.word_prefix[end] - self.word_prefix[start]
+
+    def content(self, start: int, end: int) -> str:
+        """Text of lines [start, end), stripped: "\n".join(lines[start:end]).strip()."""
+        if end <= start:
+            return ""
+        return self.text[self.line_starts[start]:self.line_starts[end] - 1].strip()
 
-        headings.append({
-            "line": i,
-            "number": num,
-            "title": title,
-            "skip": False,
-        })
 
-    # Filter to only top-level sections (avoid subsections like 3.1, 3.2)
-    # Keep: single numbers (1, 2, 3) and unnumbered headings
-    # Also keep subsections but they'll be merged into parent
-    top_level = []
-    for h in headings:
-        num = h["number"]
-        # Unnumbered or single-digit numbered = top-level
-        if num == "" or re.match(r"^\d+$", num):
-            top_level.append(h)
+def segment_document(doc: Document) -> list[dict]:
+    """Split a document into sections based on detected headings.
+
+    Returns list of {section_title, sort_order, word_count, lines} where
+    lines is the (start, end) line range; text is only materialized by
+    section_content when the section is written out.
+    If no headings are found, returns the entire text as a single section.
+    """
+    # Only top-level sections are boundaries: single numbers (1, 2, 3) and
+    # unnumbered headings. Subsections (3.1, 3.2) are merged into their parent.
+    top_level = [h for h in scan_headings(doc.text) if h["top_level"]]
+    full_paper = [{
+        "section_title": "Full Paper",
+        "sort_order": 0,
+        "word_count": doc.word_count,
+        "lines": (0, doc.line_count),
+    }]
 
     if not top_level:
         # No headings detected — return entire text as one section
         print("  Warning: No section headings detected. Treating entire paper as one section.")
-        word_count = len(text.split())
-        return [{
-            "section_title": "Full Paper",
-            "content": text.strip(),
-            "sort_order": 0,
-            "word_count": word_count,
-        }]
+        return full_paper
 
     # Build sections from heading boundaries
     sections = []
@@ -305,67 +1301,800 @@ def segment_sections(text: str) -> list[dict]:
         if i < len(top_level) - 1:
             end_line = top_level[i + 1]["line"]
         else:
-            end_line = len(lines)
+            end_line = doc.line_count
 
-        content = "\n".join(lines[start_line:end_line]).strip()
-        word_count = len(content.split())
+        word_count = doc.words(start_line, end_line)
 
         # Skip very short sections (probably artifacts)
-        if word_count < 20:
+        if word_count < MIN_SECTION_WORDS:
             continue
 
-        title = h["title"]
-        if h["number"]:
-            title = f"{h['number']}. {title}"
-
         sections.append({
-            "section_title": title,
-            "content": content,
+            "section_title": section_title(h),
             "sort_order": sort_order,
             "word_count": word_count,
+            "lines": (start_line, end_line),
         })
         sort_order += 1
 
     if not sections:
         # All detected sections were skipped or too short
         print("  Warning: All detected sections were filtered out. Using full text.")
-        word_count = len(text.split())
-        return [{
-            "section_title": "Full Paper",
-            "content": text.strip(),
-            "sort_order": 0,
-            "word_count": word_count,
-        }]
+        return full_paper
+
+    return sections
 
+
+def section_content(section: dict, doc: Document | None = None) -> str:
+    """Section text: materialized from the document's line range, or as stored."""
+    if doc is not None and "lines" in section:
+        return doc.content(*section["lines"])
+    return section["content"]
+
+
+def segment_sections(text: str) -> list[dict]:
+    """Split text into sections based on detected headings.
+
+    Returns list of {section_title, content, sort_order, word_count}.
+    If no headings are found, returns the entire text as a single section.
+    """
+    doc = Document(text)
+    sections = segment_document(doc)
+    for section in sections:
+        section["content"] = doc.content(*section.pop("lines"))
     return sections
 
 
+def section_title(heading: dict) -> str:
+    """Display title for a heading record: "3. Method" or "Abstract"."""
+    if heading["number"]:
+        return f"{heading['number']}. {heading['title']}"
+    return heading["title"]
+
+
+def iter_sections(lines: Iterable[str]) -> Iterator[dict]:
+    """Streaming segment_sections: yield each section once it is closed.
+
+    A section closes at the next top-level heading (skipped or not) or at
+    the end of the text, so only the open section's lines are held in
+    memory; lines of skipped sections are not kept at all. Yields the same
+    records as segment_sections, except that the "Full Paper" fallback
+    (which needs the whole text) is left to the caller when nothing is
+    yielded.
+    """
+    current: dict | None = None
+    buffer: list[str] = []
+    sort_order = 0
+
+    def close() -> dict | None:
+        content = "\n".join(buffer).strip()
+        word_count = len(content.split())
+        # Skip very short sections (probably artifacts)
+        if word_count < MIN_SECTION_WORDS:
+            return None
+        return {
+            "section_title": section_title(current),
+            "content": content,
+            "sort_order": sort_order,
+            "word_count": word_count,
+        }
+
+    for line_no, line in enumerate(lines):
+        if line and (line[0] in "#*" or line[0].isspace()):
+            stripped = line.strip()
+            if stripped.startswith(("#", "**")):
+                result = parse_heading_candidate(stripped)
+                if result is not None and "." not in result[0]:
+                    if current is not None and not current["skip"]:
+                        section = close()
+                        if section is not None:
+                            yield section
+                            sort_order += 1
+                    current = heading_record(line_no, *result)
+                    buffer = []
+
+        if current is not None and not current["skip"]:
+            buffer.append(line)
+
+    if current is not None and not current["skip"]:
+        section = close()
+        if section is not None:
+            yield section
+
+
+def split_ranges(
+    lines: list[str], words: list[int], title: str, max_words: int
+) -> list[tuple[int, int, str]]:
+    """Cut a section's lines into (start, end, title) pieces of about max_words.
+
+    Cuts at subsection headings (3.1, 3.2) first, merging neighbouring
+    subsections while they fit together. A piece that is still too large
+    is cut at blank lines into the fewest near-equal parts that fit; a
+    single paragraph larger than max_words is left whole.
+    """
+    prefix = list(accumulate(words, initial=0))
+
+    starts = [0]
+    titles = [title]
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if i and stripped.startswith(("#", "**")):
+            result = parse_heading_candidate(stripped)
+            if result is not None and "." in result[0]:
+                starts.append(i)
+                titles.append(section_title(heading_record(i, *result)))
+    starts.append(len(lines))
+
+    pieces: list[tuple[int, int, str]] = []
+    for k, sub_title in enumerate(titles):
+        start, end = starts[k], starts[k + 1]
+        if pieces and prefix[end] - prefix[pieces[-1][0]] <= max_words:
+            pieces[-1] = (pieces[-1][0], end, pieces[-1][2])
+        else:
+            pieces.append((start, end, sub_title))
+
+    result = []
+    for start, end, piece_title in pieces:
+        cuts = paragraph_cuts(lines, prefix, start, end, max_words)
+        for n, (a, b) in enumerate(zip([start, *cuts], [*cuts, end])):
+            result.append((a, b, piece_title if n == 0 else f"{piece_title} (part {n + 1})"))
+    return result
+
+
+def paragraph_cuts(
+    lines: list[str], prefix: list[int], start: int, end: int, max_words: int
+) -> list[int]:
+    """Blank-line indices splitting lines [start, end) into near-equal parts.
+
+    Uses the fewest parts (at most one per paragraph) whose largest part
+    fits in max_words; each cut is the paragraph break nearest to an even
+    share of the words.
+    """
+    total = prefix[end] - prefix[start]
+    if total <= max_words:
+        return []
+    breaks = [
+        i for i in range(start + 1, end)
+        if not lines[i].strip() and lines[i - 1].strip()
+    ]
+    if not breaks:
+        return []
+    offsets = [prefix[i] for i in breaks]
+
+    cuts: list[int] = []
+    most = len(breaks) + 1
+    for parts in range(min(-(-total // max_words), most), most + 1):
+        cuts = []
+        for j in range(1, parts):
+            goal = prefix[start] + total * j / parts
+            k = bisect_left(offsets, goal)
+            if k == len(breaks) or (k > 0 and goal - offsets[k - 1] <= offsets[k] - goal):
+                k -= 1
+            if k >= 0 and (not cuts or breaks[k] > cuts[-1]):
+                cuts.append(breaks[k])
+        bounds = [start, *cuts, end]
+        if max(prefix[b] - prefix[a] for a, b in zip(bounds, bounds[1:])) <= max_words:
+            break
+
+    # Fold slivers (a heading line, a caption) back into their neighbour
+    kept: list[int] = []
+    for cut, next_bound in zip(cuts, [*cuts[1:], end]):
+        if (prefix[cut] - prefix[kept[-1] if kept else start] >= MIN_SECTION_WORDS
+                and prefix[next_bound] - prefix[cut] >= MIN_SECTION_WORDS):
+            kept.append(cut)
+    return kept
+
+
+def split_sections(
+    sections: Iterable[dict], max_words: int, doc: Document | None = None
+) -> Iterator[dict]:
+    """Split sections longer than max_words, renumbering sort_order.
+
+    Pieces of a section keep its kind of record: a line range when the
+    sections index into doc, else their own content.
+    """
+    sort_order = 0
+    for section in sections:
+        if section["word_count"] <= max_words:
+            yield {**section, "sort_order": sort_order}
+            sort_order += 1
+            continue
+
+        if doc is not None and "lines" in section:
+            first, last = section["lines"]
+            lines = doc.text[doc.line_starts[first]:doc.line_starts[last] - 1].split("\n")
+            words = [doc.words(i, i + 1) for i in range(first, last)]
+        else:
+            first = 0
+            lines = section["content"].split("\n")
+            words = [len(line.split()) for line in lines]
+
+        for start, end, title in split_ranges(lines, words, section["section_title"], max_words):
+            piece = {"section_title": title, "sort_order": sort_order}
+            if doc is not None and "lines" in section:
+                piece["word_count"] = doc.words(first + start, first + end)
+                piece["lines"] = (first + start, first + end)
+            else:
+                piece["content"] = "\n".join(lines[start:end]).strip()
+                piece["word_count"] = len(piece["content"].split())
+            if piece["word_count"]:
+                yield piece
+                sort_order += 1
+
+
+def build_row(
+    section: dict,
+    resource_id: str,
+    concept_id: str,
+    doc: Document | None = None,
+) -> dict:
+    """One output row in resource_sections format, plus the section's content hash."""
+    content = section_content(section, doc)
+    return {
+        "resource_id": resource_id,
+        "concept_id": concept_id,
+        "section_title": section["section_title"],
+        "sort_order": section["sort_order"],
+        "content_original": content,
+        "word_count": section["word_count"],
+        "content_hash": content_hash(content),
+    }
+
+
 def build_output(
     sections: list[dict],
     resource_id: str,
     concept_id: str,
+    doc: Document | None = None,
 ) -> list[dict]:
     """Build the final JSON output matching resource_sections format."""
-    output = []
+    return [build_row(section, resource_id, concept_id, doc) for section in sections]
+
+
+def stream_sections(
+    paper_path: Path,
+    options: IngestOptions,
+    extract_pool: ProcessPoolExecutor | None = None,
+    cited: dict[str, None] | None = None,
+) -> Iterator[dict]:
+    """Extract, clean and segment one paper with bounded memory.
+
+    Pages flow through cleaning and heading detection as generators, and
+    each section is yielded as soon as its closing boundary is seen, so
+    peak memory stays near one section (plus the cleaner's page lookahead).
+    arXiv IDs cited anywhere in the text (including the skipped References)
+    are collected into cited on the way.
+    """
+    def cleaned_chunks() -> Iterator[str]:
+        return iter_paper_chunks(paper_path, options, extract_pool, stream=True)
+
+    print("  Sections:")
+    lines = iter_lines(cleaned_chunks())
+    if cited is not None:
+        lines = tap_cited_ids(lines, cited)
+    sections: Iterable[dict] = iter_sections(lines)
+    if options.max_section_words:
+        sections = split_sections(sections, options.max_section_words)
+    found = False
     for section in sections:
-        output.append({
-            "resource_id": resource_id,
-            "concept_id": concept_id,
-            "section_title": section["section_title"],
-            "sort_order": section["sort_order"],
-            "content_original": section["content"],
-            "word_count": section["word_count"],
-        })
-    return output
+        found = True
+        print(f"    [{section['sort_order']}] {section['section_title']} "
+              f"({section['word_count']} words)")
+        yield section
+
+    if not found:
+        # No usable headings: the fallback is the whole text as one section.
+        # With the cache enabled this second pass reads the cached text.
+        sections = segment_sections("".join(cleaned_chunks()))
+        if options.max_section_words:
+            sections = split_sections(sections, options.max_section_words)
+        yield from sections
+
+
+def paper_step(options: IngestOptions, paper_id: str, step: str) -> AbstractContextManager:
+    """Record a timed step in the batch manifest, if there is one."""
+    if options.manifest is None:
+        return nullcontext()
+    return options.manifest.step(paper_id, step)
+
+
+def paper_fingerprint(paper_id: str, result: arxiv.Result, options: IngestOptions) -> str:
+    """Everything a finished paper's output depends on, for skipping it on resume."""
+    return content_hash(json.dumps([
+        paper_id,
+        arxiv_version(result),
+        options.resource_id,
+        options.concept_id,
+        options.output_format,
+        options.compression,
+        extractor_id(),
+        CLEANING_SETTINGS,
+        options.tokens.name if options.tokens is not None else None,
+        options.max_section_words,
+        options.engine,
+        CONVERTER_VERSION,
+    ]))
+
+
+def process_paper(
+    paper_id: str,
+    result: arxiv.Result,
+    paper_path: Path,
+    options: IngestOptions,
+    extract_pool: ProcessPoolExecutor | None = None,
+) -> Path:
+    """Extract, segment and save one downloaded paper. Returns the sections file.
+
+    paper_path is the paper's LaTeX e-print or its PDF (see fetch_paper);
+    the engine used is recorded in the meta file.
+
+    Besides the full sections file, writes a changes file with only the
+    sections that were added, changed, moved or removed since the previous
+    ingest, and a meta file recording the arXiv version and section hashes
+    that the next ingest compares against.
+    """
+    safe_id = paper_id.replace("/", "-")
+    resource_id = options.resource_id or f"arxiv-{safe_id}"
+    concept_id = options.concept_id or safe_id
+
+    print(f"  Title: {result.title}")
+    print(f"  Authors: {', '.join(a.name for a in result.authors[:5])}")
+    print(f"  Published: {result.published.strftime('%Y-%m-%d')}")
+
+    version = arxiv_version(result)
+    print(f"  Version: {version or '?'} (updated {result.updated.isoformat()})")
+    engine = paper_engine(paper_path)
+    print(f"  Engine: {engine}")
+
+    touch(paper_path)
+    output_dir = options.output_dir
+    fmt, compression = options.output_format, options.compression
+    sections_file = output_path(output_dir, f"arxiv-{safe_id}-sections", fmt, compression)
+    changes_file = output_path(output_dir, f"arxiv-{safe_id}-changes", fmt, compression)
+    previous_meta = load_meta(output_dir, safe_id)
+    changes = SectionChanges(load_previous_index(output_dir, safe_id, previous_meta))
+
+    # arXiv IDs this paper cites, recorded in the meta file for prefetching
+    cited: dict[str, None] = {}
+    doc = None
+    if options.stream:
+        # Extraction, cleaning and segmentation run inside the write step
+        sections: Iterable[dict] = stream_sections(paper_path, options, extract_pool, cited)
+    else:
+        # Extract (and clean)
+        with paper_step(options, paper_id, "extract"):
+            doc = Document("".join(iter_paper_chunks(paper_path, options, extract_pool)))
+        print(f"  After cleaning: {doc.word_count} words")
+        find_cited_ids(doc.text, cited)
+
+        # Segment
+        with paper_step(options, paper_id, "segment"):
+            sections = segment_document(doc)
+            if options.max_section_words:
+                sections = list(split_sections(sections, options.max_section_words, doc))
+        print(f"  Found {len(sections)} sections:")
+        for sec in sections:
+            print(f"    [{sec['sort_order']}] {sec['section_title']} ({sec['word_count']} words)")
+
+    # Write output, materializing each section's text only as it is written
+    # (token estimates are counted a small batch of rows at a time)
+    section_count = total_words = total_tokens = 0
+    rows = (build_row(sec, resource_id, concept_id, doc) for sec in sections)
+    if options.tokens is not None:
+        rows = with_token_estimates(rows, options.tokens)
+    with (
+        paper_step(options, paper_id, "stream" if options.stream else "write"),
+        SectionWriter(sections_file, fmt, compression) as writer,
+        SectionWriter(changes_file, fmt, compression) as changed,
+    ):
+        for row in rows:
+            writer.write(row)
+            change = changes.classify(row)
+            if change is not None:
+                changed.write({**row, "change": change})
+            section_count += 1
+            total_words += row["word_count"]
+            total_tokens += row.get("token_estimate", 0)
+
+        for row in changes.removed(resource_id, concept_id):
+            changed.write(row)
+
+    meta = {
+        "paper_id": paper_id,
+        "arxiv_id": result.get_short_id(),
+        "version": version,
+        "updated": result.updated.isoformat(),
+        "title": result.title,
+        "fingerprint": paper_fingerprint(paper_id, result, options),
+        "engine": engine,
+        "sections": changes.index,
+        "cited_arxiv_ids": [i for i in cited if i != strip_version(paper_id)],
+    }
+    if options.tokens is not None:
+        meta["token_estimate"] = total_tokens
+        meta["tokenizer"] = options.tokens.name
+    with atomic_writer(meta_path(output_dir, safe_id)) as f:
+        f.write(json.dumps(meta, indent=2, ensure_ascii=False))
+
+    loaded = None
+    if options.loader is not None:
+        with paper_step(options, paper_id, "load"):
+            loaded = options.loader.load(read_rows(sections_file), prune=options.prune)
+
+    print(f"\n{'=' * 60}")
+    print(f"EXTRACTION COMPLETE")
+    print(f"{'=' * 60}")
+    print(f"  Paper: {result.title}")
+    print(f"  Resource ID: {resource_id}")
+    print(f"  Concept ID: {concept_id}")
+    print(f"  Sections: {section_count}")
+    print(f"  Total words: {total_words}")
+    if options.tokens is not None:
+        print(f"  Estimated tokens: {total_tokens} ({options.tokens.name})")
+    if previous_meta is not None and previous_meta.get("version") != version:
+        print(f"  Version: {previous_meta.get('version')} -> {version}")
+    print(f"  Changes: {changes.summary()}")
+    print(f"  Output: {sections_file}")
+    print(f"  Changed sections: {changes_file}")
+    if loaded is not None:
+        print(f"  Database: {loaded.summary()}")
+
+    return sections_file
+
+
+def process_once(
+    paper_id: str,
+    result: arxiv.Result,
+    paper_path: Path,
+    options: IngestOptions,
+    extract_pool: ProcessPoolExecutor | None = None,
+) -> Path:
+    """process_paper under a cross-process lock on the paper's output files.
+
+    A concurrent ingest of the same paper into the same directory is
+    waited for; if it wrote the output with the same settings, that output
+    is used instead of writing it again (and still loaded, with a loader).
+    """
+    safe_id = paper_id.replace("/", "-")
+    lock = ArtifactLock(
+        options.output_dir / LOCK_DIR,
+        f"arxiv-{safe_id}-sections",
+        lambda message: print(f"  [{paper_id}] {message}"),
+    )
+    with lock:
+        if lock.contended:
+            meta = load_meta(options.output_dir, safe_id)
+            sections_file = output_path(
+                options.output_dir,
+                f"arxiv-{safe_id}-sections",
+                options.output_format,
+                options.compression,
+            )
+            if (
+                meta is not None
+                and meta.get("fingerprint") == paper_fingerprint(paper_id, result, options)
+                and sections_file.exists()
+            ):
+                print(f"  Written by another ingest while waiting: {sections_file}")
+                if options.loader is not None:
+                    with paper_step(options, paper_id, "load"):
+                        loaded = options.loader.load(read_rows(sections_file), prune=options.prune)
+                    print(f"  Database: {loaded.summary()}")
+                return sections_file
+        return process_paper(paper_id, result, paper_path, options, extract_pool)
+
+
+# ============================================================================
+# Citation prefetch
+# ============================================================================
+
+
+def lower_priority() -> None:
+    """Process pool initializer: run prefetch extraction at low CPU priority."""
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def warm_extraction(paper_path: Path, cache: ExtractionCache) -> None:
+    """Fill the extraction cache for a PDF or e-print. Runs in the prefetch process."""
+    if paper_engine(paper_path) == "latex":
+        load_source_text(paper_path, cache)
+        return
+    for _ in iter_cleaned_chunks(paper_path, cache, stream=True):
+        pass
+
+
+class CitationPrefetcher:
+    """Warm the PDF and extraction cache for papers the batch cites.
+
+    Cited IDs are queued as each paper is written and handled by one
+    background thread: looked up in small batches, downloaded through the
+    shared rate-limited session once the batch's own downloads are done,
+    and extracted into the cache on a single low-priority process. At most
+    `budget` papers are queued per run; papers in the batch or already on
+    disk are skipped. close() lets the queue drain.
+    """
+
+    def __init__(
+        self,
+        client: arxiv.Client,
+        options: IngestOptions,
+        session: requests.Session,
+        budget: int,
+        exclude: Iterable[str],
+    ) -> None:
+        self.client = client
+        self.options = options
+        self.session = session
+        self.budget = budget
+        self.seen = {strip_version(paper_id) for paper_id in exclude}
+        self.queued = 0
+        self.warmed: list[str] = []
+        self.failed: dict[str, str] = {}
+        self.foreground_idle = threading.Event()
+        self.queue: queue.Queue[list[str] | None] = queue.Queue()
+        self.pool = None
+        if options.cache is not None:
+            self.pool = ProcessPoolExecutor(max_workers=1, initializer=lower_priority)
+        self.thread = threading.Thread(target=self.run, name="prefetch", daemon=True)
+        self.thread.start()
+
+    def wait_for(self, downloads: Iterable[Future]) -> None:
+        """Hold prefetch downloads until these (foreground) downloads finish."""
+        pending = list(downloads)
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def done(_: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    self.foreground_idle.set()
+
+        if not pending:
+            self.foreground_idle.set()
+        for future in pending:
+            future.add_done_callback(done)
+
+    def add(self, paper_ids: Iterable[str]) -> int:
+        """Queue cited papers not seen before, within the budget. Returns how many."""
+        added = []
+        for paper_id in paper_ids:
+            if self.queued + len(added) >= self.budget:
+                break
+            if paper_id in self.seen:
+                continue
+            self.seen.add(paper_id)
+            stem = self.options.output_dir / f"arxiv-{paper_id.replace('/', '-')}"
+            if not any(stem.with_name(stem.name + suffix).exists() for suffix in (".pdf", SOURCE_SUFFIX)):
+                added.append(paper_id)
+        if added:
+            self.queue.put(added)
+            self.queued += len(added)
+        return len(added)
+
+    def run(self) -> None:
+        stop = False
+        while not stop:
+            paper_ids = []
+            item = self.queue.get()
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    paper_ids.extend(item)
+                if stop or len(paper_ids) >= PREFETCH_LOOKUP_BATCH:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            for start in range(0, len(paper_ids), PREFETCH_LOOKUP_BATCH):
+                self.prefetch(paper_ids[start:start + PREFETCH_LOOKUP_BATCH])
+
+    def prefetch(self, paper_ids: list[str]) -> None:
+        errors: dict[str, str] = {}
+        try:
+            results = lookup_papers(self.client, paper_ids, errors=errors)
+        except Exception as e:
+            self.failed.update((paper_id, str(e)) for paper_id in paper_ids)
+            return
+
+        self.foreground_idle.wait()
+        for paper_id in paper_ids:
+            result = results.get(paper_id)
+            if result is None:
+                if paper_id in errors:
+                    self.failed[paper_id] = f"metadata lookup failed: {errors[paper_id]}"
+                else:
+                    self.failed[paper_id] = "not found on arXiv"
+                continue
+            try:
+                paper_path = fetch_paper(self.options, result, paper_id, self.session)
+                if self.pool is not None:
+                    self.pool.submit(warm_extraction, paper_path, self.options.cache).result()
+            except Exception as e:
+                self.failed[paper_id] = str(e)
+                continue
+            print(f"  [prefetch] {paper_id} cached")
+            self.warmed.append(paper_id)
+
+    def close(self) -> None:
+        """Finish the queued prefetches and stop the worker."""
+        self.queue.put(None)
+        self.thread.join()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def summary(self) -> str:
+        return f"{len(self.warmed)} cited paper(s) cached, {len(self.failed)} failed"
+
+
+def ingest_batch(
+    paper_ids: list[str],
+    client: arxiv.Client,
+    options: IngestOptions,
+    download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+) -> dict[str, str]:
+    """Ingest many papers with batched lookups and concurrent downloads.
+
+    Downloads run on a bounded thread pool. Papers are extracted and
+    segmented on the calling thread in input order, so extraction of one
+    paper overlaps with the downloads of the papers after it. With
+    extract_workers > 1, each PDF is split into page ranges that are
+    extracted on a shared process pool. A failure is recorded for that
+    paper and the batch continues. After each paper the cache's disk budget
+    is enforced over cache entries and PDFs, sparing the PDFs of this batch.
+    The token count cache is written once, after the last paper.
+
+    With a manifest, every step of every paper is checkpointed. Papers that
+    an earlier run finished with the same settings are skipped (unless
+    options.resume is off), and papers that failed or crashed
+    options.paper_attempts times are not tried again.
+
+    Returns {paper_id: error_message} for the papers that failed.
+    """
+    failures: dict[str, str] = {}
+    manifest = options.manifest
+
+    # Step 1: Look up metadata
+    print("=" * 60)
+    print("STEP 1: LOOKUP")
+    print("=" * 60)
+    lookup_errors: dict[str, str] = {}
+    results = lookup_papers(client, paper_ids, errors=lookup_errors)
+    for paper_id in paper_ids:
+        if paper_id in lookup_errors:
+            print(f"Error: Metadata lookup for '{paper_id}' failed: {lookup_errors[paper_id]}")
+            failures[paper_id] = f"metadata lookup failed: {lookup_errors[paper_id]}"
+            if manifest is not None:
+                manifest.record(paper_id, "lookup", "failed", 0.0, failures[paper_id])
+        elif paper_id not in results:
+            print(f"Error: Paper '{paper_id}' not found on arXiv.")
+            failures[paper_id] = "not found on arXiv"
+            if manifest is not None:
+                manifest.record(paper_id, "lookup", "failed", 0.0, failures[paper_id])
+
+    # Resume: skip finished papers, stop retrying papers that keep failing
+    todo: list[str] = []
+    skipped = 0
+    for paper_id in paper_ids:
+        if paper_id not in results:
+            continue
+        if manifest is not None:
+            fingerprint = paper_fingerprint(paper_id, results[paper_id], options)
+            if options.resume and manifest.is_done(paper_id, fingerprint):
+                skipped += 1
+                continue
+            attempts = manifest.attempts(paper_id)
+            if attempts >= options.paper_attempts:
+                print(f"Error: [{paper_id}] failed {attempts} time(s); "
+                      f"not retrying (use --retry-failed)")
+                failures[paper_id] = f"gave up after {attempts} failed attempt(s)"
+                continue
+        todo.append(paper_id)
+    if skipped:
+        print(f"Skipping {skipped} paper(s) already ingested (manifest: {manifest.path})")
+
+    # Step 2: Download (in the background) and process (in order)
+    print("\n" + "=" * 60)
+    print("STEP 2: DOWNLOAD, EXTRACT, SEGMENT")
+    print("=" * 60)
+    output_dir = options.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    batch_files = [
+        output_dir / f"arxiv-{paper_id.replace('/', '-')}{suffix}"
+        for paper_id in paper_ids
+        for suffix in (".pdf", SOURCE_SUFFIX)
+    ]
+
+    with ExitStack() as stack:
+        pool = stack.enter_context(
+            ThreadPoolExecutor(max_workers=max(1, download_workers))
+        )
+        extract_pool = None
+        if options.extract_workers > 1:
+            extract_pool = stack.enter_context(
+                ProcessPoolExecutor(max_workers=options.extract_workers)
+            )
+
+        session = stack.enter_context(
+            make_session(max(1, download_workers), options.pdf_limiter)
+        )
+        downloads = {
+            paper_id: pool.submit(
+                download_step, options, results[paper_id], paper_id, session
+            )
+            for paper_id in todo
+        }
+
+        prefetcher = None
+        if options.prefetch_citations > 0:
+            prefetcher = CitationPrefetcher(
+                client, options, session, options.prefetch_citations, paper_ids
+            )
+            prefetcher.wait_for(downloads.values())
+            stack.callback(prefetcher.close)
+
+        for paper_id, future in downloads.items():
+            print(f"\n--- {paper_id} ---")
+            if manifest is not None:
+                manifest.start(paper_id)
+            try:
+                paper_path = future.result()
+                sections_file = process_once(
+                    paper_id, results[paper_id], paper_path, options, extract_pool
+                )
+            except Exception as e:
+                print(f"Error: [{paper_id}] {e}")
+                failures[paper_id] = str(e)
+                if manifest is not None:
+                    manifest.fail(paper_id, str(e))
+            else:
+                if manifest is not None:
+                    manifest.finish(
+                        paper_id,
+                        paper_fingerprint(paper_id, results[paper_id], options),
+                        sections_file,
+                    )
+                if prefetcher is not None:
+                    meta = load_meta(output_dir, paper_id.replace("/", "-")) or {}
+                    queued = prefetcher.add(meta.get("cited_arxiv_ids", []))
+                    if queued:
+                        print(f"  Prefetch: queued {queued} cited paper(s)")
+
+            if options.cache is not None:
+                removed, freed = options.cache.evict(
+                    extra=[*output_dir.glob("arxiv-*.pdf"), *output_dir.glob(f"arxiv-*{SOURCE_SUFFIX}")],
+                    keep=batch_files,
+                )
+                if removed:
+                    print(f"  Cache: evicted {removed} file(s), {freed / 1e6:.1f} MB")
+
+        if prefetcher is not None and prefetcher.queued:
+            print(f"\nWaiting for {prefetcher.queued} prefetch(es) to finish...")
+
+    if options.tokens is not None:
+        options.tokens.save()
+    if prefetcher is not None:
+        print(f"Prefetch: {prefetcher.summary()}")
+    return failures
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Ingest arXiv paper: download, extract, segment, save JSON"
+        description="Ingest arXiv papers: download, extract, segment, save JSON"
     )
     parser.add_argument(
-        "paper_id",
-        help="arXiv paper ID (e.g., 2005.11401)"
+        "paper_ids",
+        nargs="*",
+        metavar="paper_id",
+        help="arXiv paper ID(s) (e.g., 2005.11401)"
+    )
+    parser.add_argument(
+        "--ids-file",
+        default=None,
+        help="File with one arXiv paper ID per line ('#' comments allowed)"
     )
     parser.add_argument(
         "--concept-id",
@@ -375,66 +2104,265 @@ def main() -> None:
     parser.add_argument(
         "--resource-id",
         default=None,
-        help="Resource ID (default: arxiv-{paper_id})"
+        help="Resource ID (default: arxiv-{paper_id}); single paper only"
     )
     parser.add_argument(
         "--output-dir",
         default="scripts/output",
         help="Output directory (default: scripts/output)"
     )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=DEFAULT_DOWNLOAD_WORKERS,
+        help=f"Concurrent PDF downloads (default: {DEFAULT_DOWNLOAD_WORKERS})"
+    )
+    parser.add_argument(
+        "--download-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help=f"Attempts per PDF, resuming partial downloads (default: {DEFAULT_MAX_ATTEMPTS})"
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=1,
+        help="Processes for page-sharded PDF extraction (default: 1, serial). "
+             "Needs a pymupdf4llm with IdentifyHeaders (not the layout engine)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="auto",
+        help="Read sections from the LaTeX source (latex), the PDF (pdf), or the "
+             "source when arXiv has one, else the PDF (default: auto)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream pages through cleaning and segmentation, writing each "
+             "section as soon as it closes (bounded memory for very long PDFs)"
+    )
+    parser.add_argument(
+        "--max-section-words",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Split sections longer than N words at subsection headings, "
+             "else paragraph breaks (default: 0, never split)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="Sections file format: pretty JSON array or one row per line "
+             "(default: json)"
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default=None,
+        help="Compress the sections and changes files (zstd needs zstandard)"
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=TOKENIZERS,
+        default="auto",
+        help="Per-section token estimates: tiktoken cl100k_base, the local "
+             "estimator, or tiktoken when available (default: auto)"
+    )
+    parser.add_argument(
+        "--load-db",
+        action="store_true",
+        help="Also upsert each paper's sections into resource_sections "
+             "(COPY over one connection; needs psycopg). Rows are matched by "
+             "position (resource, concept, sort_order), not by content"
+    )
+    parser.add_argument(
+        "--prune-db",
+        action="store_true",
+        help="With --load-db, also delete the resource's rows that the new file no "
+             "longer has. Notes, annotations, translations and quizzes on them are "
+             "deleted too (ON DELETE CASCADE); off by default"
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Postgres connection string for --load-db (default: $DATABASE_URL)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Extraction cache directory (default: {output-dir}/.cache)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"Disk budget for cache + PDFs, LRU-evicted (default: {DEFAULT_CACHE_MAX_MB})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-extract and do not touch the cache"
+    )
+    parser.add_argument(
+        "--prefetch-citations",
+        type=int,
+        default=0,
+        metavar="N",
+        help="In the background, download and pre-extract up to N arXiv papers "
+             "cited by this batch, so ingesting them later is local (default: 0, off)"
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Checkpoint database for resuming batches "
+             "(default: {output-dir}/ingest-manifest.sqlite)"
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help="Do not read or write the checkpoint database"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest papers the manifest records as finished"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS_PER_PAPER,
+        help=f"Runs a paper may fail or crash in before it is skipped "
+             f"(default: {DEFAULT_MAX_ATTEMPTS_PER_PAPER})"
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Reset the failure count of the given papers before running"
+    )
+    parser.add_argument(
+        "--api-rate",
+        type=float,
+        default=ARXIV_API_RATE,
+        help="Metadata requests per second, shared by all ingests on this host "
+             "(default: one every 3 seconds)"
+    )
+    parser.add_argument(
+        "--pdf-rate",
+        type=float,
+        default=ARXIV_PDF_RATE,
+        help=f"PDF requests per second, shared by all ingests on this host "
+             f"(default: {ARXIV_PDF_RATE:g}, bursts of {ARXIV_PDF_BURST})"
+    )
+    parser.add_argument(
+        "--api-url",
+        default=None,
+        help="arXiv API query endpoint (default: export.arxiv.org; for local testing)"
+    )
     args = parser.parse_args()
 
-    paper_id: str = args.paper_id
-    safe_id = paper_id.replace("/", "-")
-    resource_id = args.resource_id or f"arxiv-{safe_id}"
-    concept_id = args.concept_id or safe_id
-    output_dir = Path(args.output_dir)
-
-    # Step 1: Download
-    print("=" * 60)
-    print("STEP 1: DOWNLOAD")
-    print("=" * 60)
-    title, pdf_path = download_paper(paper_id, output_dir)
-
-    # Step 2: Extract
-    print("\n" + "=" * 60)
-    print("STEP 2: EXTRACT")
-    print("=" * 60)
-    raw_text = extract_text(pdf_path)
-    cleaned_text = clean_page_artifacts(raw_text)
-    cleaned_words = len(cleaned_text.split())
-    print(f"  After cleaning: {cleaned_words} words")
+    paper_ids = read_paper_ids(args.paper_ids, args.ids_file)
+    if not paper_ids:
+        parser.error("provide at least one paper ID or --ids-file")
+    if args.resource_id and len(paper_ids) > 1:
+        parser.error("--resource-id can only be used with a single paper")
+    error = check_output_format(args.format, args.compress)
+    if error:
+        parser.error(error)
+    loader = None
+    if args.load_db:
+        if not args.database_url:
+            parser.error("--load-db needs --database-url or DATABASE_URL")
+        try:
+            loader = SectionLoader(args.database_url)
+        except RuntimeError as e:
+            parser.error(str(e))
+    if args.prune_db and not args.load_db:
+        parser.error("--prune-db needs --load-db")
+    if args.max_section_words < 0:
+        parser.error("--max-section-words must be positive (or 0 to never split)")
+    if args.api_rate <= 0 or args.pdf_rate <= 0:
+        parser.error("--api-rate and --pdf-rate must be positive")
+    if args.extract_workers > 1 and not headers_shareable():
+        parser.error(
+            "--extract-workers needs pymupdf4llm's IdentifyHeaders to share heading "
+            "levels between shards; the installed layout engine has none, so "
+            "extraction would be serial anyway"
+        )
 
-    # Step 3: Segment
-    print("\n" + "=" * 60)
-    print("STEP 3: SEGMENT")
-    print("=" * 60)
-    sections = segment_sections(cleaned_text)
-    print(f"  Found {len(sections)} sections:")
-    for sec in sections:
-        print(f"    [{sec['sort_order']}] {sec['section_title']} ({sec['word_count']} words)")
+    output_dir = Path(args.output_dir)
+    api_limiter = TokenBucket("arxiv-api", args.api_rate)
+    pdf_limiter = TokenBucket("arxiv-pdf", args.pdf_rate, burst=ARXIV_PDF_BURST)
+    client = make_client(args.api_url, api_limiter)
 
-    # Step 4: Build output
-    output = build_output(sections, resource_id, concept_id)
+    cache = None
+    if not args.no_cache:
+        cache = ExtractionCache(
+            Path(args.cache_dir) if args.cache_dir else output_dir / ".cache",
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+        )
 
-    total_words = sum(s["word_count"] for s in output)
-    sections_file = output_dir / f"arxiv-{safe_id}-sections.json"
-    sections_file.write_text(
-        json.dumps(output, indent=2, ensure_ascii=False),
-        encoding="utf-8",
+    try:
+        tokens = TokenEstimator(args.tokenizer, cache.root if cache is not None else None)
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    options = IngestOptions(
+        output_dir=output_dir,
+        resource_id=args.resource_id,
+        concept_id=args.concept_id,
+        extract_workers=args.extract_workers,
+        cache=cache,
+        stream=args.stream,
+        resume=not args.force,
+        paper_attempts=args.max_attempts,
+        prefetch_citations=args.prefetch_citations,
+        max_section_words=args.max_section_words,
+        engine=args.engine,
+        output_format=args.format,
+        compression=args.compress,
+        download_attempts=args.download_attempts,
+        pdf_limiter=pdf_limiter,
+        tokens=tokens,
+        prune=args.prune_db,
     )
+    with ExitStack() as stack:
+        if loader is not None:
+            options.loader = stack.enter_context(loader)
+        manifest = stack.enter_context(BatchManifest(
+            None if args.no_manifest
+            else Path(args.manifest) if args.manifest
+            else output_dir / "ingest-manifest.sqlite"
+        ))
+        if args.retry_failed:
+            manifest.reset_attempts(paper_ids)
+        options.manifest = manifest
+        failures = ingest_batch(
+            paper_ids, client, options, download_workers=args.download_workers
+        )
+        step_report = manifest.report()
+
+    succeeded = len(paper_ids) - len(failures)
+    if len(paper_ids) > 1:
+        print(f"\n{'=' * 60}")
+        print(f"BATCH COMPLETE")
+        print(f"{'=' * 60}")
+        print(f"  Ingested: {succeeded}/{len(paper_ids)}")
+        for paper_id, error in failures.items():
+            print(f"  Failed: {paper_id} ({error})")
+
+    if step_report:
+        print("\nSteps this run:")
+        for line in step_report:
+            print(f"  {line}")
+    print(f"\nRate limits: {api_limiter.summary()}; {pdf_limiter.summary()}")
+
+    if failures:
+        sys.exit(1)
 
-    print(f"\n{'=' * 60}")
-    print(f"EXTRACTION COMPLETE")
-    print(f"{'=' * 60}")
-    print(f"  Paper: {title}")
-    print(f"  Resource ID: {resource_id}")
-    print(f"  Concept ID: {concept_id}")
-    print(f"  Sections: {len(output)}")
-    print(f"  Total words: {total_words}")
-    print(f"  Output: {sections_file}")
-
-    print(f"\nDone. Output: {sections_file}")
+    print(f"\nDone. Output: {output_dir}")
 
 
 if __name__ == "__main__":
@@ -4,26 +4,67 @@ Extract and segment a YouTube video transcript for the translation pipeline.
 
 Fetches the transcript using youtube-transcript-api, cleans caption artifacts,
 and segments the text into ~500-word chunks using silence gaps as natural
-boundaries. Output matches the existing section JSON format used by
-translate-chapter.py and seed-sections.ts.
+boundaries (--chunking balanced picks the breaks over the whole transcript
+for more even chunk sizes). Output matches the existing section JSON format used by
+translate-chapter.py and seed-sections.ts, plus a token_estimate per
+section (counted in one batch, cached by content hash in
+{output-dir}/.cache) for checking the token budget before LLM stages.
+
+Several videos can be ingested in one run: pass any number of URLs or IDs,
+an --ids-file, or a playlist or channel URL (expanded with yt-dlp).
+Transcripts are fetched and segmented on a bounded thread pool
+(--workers); a video that fails is reported and the rest still complete,
+each into its own sections file. fetch_transcript() and ingest_batch()
+take the transcript API as a parameter, so a batch can be run against a
+stub with the YouTubeTranscriptApi interface.
+
+Transcript listings and snippets are cached in {output-dir}/.cache/transcripts
+(for --transcript-ttl days, default 7; --refresh-transcripts refetches), so
+re-segmenting with another --chunk-size makes no network requests.
+
+Live streams (--live polls the transcript, --live-feed reads snippets from
+a local file or pipe) are segmented as the captions arrive: each section
+is saved as soon as it closes, and a restarted ingest resumes after the
+last saved section without emitting it again.
 
 Usage:
   python scripts/ingest-youtube.py "https://www.youtube.com/watch?v=VIDEO_ID"
   python scripts/ingest-youtube.py VIDEO_ID
+  python scripts/ingest-youtube.py VIDEO_ID_1 VIDEO_ID_2 --workers 8
+  python scripts/ingest-youtube.py "https://www.youtube.com/playlist?list=PLAYLIST_ID"
+  python scripts/ingest-youtube.py --ids-file course.txt --concept-id rag-basics
   python scripts/ingest-youtube.py VIDEO_ID --language en --chunk-size 500
+  python scripts/ingest-youtube.py VIDEO_ID --chunking balanced
+  python scripts/ingest-youtube.py "https://www.youtube.com/live/VIDEO_ID" --live
+  tail -f captions.ndjson | python scripts/ingest-youtube.py VIDEO_ID --live-feed -
+  python scripts/ingest-youtube.py VIDEO_ID --format ndjson --compress gzip
+  python scripts/ingest-youtube.py VIDEO_ID --concept-id rag-basics --load-db
 
 Output:
   scripts/output/youtube-{VIDEO_ID}-sections.json
+  (with --format ndjson / --compress: -sections.ndjson, -sections.ndjson.gz, ...)
 
 Requires:
   pip install youtube-transcript-api
+  pip install yt-dlp   (only for playlist and channel URLs)
 """
 
 import argparse
 import json
+import math
+import os
 import re
 import sys
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import accumulate, compress, count, islice
+from operator import eq
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 try:
     from youtube_transcript_api import YouTubeTranscriptApi
@@ -37,6 +78,29 @@ except ImportError:
     print("Install: pip install youtube-transcript-api")
     sys.exit(1)
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
+
+from ingestlib.output import (
+    COMPRESSIONS,
+    FORMATS,
+    SectionWriter,
+    check_output_format,
+    dumps_line,
+    output_path,
+    read_rows,
+)
+from ingestlib.pgload import SectionLoader
+from ingestlib.tokens import TOKENIZERS, TokenEstimator
+from ingestlib.transcripts import DEFAULT_TTL_DAYS, Snippets, TranscriptCache
+
 
 # ============================================================================
 # Video ID extraction
@@ -57,6 +121,18 @@ YOUTUBE_URL_PATTERNS: list[re.Pattern[str]] = [
 # Bare video ID: exactly 11 chars of [a-zA-Z0-9_-]
 BARE_VIDEO_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{11}$")
 
+# Playlist: https://www.youtube.com/playlist?list=PLAYLIST_ID
+# (a watch URL with &list= is taken as the single video)
+PLAYLIST_URL_PATTERN = re.compile(r"(?:https?://)?(?:www\.|m\.)?youtube\.com/playlist\?.*list=([a-zA-Z0-9_-]+)")
+
+# Channel: youtube.com/@handle, /channel/UC..., /c/name, /user/name
+CHANNEL_URL_PATTERN = re.compile(
+    r"(?:https?://)?(?:www\.|m\.)?youtube\.com/(@[\w.-]+|channel/[\w-]+|c/[\w.-]+|user/[\w.-]+)(/\w+)?/?$"
+)
+
+# Concurrent transcript fetches in a batch
+DEFAULT_WORKERS = 4
+
 
 def extract_video_id(url_or_id: str) -> str:
     """Extract the 11-character video ID from a URL or bare ID.
@@ -84,162 +160,277 @@ def extract_video_id(url_or_id: str) -> str:
     )
 
 
+def expand_video_ids(inputs: list[str]) -> list[str]:
+    """Video IDs for URLs, bare IDs, playlist and channel URLs, in order.
+
+    Playlists and channels (their uploads) are listed with yt-dlp.
+    Duplicates are dropped, keeping the first occurrence.
+
+    Raises:
+        ValueError: If an input is not recognized, or a playlist or
+            channel cannot be listed.
+    """
+    video_ids: list[str] = []
+    for item in inputs:
+        item = item.strip()
+        if PLAYLIST_URL_PATTERN.search(item) or CHANNEL_URL_PATTERN.match(item):
+            video_ids.extend(list_playlist(item))
+        else:
+            video_ids.append(extract_video_id(item))
+    return list(dict.fromkeys(video_ids))
+
+
+def list_playlist(url: str) -> list[str]:
+    """Video IDs of a playlist, or of a channel's uploads, via yt-dlp."""
+    if yt_dlp is None:
+        raise ValueError(f"Playlist and channel URLs need yt-dlp: pip install yt-dlp ({url})")
+    m = CHANNEL_URL_PATTERN.match(url)
+    if m and not m.group(2):
+        url = url.rstrip("/") + "/videos"
+
+    options = {"extract_flat": "in_playlist", "quiet": True, "skip_download": True}
+    try:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except yt_dlp.utils.DownloadError as e:
+        raise ValueError(f"Could not list {url}: {e}") from e
+
+    video_ids = [
+        entry["id"]
+        for entry in (info or {}).get("entries") or []
+        if entry and BARE_VIDEO_ID_PATTERN.match(entry.get("id") or "")
+    ]
+    if not video_ids:
+        raise ValueError(f"No videos found in {url}")
+    print(f"{url}: {len(video_ids)} video(s)")
+    return video_ids
+
+
+def read_video_inputs(videos: list[str], ids_file: str | None) -> list[str]:
+    """Collect videos from the command line and an optional file.
+
+    The file has one URL or ID per line; blank lines and '#' comments are
+    ignored.
+    """
+    collected = list(videos)
+    if ids_file:
+        for line in Path(ids_file).read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                collected.append(line)
+    return collected
+
+
 # ============================================================================
 # Transcript fetching
 # ============================================================================
 
 
-def fetch_transcript(
-    video_id: str, language: str = "en"
-) -> tuple[list[dict], str, bool]:
-    """Fetch the transcript for a video, preferring manual captions.
-
-    Returns:
-        (snippets, language_code, is_generated) where snippets is a list of
-        dicts with 'text', 'start', and 'duration' keys.
+class TranscriptError(Exception):
+    """A single video could not be ingested (no transcript, unavailable, ...)."""
 
-    Raises:
-        SystemExit: If no transcript is available.
-    """
-    ytt_api = YouTubeTranscriptApi()
 
+def list_transcripts(api: YouTubeTranscriptApi, video_id: str):
+    """The video's TranscriptList, with API errors raised as TranscriptError."""
     try:
-        transcript_list = ytt_api.list(video_id)
+        return api.list(video_id)
     except TranscriptsDisabled:
-        print(f"Error: Transcripts are disabled for video {video_id}.")
-        print("This video does not allow subtitle access.")
-        sys.exit(1)
+        raise TranscriptError(
+            f"Transcripts are disabled for video {video_id}. "
+            "This video does not allow subtitle access."
+        )
     except VideoUnavailable:
-        print(f"Error: Video {video_id} is unavailable or does not exist.")
-        sys.exit(1)
+        raise TranscriptError(f"Video {video_id} is unavailable or does not exist.")
     except InvalidVideoId:
-        print(f"Error: '{video_id}' is not a valid YouTube video ID.")
-        sys.exit(1)
+        raise TranscriptError(f"'{video_id}' is not a valid YouTube video ID.")
 
-    # List available transcripts for diagnostics
-    available = []
-    for t in transcript_list:
-        label = f"  {'[auto]' if t.is_generated else '[manual]'} {t.language} ({t.language_code})"
-        available.append(label)
 
-    print(f"Available transcripts:")
-    for label in available:
-        print(label)
+def choose_transcript(
+    listing: list[dict], language: str, log: Callable[[str], None] = print
+) -> dict | None:
+    """Pick a transcript from a listing, preferring manual captions.
+
+    Manual captions in the requested language, then auto-generated ones,
+    then (for other languages) English of either kind.
+    """
+    def find(code: str, is_generated: bool) -> dict | None:
+        for t in listing:
+            if t["language_code"] == code and t["is_generated"] == is_generated:
+                return t
+        return None
+
+    transcript = find(language, False)
+    if transcript is not None:
+        log(f"Using manual transcript: {transcript['language']} ({transcript['language_code']})")
+        return transcript
+    transcript = find(language, True)
+    if transcript is not None:
+        log(f"Using auto-generated transcript: {transcript['language']} ({transcript['language_code']})")
+        log("Note: Auto-generated captions may contain errors.")
+        return transcript
+    # Try English as ultimate fallback if not already requested
+    if language != "en":
+        transcript = find("en", False) or find("en", True)
+        if transcript is not None:
+            log(f"Fallback to English transcript: {transcript['language']}")
+    return transcript
 
-    # Strategy: try manual first, then auto-generated, in the requested language
-    transcript = None
-    is_generated = False
 
-    try:
-        transcript = transcript_list.find_manually_created_transcript([language])
-        print(f"\nUsing manual transcript: {transcript.language} ({transcript.language_code})")
-    except NoTranscriptFound:
+def fetch_transcript(
+    video_id: str,
+    language: str = "en",
+    api: YouTubeTranscriptApi | None = None,
+    log: Callable[[str], None] = print,
+    cache: TranscriptCache | None = None,
+) -> tuple[Snippets, str, bool]:
+    """Fetch the transcript for a video, preferring manual captions.
+
+    api is a YouTubeTranscriptApi (or a stub with the same list()
+    interface); a new one is created when it is needed and None. With a
+    cache, the listing and the snippets are read from it when fresh and
+    stored in it after a fetch, so a cached video makes no requests.
+
+    Returns:
+        (snippets, language_code, is_generated) where snippets holds each
+        snippet's text, start, and duration (see ingestlib.transcripts.Snippets).
+
+    Raises:
+        TranscriptError: If no transcript is available.
+    """
+    transcript_list = None
+
+    def fetched_list():
+        nonlocal api, transcript_list
+        if transcript_list is None:
+            if api is None:
+                api = YouTubeTranscriptApi()
+            transcript_list = list_transcripts(api, video_id)
+        return transcript_list
+
+    listing = cache.get_listing(video_id) if cache is not None else None
+    if listing is None:
+        listing = [
+            {"language": t.language, "language_code": t.language_code, "is_generated": t.is_generated}
+            for t in fetched_list()
+        ]
+        if cache is not None:
+            cache.put_listing(video_id, listing)
+
+    # List available transcripts for diagnostics
+    log("Available transcripts:" if transcript_list is not None else "Available transcripts (cached):")
+    for t in listing:
+        log(f"  {'[auto]' if t['is_generated'] else '[manual]'} {t['language']} ({t['language_code']})")
+
+    chosen = choose_transcript(listing, language, log=log)
+    if chosen is None:
+        codes = ", ".join(t["language_code"] for t in listing) or "none"
+        raise TranscriptError(
+            f"No transcript found for language '{language}' (available: {codes}). "
+            "Try: --language <code> with one of the available language codes."
+        )
+    language_code = chosen["language_code"]
+    is_generated = chosen["is_generated"]
+
+    snippets = (
+        cache.get_snippets(video_id, language_code, is_generated) if cache is not None else None
+    )
+    if snippets is None:
+        # Fetch the actual transcript data
+        transcripts = fetched_list()
         try:
-            transcript = transcript_list.find_generated_transcript([language])
-            is_generated = True
-            print(f"\nUsing auto-generated transcript: {transcript.language} ({transcript.language_code})")
-            print("Note: Auto-generated captions may contain errors.")
+            if is_generated:
+                transcript = transcripts.find_generated_transcript([language_code])
+            else:
+                transcript = transcripts.find_manually_created_transcript([language_code])
         except NoTranscriptFound:
-            # Try English as ultimate fallback if not already requested
-            if language != "en":
-                try:
-                    transcript = transcript_list.find_transcript(["en"])
-                    is_generated = transcript.is_generated
-                    print(f"\nFallback to English transcript: {transcript.language}")
-                except NoTranscriptFound:
-                    pass
-
-    if transcript is None:
-        print(f"\nError: No transcript found for language '{language}'.")
-        print("Available languages:")
-        for label in available:
-            print(label)
-        print("\nTry: --language <code> with one of the available language codes.")
-        sys.exit(1)
-
-    # Fetch the actual transcript data
-    fetched = transcript.fetch()
-    snippets = [
-        {"text": s.text, "start": s.start, "duration": s.duration}
-        for s in fetched
-    ]
+            raise TranscriptError(
+                f"The {language_code} transcript is no longer available (use --refresh-transcripts)."
+            )
+        snippets = Snippets.from_rows(transcript.fetch())
+        if cache is not None and snippets:
+            cache.put_snippets(video_id, language_code, is_generated, snippets)
+    else:
+        log("Using cached snippets.")
 
     if not snippets:
-        print("Error: Transcript is empty (no text segments found).")
-        sys.exit(1)
+        raise TranscriptError("Transcript is empty (no text segments found).")
 
-    return snippets, transcript.language_code, is_generated
+    return snippets, language_code, is_generated
 
 
 # ============================================================================
 # Transcript cleaning
 # ============================================================================
 
-# Patterns for auto-generated caption artifacts
-ARTIFACT_PATTERNS: list[re.Pattern[str]] = [
-    re.compile(r"\[Music\]", re.IGNORECASE),
-    re.compile(r"\[Applause\]", re.IGNORECASE),
-    re.compile(r"\[Laughter\]", re.IGNORECASE),
-    re.compile(r"\[Silence\]", re.IGNORECASE),
-    re.compile(r"\[Background noise\]", re.IGNORECASE),
-    re.compile(r"\[Inaudible\]", re.IGNORECASE),
-    re.compile(r"^\s*$"),
-]
+# Auto-generated caption artifacts, matched in one pass (case-insensitive)
+ARTIFACT_MARKERS = (
+    "Music",
+    "Applause",
+    "Laughter",
+    "Silence",
+    "Background noise",
+    "Inaudible",
+)
+ARTIFACT_RE = re.compile(
+    r"\[(?:" + "|".join(re.escape(m) for m in ARTIFACT_MARKERS) + r")\]", re.IGNORECASE
+)
 
 
 def clean_text(text: str) -> str:
     """Remove auto-generated caption artifacts from a single text segment."""
-    cleaned = text
-    for pattern in ARTIFACT_PATTERNS:
-        cleaned = pattern.sub("", cleaned)
-    return cleaned.strip()
+    return ARTIFACT_RE.sub("", text).strip()
 
 
-def deduplicate_consecutive(words: list[str], max_repeat: int = 3) -> list[str]:
-    """Remove consecutive repeated words that appear more than max_repeat times.
+def clean_snippet_texts(texts: Iterable[str]) -> list[str]:
+    """clean_text for many snippets, cleaning each distinct text once.
 
-    Auto-generated captions sometimes stutter: "the the the the solution".
+    Captions repeat a lot ("[Music]", "so", "yeah"), so results are
+    memoized for the call.
     """
-    if not words:
-        return words
-
-    result: list[str] = [words[0]]
-    repeat_count = 1
-
-    for i in range(1, len(words)):
-        if words[i].lower() == words[i - 1].lower():
-            repeat_count += 1
-            if repeat_count <= max_repeat:
-                result.append(words[i])
-        else:
-            repeat_count = 1
-            result.append(words[i])
-
-    return result
-
-
-def clean_transcript_text(raw_text: str) -> str:
-    """Clean up the full transcript text after joining segments."""
-    # Remove artifact markers
-    for pattern in ARTIFACT_PATTERNS:
-        raw_text = pattern.sub("", raw_text)
+    memo: dict[str, str] = {}
+    cleaned: list[str] = []
+    for text in texts:
+        result = memo.get(text)
+        if result is None:
+            result = memo[text] = clean_text(text)
+        cleaned.append(result)
+    return cleaned
 
-    # Deduplicate consecutive repeated words (auto-caption stutter)
-    words = raw_text.split()
-    words = deduplicate_consecutive(words)
-    raw_text = " ".join(words)
 
-    # Collapse multiple spaces
-    raw_text = re.sub(r" {2,}", " ", raw_text)
-
-    # Remove leading/trailing whitespace per line
-    lines = [line.strip() for line in raw_text.split("\n")]
-    raw_text = "\n".join(lines)
-
-    # Collapse multiple blank lines
-    raw_text = re.sub(r"\n{3,}", "\n\n", raw_text)
+def deduplicate_consecutive(words: list[str], max_repeat: int = 3) -> list[str]:
+    """Remove consecutive repeated words that appear more than max_repeat times.
 
-    return raw_text.strip()
+    Auto-generated captions sometimes stutter: "the the the the solution".
+    Repeats are found by comparing the lowercased words pairwise in bulk;
+    only the (rare) runs of repeats are walked in Python.
+    """
+    lowered = list(map(str.lower, words))
+    # Indices i where words[i] repeats words[i - 1]
+    repeats = compress(count(1), map(eq, lowered, islice(lowered, 1, None)))
+
+    drop: set[int] = set()
+    run = 1
+    previous = -1
+    for i in repeats:
+        run = run + 1 if i == previous + 1 else 2
+        previous = i
+        if run > max_repeat:
+            drop.add(i)
+
+    if not drop:
+        return list(words)
+    return [word for i, word in enumerate(words) if i not in drop]
+
+
+def clean_transcript_text(raw_text: str, max_repeat: int = 3) -> str:
+    """Clean up a chunk of joined snippet text in one pass.
+
+    Strips artifact markers (including any split across two snippets),
+    drops stutters beyond max_repeat, and collapses all whitespace to
+    single spaces.
+    """
+    words = ARTIFACT_RE.sub("", raw_text).split()
+    return " ".join(deduplicate_consecutive(words, max_repeat))
 
 
 # ============================================================================
@@ -266,106 +457,337 @@ def format_timestamp(seconds: float) -> str:
 # Silence gap threshold (seconds) — used as a natural section boundary
 SILENCE_GAP_THRESHOLD = 5.0
 
+# A chunk may end at a silence gap from 0.7x the target size, at a sentence
+# end from 1x, and ends regardless at 1.3x
+NEAR_TARGET = 0.7
+OVER_TARGET = 1.3
+SENTENCE_END = (".", "!", "?", ":", ";")
+
+# Chunking engines: greedy (first acceptable break) or balanced (best
+# breaks over the whole transcript, see balanced_breaks)
+CHUNKINGS = ("greedy", "balanced")
+
+# Balanced chunking: extra cost of ending a chunk after a silence gap, at
+# a sentence end, or mid-sentence. The size cost of a chunk 10% off target
+# is 0.01, so a gap is worth ~14% of size error over a sentence end and a
+# sentence end ~28% over a mid-sentence break.
+BREAK_COST_GAP = 0.0
+BREAK_COST_SENTENCE = 0.02
+BREAK_COST_MID_SENTENCE = 0.1
+
+
+def snippet_arrays(snippets: Snippets | list[dict]) -> dict:
+    """Column arrays for the non-empty cleaned snippets, computed in bulk.
+
+    Returns texts (cleaned), start, end, gap_after (silence before the next
+    raw snippet, 0 for the last), words (per snippet) and cum_words
+    (cum_words[i] = words before snippet i, one entry longer). Uses NumPy
+    when installed (reading the Snippets arrays without a copy), plain
+    lists otherwise.
+    """
+    snippets = Snippets.coerce(snippets)
+    cleaned = clean_snippet_texts(snippets.texts())
+    keep = [i for i, text in enumerate(cleaned) if text]
+    texts = [cleaned[i] for i in keep]
+    del cleaned
+    words = [len(text.split()) for text in texts]
+
+    if np is not None:
+        starts = np.frombuffer(snippets.starts, dtype=np.float64)
+        durations = np.frombuffer(snippets.durations, dtype=np.float64)
+        ends = starts + durations
+        gaps = np.zeros(len(snippets))
+        gaps[:-1] = starts[1:] - ends[:-1]
+        index = np.asarray(keep, dtype=np.intp)
+        word_array = np.asarray(words, dtype=np.int64)
+        cum_words = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(word_array, out=cum_words[1:])
+        return {
+            "texts": texts,
+            "start": starts[index],
+            "end": ends[index],
+            "gap_after": gaps[index],
+            "words": word_array,
+            "cum_words": cum_words,
+        }
+
+    starts = snippets.starts
+    ends = [start + duration for start, duration in zip(starts, snippets.durations)]
+    gaps = [starts[i + 1] - ends[i] for i in range(len(snippets) - 1)] + [0.0]
+    return {
+        "texts": texts,
+        "start": [starts[i] for i in keep],
+        "end": [ends[i] for i in keep],
+        "gap_after": [gaps[i] for i in keep],
+        "words": words,
+        "cum_words": [0, *accumulate(words)],
+    }
+
+
+def chunk_thresholds(chunk_size: int) -> tuple[int, int, int]:
+    """Word counts at which a chunk may end at a gap, at a sentence end, and must end.
+
+    Word counts are integers, so n >= t is n >= ceil(t).
+    """
+    return (
+        math.ceil(chunk_size * NEAR_TARGET),
+        math.ceil(chunk_size),
+        math.ceil(chunk_size * OVER_TARGET),
+    )
+
+
+def find_breaks(
+    cum_words, gap_after, sentence_end: list[bool], chunk_size: int
+) -> list[int]:
+    """Indices of the last snippet of each chunk, chosen greedily.
+
+    A chunk starting at snippet s ends at the first snippet i >= s where,
+    with n = words in s..i: n >= 0.7 x chunk_size and a silence gap
+    follows, or n >= chunk_size and the snippet ends a sentence, or
+    n >= 1.3 x chunk_size; or at the last snippet. Candidate positions are
+    collected for all snippets at once and each break is found with binary
+    searches, so the cost grows with the number of chunks, not snippets.
+    """
+    count = len(cum_words) - 1
+    if count <= 0:
+        return []
+    near, full, over = chunk_thresholds(chunk_size)
+
+    if np is not None:
+        gap_at = np.flatnonzero(np.asarray(gap_after) >= SILENCE_GAP_THRESHOLD)
+        sentence_at = np.flatnonzero(np.asarray(sentence_end, dtype=bool))
+        search = np.searchsorted
+    else:
+        gap_at = [i for i, gap in enumerate(gap_after) if gap >= SILENCE_GAP_THRESHOLD]
+        sentence_at = [i for i, end in enumerate(sentence_end) if end]
+        search = bisect_left
+
+    def reach(start: int, words: int) -> int:
+        """First snippet i >= start with words in start..i >= words."""
+        return max(int(search(cum_words, cum_words[start] + words)) - 1, start)
+
+    def next_in(candidates, lo: int) -> int:
+        k = int(search(candidates, lo))
+        return int(candidates[k]) if k < len(candidates) else count
+
+    breaks: list[int] = []
+    start = 0
+    while start < count:
+        end = min(
+            next_in(gap_at, reach(start, near)),
+            next_in(sentence_at, reach(start, full)),
+            reach(start, over),
+            count - 1,
+        )
+        breaks.append(end)
+        start = end + 1
+    return breaks
+
+
+def balanced_breaks(
+    cum_words, gap_after, sentence_end: list[bool], chunk_size: int
+) -> list[int]:
+    """Indices of the last snippet of each chunk, balanced over the whole transcript.
+
+    Dynamic programming over chunk ends: a chunk costs its squared relative
+    deviation from chunk_size plus BREAK_COST_* for where it ends (silence
+    gap, sentence end or mid-sentence; the final chunk ends for free), and
+    the breaks with the lowest total cost win. Breaks fall only between
+    snippets, and a chunk may hold at most 1.3 x chunk_size words, so
+    sizes are balanced only as far as those break points allow: a short
+    last chunk or a mid-sentence break is kept when every alternative
+    costs more, and a single snippet longer than 1.3 x chunk_size is a
+    chunk of its own. The cap bounds the window of candidate starts per
+    end: O(n x window) time.
+    """
+    count = len(cum_words) - 1
+    if count <= 0:
+        return []
+    target = max(chunk_size, 1)
+    over = max(chunk_thresholds(chunk_size)[2], 1)
+    gap = [g >= SILENCE_GAP_THRESHOLD for g in gap_after]
+    end_cost = [
+        BREAK_COST_GAP if gap[i] else BREAK_COST_SENTENCE if sentence_end[i] else BREAK_COST_MID_SENTENCE
+        for i in range(count)
+    ]
+    end_cost[-1] = 0.0
+
+    # best[e] = lowest cost of chunking snippets 0..e-1; back[e] = start of
+    # the last chunk in that chunking
+    best = [0.0] * (count + 1)
+    back = [0] * (count + 1)
+    if np is not None:
+        cum = np.asarray(cum_words, dtype=np.float64)
+        best_arr = np.zeros(count + 1)
+        # First start s for each end e with words in s..e <= over
+        lows = np.minimum(np.searchsorted(cum, cum[1:] - over), np.arange(count))
+        for e in range(count):
+            lo = int(lows[e])
+            sizes = (cum[e + 1] - cum[lo:e + 1] - target) / target
+            costs = best_arr[lo:e + 1] + sizes * sizes
+            k = int(costs.argmin())
+            best_arr[e + 1] = costs[k] + end_cost[e]
+            back[e + 1] = lo + k
+    else:
+        lo = 0
+        for e in range(count):
+            while cum_words[e + 1] - cum_words[lo] > over and lo < e:
+                lo += 1
+            best_cost = None
+            for s in range(lo, e + 1):
+                size = (cum_words[e + 1] - cum_words[s] - target) / target
+                cost = best[s] + size * size
+                if best_cost is None or cost < best_cost:
+                    best_cost, back[e + 1] = cost, s
+            best[e + 1] = best_cost + end_cost[e]
+
+    breaks: list[int] = []
+    e = count
+    while e > 0:
+        breaks.append(e - 1)
+        e = back[e]
+    breaks.reverse()
+    return breaks
+
 
 def segment_transcript(
-    snippets: list[dict], chunk_size: int = 500
+    snippets: Snippets | list[dict],
+    chunk_size: int = 500,
+    columns: dict | None = None,
+    chunking: str = "greedy",
 ) -> list[dict]:
     """Segment transcript snippets into chunks of approximately chunk_size words.
 
     Uses silence gaps (>SILENCE_GAP_THRESHOLD seconds between segments)
     as natural boundaries. If no gap is found within the target range,
-    falls back to the nearest sentence-ending punctuation.
+    falls back to the nearest sentence-ending punctuation (see find_breaks).
+    chunking="balanced" chooses the breaks over the whole transcript
+    instead (see balanced_breaks). columns is snippet_arrays(snippets), if
+    the caller already built it.
 
     Returns a list of sections with text, start/end timestamps, and word count.
     """
     if not snippets:
         return []
 
-    # Pre-process: join snippet text and track boundaries
-    # Each snippet has: text, start, duration
-    # A "gap" is the time between the end of one snippet and the start of the next
+    if columns is None:
+        columns = snippet_arrays(snippets)
+    texts = columns["texts"]
+    if not texts:
+        return []
+    sentence_end = [text.endswith(SENTENCE_END) for text in texts]
+    if chunking == "balanced":
+        breaks = balanced_breaks(columns["cum_words"], columns["gap_after"], sentence_end, chunk_size)
+    else:
+        breaks = find_breaks(columns["cum_words"], columns["gap_after"], sentence_end, chunk_size)
 
-    # Build a list of (text, start_time, end_time, gap_after) per snippet
-    processed: list[dict] = []
-    for i, s in enumerate(snippets):
-        text = clean_text(s["text"])
-        if not text:
-            continue
+    sections: list[dict] = []
+    start = 0
+    for end in breaks:
+        # Join and clean the chunk text
+        joined = clean_transcript_text(" ".join(texts[start:end + 1]))
+        word_count = len(joined.split())
+        if word_count > 0:
+            sections.append({
+                "text": joined,
+                "start": float(columns["start"][start]),
+                "end": float(columns["end"][end]),
+                "word_count": word_count,
+            })
+        start = end + 1
 
-        start = s["start"]
-        end = start + s["duration"]
+    return sections
 
-        gap_after = 0.0
-        if i < len(snippets) - 1:
-            next_start = snippets[i + 1]["start"]
-            gap_after = next_start - end
 
-        processed.append({
-            "text": text,
-            "start": start,
-            "end": end,
-            "gap_after": gap_after,
-        })
+class LiveSegmenter:
+    """segment_transcript for snippets that arrive one at a time.
 
-    if not processed:
-        return []
+    Only the open chunk is kept. Whether a snippet ends its chunk depends
+    on the silence before the next snippet (and on whether any text
+    follows), so each decision waits for the next non-empty snippet, or
+    for close() at the end of the stream; a finished section is returned
+    as soon as it is decided. Fed the same snippets, the
+    sections are exactly those of segment_transcript (a snippet repeated
+    back to back, same start and text, counts once).
 
-    # Group snippets into chunks
-    sections: list[dict] = []
-    current_texts: list[str] = []
-    current_word_count = 0
-    chunk_start = processed[0]["start"]
-
-    for i, snippet in enumerate(processed):
-        words = snippet["text"].split()
-        current_texts.append(snippet["text"])
-        current_word_count += len(words)
-        chunk_end = snippet["end"]
-
-        # Decide whether to break here
-        should_break = False
-        is_last = i == len(processed) - 1
-
-        if is_last:
-            should_break = True
-        elif current_word_count >= chunk_size:
-            # We have enough words. Break at a silence gap if available.
-            if snippet["gap_after"] >= SILENCE_GAP_THRESHOLD:
-                should_break = True
-            else:
-                # Look ahead: if we're significantly over target, break anyway
-                # to avoid very large chunks
-                if current_word_count >= chunk_size * 1.3:
-                    should_break = True
-                # Otherwise, check if this snippet ends with sentence-ending punctuation
-                elif snippet["text"].rstrip().endswith((".", "!", "?", ":", ";")):
-                    should_break = True
-        elif current_word_count >= chunk_size * 0.7:
-            # Near target: break at silence gaps
-            if snippet["gap_after"] >= SILENCE_GAP_THRESHOLD:
-                should_break = True
-
-        if should_break and current_texts:
-            # Join and clean the chunk text
-            joined = " ".join(current_texts)
-            joined = clean_transcript_text(joined)
-            word_count = len(joined.split())
-
-            if word_count > 0:
-                sections.append({
-                    "text": joined,
-                    "start": chunk_start,
-                    "end": chunk_end,
-                    "word_count": word_count,
-                })
-
-            # Reset for next chunk
-            current_texts = []
-            current_word_count = 0
-            if i < len(processed) - 1:
-                chunk_start = processed[i + 1]["start"]
+    resume_after is the start time of the last snippet already emitted
+    (see `resume_after` after each section): snippets that start at or
+    before it are skipped, so a restarted stream continues where the last
+    section ended without emitting it again. (Other snippets sharing that
+    start time are skipped too.)
+    """
 
-    return sections
+    def __init__(self, chunk_size: int = 500, resume_after: float | None = None) -> None:
+        self.near, self.full, self.over = chunk_thresholds(chunk_size)
+        self.resume_after = resume_after
+        self.skip_through = resume_after
+        # (start, text) of the last snippet fed, to drop repeated deliveries
+        self.last_fed: tuple[float, str] | None = None
+        self.texts: list[str] = []
+        self.words = 0
+        self.start = 0.0
+        # Last non-empty snippet, awaiting its decision: start, end, whether
+        # it ends a sentence, and the gap after it (once the next one arrives)
+        self.pending: list | None = None
+
+    def feed(self, snippet: dict) -> dict | None:
+        """Add the next snippet; return the section it closed, if any.
+
+        Snippets must arrive in start order. A snippet identical to the
+        previous one (same start and text) is ignored, as are those starting
+        at or before the resume_after the segmenter was created with;
+        different snippets that share a start time are all kept.
+        """
+        start = snippet["start"]
+        if self.skip_through is not None and start <= self.skip_through:
+            return None
+        key = (start, snippet["text"])
+        if key == self.last_fed:
+            return None
+        self.last_fed = key
+
+        if self.pending is not None and self.pending[3] is None:
+            self.pending[3] = start - self.pending[1]
+
+        text = clean_text(snippet["text"])
+        if not text:
+            return None
+        section = self._decide(is_last=False) if self.pending is not None else None
+        if not self.texts:
+            self.start = start
+        self.texts.append(text)
+        self.words += len(text.split())
+        self.pending = [start, start + snippet["duration"], text.endswith(SENTENCE_END), None]
+        return section
+
+    def close(self) -> dict | None:
+        """End of stream: return the last, open section, if any."""
+        if self.pending is None:
+            return None
+        return self._decide(is_last=True)
+
+    def _decide(self, is_last: bool) -> dict | None:
+        start, end, sentence_end, gap_after = self.pending
+        self.pending = None
+        words = self.words
+        gap = (gap_after or 0.0) >= SILENCE_GAP_THRESHOLD
+        if not (
+            is_last
+            or (gap and words >= self.near)
+            or (sentence_end and words >= self.full)
+            or words >= self.over
+        ):
+            return None
+
+        joined = clean_transcript_text(" ".join(self.texts))
+        word_count = len(joined.split())
+        chunk_start = self.start
+        self.texts = []
+        self.words = 0
+        self.resume_after = start
+        if word_count == 0:
+            return None
+        return {"text": joined, "start": chunk_start, "end": end, "word_count": word_count}
 
 
 # ============================================================================
@@ -383,23 +805,400 @@ def build_output(
 
     Each section gets a title with timestamps: "Part N (MM:SS - MM:SS)".
     """
-    effective_resource_id = resource_id or f"youtube-{video_id}"
-    output: list[dict] = []
+    return [
+        section_row(section, i, video_id, resource_id, concept_id)
+        for i, section in enumerate(sections)
+    ]
+
+
+def section_row(
+    section: dict,
+    index: int,
+    video_id: str,
+    resource_id: str | None = None,
+    concept_id: str = "to-be-mapped",
+) -> dict:
+    """The output row of the index-th section."""
+    start_ts = format_timestamp(section["start"])
+    end_ts = format_timestamp(section["end"])
+    return {
+        "resource_id": resource_id or f"youtube-{video_id}",
+        "concept_id": concept_id,
+        "section_title": f"Part {index + 1} ({start_ts} - {end_ts})",
+        "sort_order": index,
+        "content_original": section["text"],
+        "word_count": section["word_count"],
+    }
+
+
+# ============================================================================
+# Batch ingestion
+# ============================================================================
+
+
+@dataclass
+class IngestOptions:
+    """Settings shared by every video in a run."""
+
+    output_dir: Path
+    resource_id: str | None = None
+    concept_id: str = "to-be-mapped"
+    language: str = "en"
+    chunk_size: int = 500
+    chunking: str = "greedy"
+    output_format: str = "json"
+    compression: str | None = None
+    tokens: TokenEstimator | None = None
+    loader: SectionLoader | None = None
+    # Delete the video's rows the new sections file lacks (cascades to user data)
+    prune: bool = False
+    transcripts: TranscriptCache | None = None
+
+
+def transcribe_video(
+    video_id: str,
+    options: IngestOptions,
+    api: YouTubeTranscriptApi | None = None,
+    log: Callable[[str], None] = print,
+) -> list[dict]:
+    """Fetch and segment one video's transcript into section rows.
+
+    Raises:
+        TranscriptError: If the video has no usable transcript.
+    """
+    snippets, lang_code, is_generated = fetch_transcript(
+        video_id, options.language, api=api, log=log, cache=options.transcripts
+    )
+    # Snippets are cleaned once, here; segmentation reuses the columns
+    snippets = Snippets.coerce(snippets)
+    columns = snippet_arrays(snippets)
+    total_words = int(columns["cum_words"][-1])
+    total_duration = snippets.end_time()
+    log(f"Transcript: {len(snippets)} segments, {total_words} words, {format_timestamp(total_duration)} duration")
+    if is_generated:
+        log("Warning: Using auto-generated captions. Quality may vary.")
+
+    sections = segment_transcript(
+        snippets, chunk_size=options.chunk_size, columns=columns, chunking=options.chunking
+    )
+    log(f"Segmented into {len(sections)} sections (target ~{options.chunk_size} words each):")
+    for i, sec in enumerate(sections):
+        start_ts = format_timestamp(sec["start"])
+        end_ts = format_timestamp(sec["end"])
+        log(f"  [{i}] Part {i + 1} ({start_ts} - {end_ts}): {sec['word_count']} words")
+
+    return build_output(
+        sections,
+        video_id,
+        resource_id=options.resource_id,
+        concept_id=options.concept_id,
+    )
+
+
+def save_video(
+    video_id: str,
+    rows: list[dict],
+    options: IngestOptions,
+    log: Callable[[str], None] = print,
+) -> Path:
+    """Write one video's sections file (and load it, with a loader)."""
+    if options.tokens is not None:
+        options.tokens.estimate_rows(rows)
+    output_file = output_path(
+        options.output_dir,
+        f"youtube-{video_id}-sections",
+        options.output_format,
+        options.compression,
+    )
+    with SectionWriter(output_file, options.output_format, options.compression) as writer:
+        for row in rows:
+            writer.write(row)
+
+    total_output_words = sum(s["word_count"] for s in rows)
+    log(f"Saved to {output_file}")
+    log(f"Total: {total_output_words} words across {len(rows)} sections")
+    if options.tokens is not None:
+        total_tokens = sum(s["token_estimate"] for s in rows)
+        log(f"Estimated tokens: {total_tokens} ({options.tokens.name})")
+
+    # Upsert this video's rows in resource_sections
+    if options.loader is not None:
+        result = options.loader.load(read_rows(output_file), prune=options.prune)
+        log(f"Database: {result.summary()}")
+    return output_file
+
+
+def ingest_batch(
+    video_ids: list[str],
+    options: IngestOptions,
+    workers: int = DEFAULT_WORKERS,
+    api_factory: Callable[[], YouTubeTranscriptApi] = YouTubeTranscriptApi,
+) -> dict[str, str]:
+    """Ingest many videos, fetching transcripts on a bounded thread pool.
+
+    Each worker thread gets its own API client from api_factory (pass a
+    stub factory to run without the network). Fetching and segmenting run
+    concurrently; token estimates, sections files and database loads
+    happen on the calling thread as videos finish. A video that fails is
+    recorded and the batch continues. With more than one video, log lines
+    are prefixed with the video ID.
+
+    Returns {video_id: error_message} for the videos that failed.
+    """
+    failures: dict[str, str] = {}
+    local = threading.local()
+    batch = len(video_ids) > 1
+
+    def logger(video_id: str) -> Callable[[str], None]:
+        if not batch:
+            return print
+        return lambda message: print(f"[{video_id}] {message}")
+
+    def work(video_id: str) -> list[dict]:
+        if not hasattr(local, "api"):
+            local.api = api_factory()
+        return transcribe_video(video_id, options, api=local.api, log=logger(video_id))
+
+    options.output_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(video_ids)))) as pool:
+        futures = {pool.submit(work, video_id): video_id for video_id in video_ids}
+        for future in as_completed(futures):
+            video_id = futures[future]
+            log = logger(video_id)
+            try:
+                save_video(video_id, future.result(), options, log=log)
+            except TranscriptError as e:
+                log(f"Error: {e}")
+                failures[video_id] = str(e)
+            except Exception as e:
+                log(f"Error: {type(e).__name__}: {e}")
+                failures[video_id] = f"{type(e).__name__}: {e}"
+
+    if options.tokens is not None:
+        options.tokens.save()
+    return failures
+
+
+# ============================================================================
+# Live streams
+# ============================================================================
+
+# Seconds between polls of a live video's transcript
+DEFAULT_POLL_INTERVAL = 30.0
+
+# Minutes without new captions after which a polled stream is over
+DEFAULT_LIVE_IDLE_MINUTES = 15.0
+
+
+def poll_transcript(
+    video_id: str,
+    language: str = "en",
+    api: YouTubeTranscriptApi | None = None,
+    interval: float = DEFAULT_POLL_INTERVAL,
+    idle_timeout: float = DEFAULT_LIVE_IDLE_MINUTES * 60,
+    log: Callable[[str], None] = print,
+) -> Iterator[dict]:
+    """Yield a live video's snippets as they appear, by polling its transcript.
+
+    Each poll fetches the whole transcript (never from the cache) and
+    yields the snippets not yielded yet: those starting after the last one
+    yielded, and those sharing its start time that come after the ones
+    already yielded (by position, so a caption revised after it was
+    yielded is not yielded again). The newest
+    snippet of a poll is held back until a later poll shows one after it,
+    since live captions may still be revising it. The stream is over once
+    no new snippet has appeared for idle_timeout seconds.
+    """
+    if api is None:
+        api = YouTubeTranscriptApi()
+    last_start: float | None = None
+    # Snippets yielded at last_start, so snippets sharing a start time all get through once
+    last_count = 0
+    held: dict | None = None
+    idle_since = time.monotonic()
+    polls = 0
+    while True:
+        try:
+            snippets, _, _ = fetch_transcript(
+                video_id, language, api=api, log=log if polls == 0 else lambda message: None
+            )
+        except TranscriptError as e:
+            if polls == 0:
+                log(f"Waiting for captions: {e}")
+            snippets = Snippets()
+        polls += 1
+
+        snippets = Snippets.coerce(snippets)
+        fresh: list[dict] = []
+        at_last = 0
+        for i, start in enumerate(snippets.starts):
+            if last_start is not None and start <= last_start:
+                if start < last_start:
+                    continue
+                at_last += 1
+                if at_last <= last_count:
+                    continue
+            fresh.append(snippets[i])
+        if fresh:
+            if held is None or (fresh[-1]["start"], fresh[-1]["text"]) != (held["start"], held["text"]):
+                idle_since = time.monotonic()
+            for snippet in fresh[:-1]:
+                yield snippet
+                if snippet["start"] != last_start:
+                    last_start = snippet["start"]
+                    last_count = 0
+                last_count += 1
+            held = fresh[-1]
+        if time.monotonic() - idle_since >= idle_timeout:
+            break
+        time.sleep(interval)
+
+    if held is not None:
+        yield held
+
+
+def read_snippet_feed(path: str) -> Iterator[dict]:
+    """Yield snippets from a local feed, one JSON object per line.
+
+    Each line has text, start and duration (seconds); "-" reads stdin.
+    Reading stops at end of file, so pipe a feed that is still being
+    written: tail -f captions.ndjson | ingest-youtube.py ID --live-feed -
+    """
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            yield {
+                "text": entry["text"],
+                "start": float(entry["start"]),
+                "duration": float(entry.get("duration", 0.0)),
+            }
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
 
-    for i, section in enumerate(sections):
-        start_ts = format_timestamp(section["start"])
-        end_ts = format_timestamp(section["end"])
+def live_journal_path(output_dir: Path, video_id: str) -> Path:
+    return output_dir / f"youtube-{video_id}.live.ndjson"
 
-        output.append({
-            "resource_id": effective_resource_id,
-            "concept_id": concept_id,
-            "section_title": f"Part {i + 1} ({start_ts} - {end_ts})",
-            "sort_order": i,
-            "content_original": section["text"],
-            "word_count": section["word_count"],
-        })
 
-    return output
+def read_live_journal(path: Path, chunk_size: int) -> tuple[int, float | None]:
+    """Sections an earlier live ingest emitted, and the snippet to resume after.
+
+    A torn last line (the process died while appending it) is cut off.
+
+    Raises:
+        TranscriptError: If the journal was written with another chunk size.
+    """
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return 0, None
+    emitted = 0
+    resume_after = None
+    good = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+        if entry["chunk_size"] != chunk_size:
+            raise TranscriptError(
+                f"{path.name} was written with --chunk-size {entry['chunk_size']}; "
+                "use that, or delete it to start over"
+            )
+        emitted += 1
+        resume_after = entry["resume_after"]
+        good += len(line)
+    if good < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    return emitted, resume_after
+
+
+def journal_rows(path: Path) -> Iterator[dict]:
+    with open(path, "rb") as f:
+        for line in f:
+            yield json.loads(line)["row"]
+
+
+def ingest_live(
+    video_id: str,
+    snippets: Iterable[dict],
+    options: IngestOptions,
+    log: Callable[[str], None] = print,
+) -> Path:
+    """Segment a live transcript as it arrives, saving each section as it closes.
+
+    Every finished section is appended (and fsynced) to a journal,
+    {output-dir}/youtube-{video_id}.live.ndjson, the sections file is
+    rewritten from the journal, and with a loader the row is upserted
+    right away. A restarted ingest reads the journal and resumes after
+    the last emitted section: sections already emitted keep their
+    numbering and are never emitted again. When the stream ends, the
+    finished file is loaded once more (pruned, with options.prune).
+    """
+    options.output_dir.mkdir(parents=True, exist_ok=True)
+    journal_path = live_journal_path(options.output_dir, video_id)
+    output_file = output_path(
+        options.output_dir,
+        f"youtube-{video_id}-sections",
+        options.output_format,
+        options.compression,
+    )
+
+    def rewrite_sections() -> None:
+        with SectionWriter(output_file, options.output_format, options.compression) as writer:
+            for row in journal_rows(journal_path):
+                writer.write(row)
+
+    emitted, resume_after = read_live_journal(journal_path, options.chunk_size)
+    if emitted:
+        log(f"Resuming after {emitted} section(s) (from {format_timestamp(resume_after)})")
+        rewrite_sections()
+    segmenter = LiveSegmenter(options.chunk_size, resume_after=resume_after)
+
+    with open(journal_path, "ab") as journal:
+
+        def emit(section: dict) -> None:
+            nonlocal emitted
+            row = section_row(section, emitted, video_id, options.resource_id, options.concept_id)
+            if options.tokens is not None:
+                options.tokens.estimate_rows([row])
+            journal.write(dumps_line({
+                "chunk_size": options.chunk_size,
+                "resume_after": segmenter.resume_after,
+                "row": row,
+            }))
+            journal.flush()
+            os.fsync(journal.fileno())
+            emitted += 1
+            rewrite_sections()
+            if options.loader is not None:
+                options.loader.load([row])
+            log(f"  [{row['sort_order']}] {row['section_title']}: {row['word_count']} words")
+
+        for snippet in snippets:
+            section = segmenter.feed(snippet)
+            if section is not None:
+                emit(section)
+        section = segmenter.close()
+        if section is not None:
+            emit(section)
+
+    if not emitted:
+        raise TranscriptError("The stream produced no transcript text.")
+    if options.tokens is not None:
+        options.tokens.save()
+    log(f"Stream ended: {emitted} section(s) in {output_file}")
+    if options.loader is not None:
+        result = options.loader.load(read_rows(output_file), prune=options.prune)
+        log(f"Database: {result.summary()}")
+    return output_file
 
 
 # ============================================================================
@@ -409,15 +1208,52 @@ def build_output(
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Extract and segment a YouTube video transcript for translation."
+        description="Extract and segment YouTube video transcripts for translation."
     )
     parser.add_argument(
-        "video",
-        help="YouTube URL or 11-character video ID",
+        "videos",
+        nargs="*",
+        help="YouTube URLs, 11-character video IDs, or playlist/channel URLs",
+    )
+    parser.add_argument(
+        "--ids-file",
+        help="File with one URL or video ID per line (# comments allowed)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Transcripts fetched concurrently (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Live stream: poll the transcript and save sections as they close "
+             "(resumes after the last saved section when restarted)",
+    )
+    parser.add_argument(
+        "--live-feed",
+        metavar="PATH",
+        help="Like --live, but read snippets (JSON lines with text, start, duration) "
+             "from a local file, or - for stdin",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"Seconds between transcript polls with --live (default: {DEFAULT_POLL_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "--live-idle-timeout",
+        type=float,
+        default=DEFAULT_LIVE_IDLE_MINUTES,
+        metavar="MINUTES",
+        help="End a --live stream after this long without new captions "
+             f"(default: {DEFAULT_LIVE_IDLE_MINUTES:g})",
     )
     parser.add_argument(
         "--resource-id",
-        help="Override the resource_id field (default: youtube-VIDEO_ID)",
+        help="Override the resource_id field (default: youtube-VIDEO_ID; single video only)",
     )
     parser.add_argument(
         "--concept-id",
@@ -435,58 +1271,178 @@ def main() -> None:
         default=500,
         help="Target words per chunk (default: 500)",
     )
+    parser.add_argument(
+        "--chunking",
+        choices=CHUNKINGS,
+        default="greedy",
+        help="greedy: break at the first good point past the target; balanced: "
+             "choose breaks over the whole transcript for even chunk sizes (default: greedy)",
+    )
     parser.add_argument(
         "--output-dir",
         default="scripts/output",
         help="Output directory (default: scripts/output)",
     )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="Sections file format: pretty JSON array or one row per line (default: json)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default=None,
+        help="Compress the sections file (zstd needs zstandard)",
+    )
+    parser.add_argument(
+        "--transcript-ttl",
+        type=float,
+        default=DEFAULT_TTL_DAYS,
+        metavar="DAYS",
+        help="Reuse cached transcript listings and snippets up to this old; "
+             f"0 keeps them forever (default: {DEFAULT_TTL_DAYS:g})",
+    )
+    parser.add_argument(
+        "--refresh-transcripts",
+        action="store_true",
+        help="Fetch transcripts again even when cached, and update the cache",
+    )
+    parser.add_argument(
+        "--no-transcript-cache",
+        action="store_true",
+        help="Neither read nor write the transcript cache",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=TOKENIZERS,
+        default="auto",
+        help="Per-section token estimates: tiktoken cl100k_base, the local "
+             "estimator, or tiktoken when available (default: auto)",
+    )
+    parser.add_argument(
+        "--load-db",
+        action="store_true",
+        help="Also upsert the sections into resource_sections (needs psycopg). "
+             "Rows are matched by position (resource, concept, sort_order), not by content",
+    )
+    parser.add_argument(
+        "--prune-db",
+        action="store_true",
+        help="With --load-db, also delete the resource's rows that the new file no "
+             "longer has. Notes, annotations, translations and quizzes on them are "
+             "deleted too (ON DELETE CASCADE); off by default",
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Postgres connection string for --load-db (default: $DATABASE_URL)",
+    )
     args = parser.parse_args()
 
-    # 1. Extract video ID
+    error = check_output_format(args.format, args.compress)
+    if error:
+        parser.error(error)
+    if not args.videos and not args.ids_file:
+        parser.error("give at least one video, playlist or channel, or --ids-file")
+    loader = None
+    if args.load_db:
+        if not args.database_url:
+            parser.error("--load-db needs --database-url or DATABASE_URL")
+        try:
+            loader = SectionLoader(args.database_url)
+        except RuntimeError as e:
+            parser.error(str(e))
+    if args.prune_db and not args.load_db:
+        parser.error("--prune-db needs --load-db")
     try:
-        video_id = extract_video_id(args.video)
-    except ValueError as e:
+        tokens = TokenEstimator(args.tokenizer, Path(args.output_dir) / ".cache")
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    # 1. Resolve video IDs (playlists and channels expand to their videos)
+    try:
+        video_ids = expand_video_ids(read_video_inputs(args.videos, args.ids_file))
+    except (OSError, ValueError) as e:
         print(f"Error: {e}")
         sys.exit(1)
-
-    print(f"Video ID: {video_id}")
-
-    # 2. Fetch transcript
-    snippets, lang_code, is_generated = fetch_transcript(video_id, args.language)
-    total_words = sum(len(clean_text(s["text"]).split()) for s in snippets)
-    total_duration = max(s["start"] + s["duration"] for s in snippets)
-    print(f"Transcript: {len(snippets)} segments, {total_words} words, {format_timestamp(total_duration)} duration")
-    if is_generated:
-        print("Warning: Using auto-generated captions. Quality may vary.")
-
-    # 3. Segment into chunks
-    sections = segment_transcript(snippets, chunk_size=args.chunk_size)
-    print(f"\nSegmented into {len(sections)} sections (target ~{args.chunk_size} words each):")
-    for i, sec in enumerate(sections):
-        start_ts = format_timestamp(sec["start"])
-        end_ts = format_timestamp(sec["end"])
-        print(f"  [{i}] Part {i + 1} ({start_ts} - {end_ts}): {sec['word_count']} words")
-
-    # 4. Build output
-    output = build_output(
-        sections,
-        video_id,
+    if args.resource_id and len(video_ids) > 1:
+        parser.error("--resource-id only applies to a single video")
+    live = args.live or args.live_feed is not None
+    if live and len(video_ids) != 1:
+        parser.error("--live and --live-feed take a single video")
+    if live and args.chunking != "greedy":
+        parser.error("--live and --live-feed use greedy chunking (balanced needs the whole transcript)")
+
+    if len(video_ids) == 1:
+        print(f"Video ID: {video_ids[0]}")
+    else:
+        print(f"Videos: {len(video_ids)} ({max(1, min(args.workers, len(video_ids)))} concurrent)")
+
+    # 2. Fetch, segment and save each video (and load, with --load-db)
+    options = IngestOptions(
+        output_dir=Path(args.output_dir),
         resource_id=args.resource_id,
         concept_id=args.concept_id,
+        language=args.language,
+        chunk_size=args.chunk_size,
+        chunking=args.chunking,
+        output_format=args.format,
+        compression=args.compress,
+        tokens=tokens,
+        prune=args.prune_db,
     )
+    if not args.no_transcript_cache:
+        options.transcripts = TranscriptCache(
+            options.output_dir / ".cache" / "transcripts",
+            ttl=args.transcript_ttl * 86400 if args.transcript_ttl > 0 else None,
+            refresh=args.refresh_transcripts,
+        )
+    with ExitStack() as stack:
+        if loader is not None:
+            options.loader = stack.enter_context(loader)
+        if live:
+            # 2b. Live stream: segment snippets as they arrive
+            video_id = video_ids[0]
+            if args.live_feed is not None:
+                snippets = read_snippet_feed(args.live_feed)
+            else:
+                snippets = poll_transcript(
+                    video_id,
+                    args.language,
+                    interval=args.poll_interval,
+                    idle_timeout=args.live_idle_timeout * 60,
+                )
+            try:
+                ingest_live(video_id, snippets, options)
+                failures = {}
+            except (TranscriptError, OSError, ValueError, KeyError) as e:
+                print(f"Error: {e}")
+                failures = {video_id: str(e)}
+        else:
+            failures = ingest_batch(video_ids, options, workers=args.workers)
 
-    # 5. Save
-    out_dir = Path(args.output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    output_file = out_dir / f"youtube-{video_id}-sections.json"
-    output_file.write_text(
-        json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
+    if options.transcripts is not None and not live:
+        print(f"\nCache: {options.transcripts.summary()}")
+
+    if len(video_ids) > 1:
+        print(f"\n{'=' * 60}")
+        print(f"BATCH COMPLETE")
+        print(f"{'=' * 60}")
+        print(f"  Ingested: {len(video_ids) - len(failures)}/{len(video_ids)}")
+        for video_id, error in failures.items():
+            print(f"  Failed: {video_id} ({error})")
+
+    if failures:
+        sys.exit(1)
 
-    total_output_words = sum(s["word_count"] for s in output)
-    print(f"\nSaved to {output_file}")
-    print(f"Total: {total_output_words} words across {len(output)} sections")
-    print(f"Done. Output: {output_file}")
+    if len(video_ids) == 1:
+        output_file = output_path(
+            options.output_dir, f"youtube-{video_ids[0]}-sections", args.format, args.compress
+        )
+        print(f"Done. Output: {output_file}")
+    else:
+        print(f"\nDone. Output: {options.output_dir}")
 
 
 if __name__ == "__main__":
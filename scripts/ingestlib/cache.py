@@ -0,0 +1,135 @@
+"""
+Content-addressed cache for extraction artifacts with a disk budget.
+
+Entries are plain text files named by a key derived from everything that
+determines their content (PDF hash, extractor name/version, cleaning
+settings), so a stale entry can never be served: changing any input changes
+the key. Reads and writes bump the file mtime, which is used as the LRU
+clock when the cache (plus any extra files it is told to manage, such as
+downloaded PDFs) grows past its byte budget.
+"""
+
+import hashlib
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from ingestlib.files import atomic_writer
+
+# Read size for hashing large PDFs
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(*parts: str) -> str:
+    """Combine key parts (digests, versions, settings) into one cache key."""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def touch(path: Path) -> None:
+    """Mark a file as recently used for LRU eviction."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExtractionCache:
+    """Text artifacts keyed by content hash, stored under one directory.
+
+    max_bytes=None disables eviction.
+    """
+
+    def __init__(self, root: Path, max_bytes: int | None = None) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str, kind: str) -> Path:
+        return self.root / f"{key}.{kind}"
+
+    def open(self, key: str, kind: str) -> IO[str] | None:
+        """Open a cached entry for streaming reads, or return None on a miss.
+
+        kind names the artifact and its format, e.g. "clean.md". Text is
+        read without newline translation, exactly as it was written.
+        """
+        path = self.path_for(key, kind)
+        try:
+            f = open(path, encoding="utf-8", newline="")
+        except FileNotFoundError:
+            return None
+        touch(path)
+        return f
+
+    @contextmanager
+    def writer(self, key: str, kind: str) -> Iterator[IO[str]]:
+        """Stream an entry to disk; it only appears once the block completes."""
+        with atomic_writer(self.path_for(key, kind)) as f:
+            yield f
+
+    def get(self, key: str, kind: str) -> str | None:
+        """Return the cached text for (key, kind), or None on a miss."""
+        f = self.open(key, kind)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def put(self, key: str, kind: str, text: str) -> Path:
+        """Store text atomically (temp file + rename) and return its path."""
+        with self.writer(key, kind) as f:
+            f.write(text)
+        return self.path_for(key, kind)
+
+    def entries(self) -> list[Path]:
+        return [
+            p for p in self.root.iterdir()
+            if p.is_file() and not p.name.startswith(".tmp-")
+        ]
+
+    def evict(
+        self,
+        extra: Iterable[Path] = (),
+        keep: Iterable[Path] = (),
+    ) -> tuple[int, int]:
+        """Delete least recently used files until the budget is met.
+
+        The budget covers the cache entries plus `extra` files (e.g. PDFs in
+        the output directory). Files in `keep` are counted but never deleted.
+        Returns (files_removed, bytes_removed).
+        """
+        if self.max_bytes is None:
+            return 0, 0
+
+        keep_set = {p.resolve() for p in keep}
+        files: list[tuple[float, int, Path]] = []
+        total = 0
+        for path in {*self.entries(), *extra}:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            total += st.st_size
+            if path.resolve() not in keep_set:
+                files.append((st.st_mtime, st.st_size, path))
+
+        removed = freed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+
+        return removed, freed
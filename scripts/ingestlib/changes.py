@@ -0,0 +1,85 @@
+"""
+Section-level change detection between two ingests of the same resource.
+
+Every output row carries a content_hash. A section is identified by its
+title plus how many earlier sections had the same title, so inserting or
+removing a section does not make every later one look new. Comparing a
+fresh ingest with the previous index classifies each section as added,
+changed (new hash), moved (same hash, new sort_order) or removed.
+"""
+
+import hashlib
+from collections import Counter
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a section's text (SHA-256 hex)."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def index_entry(row: dict) -> dict:
+    """The part of a row kept in the index used for the next comparison."""
+    return {
+        "section_title": row["section_title"],
+        "sort_order": row["sort_order"],
+        "content_hash": row["content_hash"],
+        "word_count": row["word_count"],
+    }
+
+
+class SectionChanges:
+    """Classify freshly produced rows against the previous ingest's index.
+
+    Feed rows in output order to classify(); afterwards removed() returns
+    the previous sections that were not seen again, and index holds the
+    entries to store for the next run.
+    """
+
+    def __init__(self, previous: list[dict]) -> None:
+        self.previous: dict[tuple[str, int], dict] = {}
+        seen: Counter[str] = Counter()
+        for entry in previous:
+            title = entry["section_title"]
+            self.previous[(title, seen[title])] = entry
+            seen[title] += 1
+        self.seen: Counter[str] = Counter()
+        self.index: list[dict] = []
+        self.counts: Counter[str] = Counter()
+
+    def classify(self, row: dict) -> str | None:
+        """Return "added", "changed", "moved", or None if unchanged."""
+        title = row["section_title"]
+        old = self.previous.pop((title, self.seen[title]), None)
+        self.seen[title] += 1
+        self.index.append(index_entry(row))
+
+        if old is None:
+            change = "added"
+        elif old["content_hash"] != row["content_hash"]:
+            change = "changed"
+        elif old["sort_order"] != row["sort_order"]:
+            change = "moved"
+        else:
+            change = None
+        self.counts[change or "unchanged"] += 1
+        return change
+
+    def removed(self, resource_id: str, concept_id: str) -> list[dict]:
+        """Rows (without content) for previous sections that no longer exist."""
+        rows = []
+        for entry in self.previous.values():
+            rows.append({
+                "resource_id": resource_id,
+                "concept_id": concept_id,
+                **entry,
+                "change": "removed",
+            })
+        self.counts["removed"] = len(rows)
+        self.previous = {}
+        return rows
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{self.counts[kind]} {kind}"
+            for kind in ("added", "changed", "moved", "removed", "unchanged")
+        )
@@ -0,0 +1,226 @@
+"""
+Resumable, validated file downloads over a pooled HTTP session.
+
+Bytes are streamed to "<dest>.part". If the connection drops, the next
+attempt resumes with a Range request from the bytes already on disk
+(falling back to a full download when the server ignores the range).
+Attempts are spaced with exponential backoff and full jitter, honoring
+Retry-After on 429/503. A finished file is checked (expected length,
+magic bytes, minimum size, %%EOF trailer, optional SHA-256) and only then
+renamed onto
+dest, so a file at dest is always complete.
+"""
+
+import hashlib
+import os
+import random
+import time
+from pathlib import Path
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .ratelimit import RateLimitedAdapter, TokenBucket
+
+# Streaming read size
+CHUNK_SIZE = 1 << 16
+
+# (connect, read) timeouts in seconds
+TIMEOUT = (10, 60)
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+PDF_MAGIC = b"%PDF-"
+MIN_PDF_BYTES = 1024
+
+# Every complete PDF ends with this marker; writers may append a little
+# padding or a newline after it, so look for it in the last few KB
+PDF_EOF = b"%%EOF"
+TRAILER_WINDOW = 4096
+
+USER_AGENT = "jarre-ingest/1.0 (+https://github.com/nicolasdemaria/jarre-app)"
+
+
+class DownloadError(Exception):
+    """A download failed permanently (attempts exhausted or invalid content)."""
+
+
+class InvalidContent(Exception):
+    """The downloaded bytes failed validation; the partial file is discarded."""
+
+
+def make_session(
+    pool_size: int = 4, limiter: TokenBucket | None = None
+) -> requests.Session:
+    """Session with a connection pool sized for `pool_size` concurrent downloads.
+
+    With a limiter, every request (including retries) first takes a token.
+    """
+    session = requests.Session()
+    if limiter is not None:
+        adapter = RateLimitedAdapter(
+            limiter, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def backoff_delay(attempt: int, retry_after: str | None = None) -> float:
+    """Seconds to wait before retry number `attempt` (0-based).
+
+    Full jitter: uniform in [0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)],
+    unless the server asked for a specific delay.
+    """
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def has_trailer(f, size: int, trailer: bytes) -> bool:
+    """Whether trailer appears in the last TRAILER_WINDOW bytes of open file f."""
+    f.seek(max(0, size - TRAILER_WINDOW))
+    return trailer in f.read()
+
+
+def is_valid_pdf(path: Path, min_size: int = MIN_PDF_BYTES) -> bool:
+    """Cheap check that a file on disk looks like a complete PDF: header at
+    the start, %%EOF near the end (a half-written file has no trailer)."""
+    try:
+        size = path.stat().st_size
+        if size < min_size:
+            return False
+        with open(path, "rb") as f:
+            return f.read(len(PDF_MAGIC)) == PDF_MAGIC and has_trailer(f, size, PDF_EOF)
+    except FileNotFoundError:
+        return False
+
+
+def validate(
+    path: Path,
+    magic: bytes | None,
+    min_size: int,
+    sha256: str | None,
+    trailer: bytes | None = None,
+) -> None:
+    size = path.stat().st_size
+    if size < min_size:
+        raise InvalidContent(f"file too small ({size} bytes)")
+    with open(path, "rb") as f:
+        if magic and f.read(len(magic)) != magic:
+            raise InvalidContent(f"missing {magic!r} header")
+        if trailer and not has_trailer(f, size, trailer):
+            raise InvalidContent(f"missing {trailer!r} trailer (truncated?)")
+        if sha256:
+            f.seek(0)
+            h = hashlib.sha256()
+            while chunk := f.read(CHUNK_SIZE):
+                h.update(chunk)
+            if h.hexdigest() != sha256.lower():
+                raise InvalidContent("checksum mismatch")
+
+
+def fetch_to_part(
+    session: requests.Session,
+    url: str,
+    part: Path,
+) -> None:
+    """One attempt: stream url into part, resuming from its current size."""
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as resp:
+        if resp.status_code == 416 and offset:
+            # Nothing left to send: the part file already holds every byte,
+            # or it is longer than the resource and must be restarted.
+            total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+            if total.isdigit() and int(total) == offset:
+                return
+            part.unlink()
+            raise requests.ConnectionError("range not satisfiable; restarting")
+        resp.raise_for_status()
+
+        if resp.status_code == 206:
+            mode = "ab"
+            expected = resp.headers.get("Content-Range", "").rpartition("/")[2]
+            expected_total = int(expected) if expected.isdigit() else None
+        else:
+            # Full response (no Range sent, or the server ignored it)
+            mode = "wb"
+            offset = 0
+            length = resp.headers.get("Content-Length")
+            expected_total = int(length) if length and length.isdigit() else None
+
+        # Let a cut-off body end short instead of raising mid-chunk, so the
+        # bytes that did arrive reach disk; the length check below catches it
+        resp.raw.enforce_content_length = False
+        with open(part, mode) as f:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+
+    received = part.stat().st_size
+    if expected_total is not None and received != expected_total:
+        raise requests.ConnectionError(
+            f"connection closed early ({received}/{expected_total} bytes)"
+        )
+
+
+def download_file(
+    session: requests.Session,
+    url: str,
+    dest: Path,
+    *,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    magic: bytes | None = PDF_MAGIC,
+    min_size: int = MIN_PDF_BYTES,
+    trailer: bytes | None = PDF_EOF,
+    sha256: str | None = None,
+    log: Callable[[str], None] = print,
+) -> Path:
+    """Download url to dest, resuming and retrying as needed. Returns dest.
+
+    Raises DownloadError when every attempt fails or the content is invalid
+    on the last attempt.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+    last_error: Exception | None = None
+    retry_after: str | None = None
+
+    for attempt in range(max_attempts):
+        if attempt:
+            delay = backoff_delay(attempt - 1, retry_after)
+            retry_after = None
+            log(f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{max_attempts})...")
+            time.sleep(delay)
+
+        try:
+            fetch_to_part(session, url, part)
+            validate(part, magic, min_size, sha256, trailer)
+            os.replace(part, dest)
+            return dest
+        except InvalidContent as e:
+            part.unlink(missing_ok=True)
+            last_error = e
+            log(f"Downloaded file is invalid: {e}")
+        except requests.HTTPError as e:
+            last_error = e
+            status = e.response.status_code if e.response is not None else None
+            log(f"HTTP {status} from {url}")
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                break
+            if e.response is not None:
+                retry_after = e.response.headers.get("Retry-After")
+        except requests.RequestException as e:
+            # Connection reset, timeout, or body cut short: keep the bytes we have
+            last_error = e
+            have = part.stat().st_size if part.exists() else 0
+            log(f"Download interrupted: {e} ({have} bytes kept)")
+
+    raise DownloadError(f"{url}: {last_error}")
@@ -0,0 +1,876 @@
+"""
+LaTeX source engine: arXiv e-print archives to section-headed markdown.
+
+arXiv serves a paper's source as a gzipped tar, a single gzipped .tex file,
+or (for PDF-only submissions) the PDF itself. read_source() unpacks the
+.tex and .bbl files, and source_to_markdown() finds the main file (the one
+with \\documentclass and \\begin{document}), inlines \\input/\\include,
+expands simple user macros, and renders the body as markdown that the
+existing heading detection reads like pymupdf4llm output:
+
+  \\section{Method}        ->  ## 3 Method
+  \\subsection{Datasets}   ->  ### 3.1 Datasets
+  \\subsubsection, \\paragraph, appendix sections  ->  bold run-in titles
+  \\begin{abstract}        ->  ## Abstract
+  \\appendix               ->  ## Appendix
+  \\bibliography / .bbl    ->  ## References (kept for citation scanning)
+
+Math is passed through as $...$ / $$...$$, figures and tables are reduced
+to their captions, citations are dropped and section/figure/table
+references are resolved to their numbers. Paragraphs come out as one line
+each, separated by blank lines.
+
+This is a renderer for the common subset of LaTeX that papers use, not a
+TeX engine: unknown commands keep their argument text and lose their
+formatting.
+"""
+
+import gzip
+import io
+import re
+import tarfile
+import unicodedata
+from pathlib import Path, PurePosixPath
+
+# Bump when the rendering changes, so cached conversions are not reused
+CONVERTER_VERSION = "latex-md-1"
+
+# Source files worth reading from an archive
+SOURCE_SUFFIXES = (".tex", ".bbl", ".ltx")
+
+# \input nesting limit (guards against include cycles)
+MAX_INPUT_DEPTH = 20
+
+# Macro expansion passes (macros defined in terms of other macros)
+MACRO_PASSES = 4
+
+GZIP_MAGIC = b"\x1f\x8b"
+PDF_MAGIC = b"%PDF-"
+
+# \section-level commands, by depth
+SECTION_LEVELS = {
+    "part": 0,
+    "chapter": 0,
+    "section": 1,
+    "subsection": 2,
+    "subsubsection": 3,
+    "paragraph": 4,
+    "subparagraph": 4,
+}
+
+MATH_ENVS = {
+    "equation", "equation*", "align", "align*", "alignat", "alignat*",
+    "gather", "gather*", "multline", "multline*", "flalign", "flalign*",
+    "eqnarray", "eqnarray*", "displaymath", "math",
+}
+
+# Environments whose content is not prose. Floats keep their caption.
+FLOAT_ENVS = {"figure", "figure*", "table", "table*", "wrapfigure", "wraptable", "SCfigure"}
+DROP_ENVS = {
+    "tikzpicture", "algorithm", "algorithm*", "algorithmic", "tabular", "tabular*",
+    "tabularx", "comment", "titlepage", "filecontents",
+    "filecontents*", "pgfpicture", "picture",
+}
+CODE_ENVS = {"verbatim", "verbatim*", "lstlisting", "minted", "Verbatim"}
+
+THEOREM_ENVS = {
+    "theorem", "lemma", "proposition", "corollary", "definition", "remark",
+    "example", "claim", "conjecture", "assumption", "observation", "proof",
+}
+
+# Commands whose arguments are dropped, with their number of {} arguments
+DROP_ARGS = {
+    "label": 1, "vspace": 1, "vspace*": 1, "hspace": 1, "hspace*": 1,
+    "includegraphics": 1, "bibliographystyle": 1, "footnote": 1, "footnotetext": 1,
+    "thanks": 1, "pagestyle": 1, "thispagestyle": 1, "color": 1, "setlength": 2,
+    "addtolength": 2, "setcounter": 2, "addtocounter": 2, "definecolor": 3,
+    "usepackage": 1, "documentclass": 1, "title": 1, "author": 1, "date": 1,
+    "affiliation": 1, "affil": 1, "email": 1, "institute": 1, "keywords": 1,
+    "address": 1, "icmltitle": 1, "icmlauthor": 2, "icmlaffiliation": 2,
+    "icmlcorrespondingauthor": 2, "icmlkeywords": 1, "runningtitle": 1,
+    "newtheorem": 2, "theoremstyle": 1, "graphicspath": 1, "hypersetup": 1,
+    "linenumbers": 0, "nocite": 1, "enlargethispage": 1, "raisebox": 1,
+    "resizebox": 2, "scalebox": 1, "vskip": 0, "hskip": 0,
+}
+
+# Formatting commands: {argument} rendered between these markers
+FORMATTING = {
+    "emph": "*", "textit": "*", "textsl": "*", "textbf": "**", "texttt": "`",
+}
+
+SYMBOLS = {
+    "ldots": "…", "dots": "…", "textellipsis": "…", "S": "§", "P": "¶",
+    "LaTeX": "LaTeX", "TeX": "TeX", "textemdash": "—", "textendash": "–",
+    "textbackslash": "\\", "textasciitilde": "~", "textasciicircum": "^",
+    "textbar": "|", "textless": "<", "textgreater": ">", "copyright": "©",
+    "textregistered": "®", "texttrademark": "™", "textdegree": "°",
+    "ss": "ß", "ae": "æ", "AE": "Æ", "oe": "œ", "OE": "Œ", "o": "ø", "O": "Ø",
+    "aa": "å", "AA": "Å", "l": "ł", "L": "Ł", "i": "ı", "j": "ȷ",
+    "par": "\n\n", "newline": " ", "linebreak": " ", "quad": " ", "qquad": " ",
+    "newblock": " ",
+}
+
+# Accent commands -> combining characters
+ACCENTS = {
+    "'": "\u0301", "`": "\u0300", '"': "\u0308", "^": "\u0302", "~": "\u0303",
+    "=": "\u0304", ".": "\u0307", "c": "\u0327", "v": "\u030c", "u": "\u0306",
+    "H": "\u030b", "k": "\u0328", "r": "\u030a",
+}
+
+ESCAPED_CHARS = set("&%$#_{}")
+# \, \; \: \! and "\ " are spaces; \@ and \/ are spacing hints
+SPACE_COMMANDS = set(",;:! ")
+
+CITE_RE = re.compile(r"(?:[a-z]*cite[a-z]*|citeauthor|citeyear)\*?", re.IGNORECASE)
+REF_COMMANDS = {"ref", "eqref", "autoref", "cref", "Cref", "pageref", "nameref", "Autoref", "cpageref"}
+
+COMMENT_LINE_RE = re.compile(r"^[ \t]*(?<!\\)%[^\n]*\n", re.MULTILINE)
+COMMENT_RE = re.compile(r"(?<!\\)%[^\n]*(?:\n[ \t]*)?")
+CODE_ENV_RE = re.compile(
+    r"(\\begin\{(verbatim\*?|Verbatim|lstlisting|minted)\}.*?\\end\{\2\})", re.DOTALL
+)
+COMMENT_ENV_RE = re.compile(r"\\begin\{comment\}.*?\\end\{comment\}", re.DOTALL)
+IFFALSE_RE = re.compile(r"\\iffalse\b.*?\\fi\b", re.DOTALL)
+
+INPUT_RE = re.compile(r"\\(?:input|include|subfile)\s*(?:\{([^}]*)\}|([^\s{}\\]+))")
+BIBLIOGRAPHY_RE = re.compile(r"\\bibliography\s*\{([^}]*)\}|\\printbibliography\b(?:\[[^\]]*\])?")
+DOCUMENTCLASS_RE = re.compile(r"\\documentclass\b")
+BEGIN_DOCUMENT_RE = re.compile(r"\\begin\s*\{document\}")
+END_DOCUMENT_RE = re.compile(r"\\end\s*\{document\}")
+COMMAND_RE = re.compile(r"\\([A-Za-z@]+)")
+NEWCOMMAND_RE = re.compile(
+    r"\\(?:re)?newcommand\*?|\\providecommand\*?|\\DeclareRobustCommand\*?"
+)
+DEF_RE = re.compile(r"\\def\s*\\([A-Za-z@]+)\s*\{")
+PLAIN_RUN_RE = re.compile(r"[^\\$%{}~`'\-]+")
+WHITESPACE_RE = re.compile(r"\s+")
+SPACE_BEFORE_PUNCT_RE = re.compile(r" +([.,;:!?)])")
+
+
+def decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def read_source(path: Path) -> dict[str, str] | None:
+    """The .tex/.bbl files of an e-print as {relative path: text}.
+
+    Returns None when the e-print is not LaTeX (a PDF-only submission, or
+    an archive without a \\documentclass file).
+    """
+    data = path.read_bytes()
+    if data.startswith(GZIP_MAGIC):
+        try:
+            data = gzip.decompress(data)
+        except (OSError, EOFError):
+            return None
+    if data.startswith(PDF_MAGIC):
+        return None
+
+    files: dict[str, str] = {}
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            for member in tar.getmembers():
+                name = str(PurePosixPath(member.name))
+                if member.isfile() and name.lower().endswith(SOURCE_SUFFIXES):
+                    files[name.removeprefix("./")] = decode(tar.extractfile(member).read())
+    except tarfile.TarError:
+        # A single (gzipped) .tex file
+        files = {"main.tex": decode(data)}
+
+    if find_main(files) is None:
+        return None
+    return files
+
+
+def strip_comments(text: str) -> str:
+    """Remove % comments, comment environments and \\iffalse blocks.
+
+    Code environments (verbatim, lstlisting, minted) are left as they are.
+    """
+    parts = CODE_ENV_RE.split(text)
+    # split() returns text, (code, env name) pairs, text, ...
+    for k in range(0, len(parts), 3):
+        part = COMMENT_LINE_RE.sub("", parts[k])
+        part = COMMENT_RE.sub("", part)
+        part = COMMENT_ENV_RE.sub("", part)
+        parts[k] = IFFALSE_RE.sub("", part)
+    return "".join(parts[k] for k in range(len(parts)) if k % 3 != 2)
+
+
+def find_main(files: dict[str, str]) -> str | None:
+    """The main .tex file: has \\documentclass and a document body."""
+    candidates = []
+    for name, text in files.items():
+        if not name.lower().endswith((".tex", ".ltx")):
+            continue
+        text = strip_comments(text)
+        if DOCUMENTCLASS_RE.search(text):
+            has_body = BEGIN_DOCUMENT_RE.search(text) is not None
+            preferred = PurePosixPath(name).stem.lower() in ("main", "ms", "paper", "arxiv")
+            candidates.append((has_body, preferred, len(text), name))
+    if not candidates:
+        return None
+    return max(candidates)[3]
+
+
+def resolve_input(files: dict[str, str], name: str) -> str | None:
+    name = str(PurePosixPath(name.strip().strip('"')))
+    for candidate in (name, f"{name}.tex"):
+        if candidate in files:
+            return candidate
+    return None
+
+
+def expand_inputs(files: dict[str, str], name: str, stack: tuple[str, ...] = ()) -> str:
+    """Text of a file with \\input/\\include (recursively) inlined."""
+    text = strip_comments(files[name])
+    if len(stack) >= MAX_INPUT_DEPTH:
+        return text
+
+    def inline(m: re.Match) -> str:
+        target = resolve_input(files, m.group(1) or m.group(2))
+        if target is None or target in stack or target == name:
+            return ""
+        return "\n" + expand_inputs(files, target, (*stack, name)) + "\n"
+
+    return INPUT_RE.sub(inline, text)
+
+
+def read_group(text: str, i: int) -> tuple[str, int] | None:
+    """The balanced {...} group starting at text[i] (after spaces), and the index after it."""
+    n = len(text)
+    while i < n and text[i] in " \t\n":
+        i += 1
+    if i >= n or text[i] != "{":
+        return None
+    depth = 0
+    for j in range(i, n):
+        c = text[j]
+        if c == "{" and text[j - 1] != "\\":
+            depth += 1
+        elif c == "}" and text[j - 1] != "\\":
+            depth -= 1
+            if depth == 0:
+                return text[i + 1:j], j + 1
+    return text[i + 1:], n
+
+
+def read_optional(text: str, i: int) -> tuple[str, int] | None:
+    """The [...] argument starting at text[i] (after spaces), and the index after it."""
+    n = len(text)
+    j = i
+    while j < n and text[j] in " \t":
+        j += 1
+    if j >= n or text[j] != "[":
+        return None
+    depth = 0
+    for k in range(j, n):
+        if text[k] == "[":
+            depth += 1
+        elif text[k] == "]":
+            depth -= 1
+            if depth == 0:
+                return text[j + 1:k], k + 1
+    return None
+
+
+def skip_args(text: str, i: int, count: int) -> int:
+    """Skip optional arguments and `count` mandatory groups; returns the new index."""
+    while (opt := read_optional(text, i)) is not None:
+        i = opt[1]
+    for _ in range(count):
+        group = read_group(text, i)
+        if group is None:
+            break
+        i = group[1]
+    return i
+
+
+def parse_macros(text: str) -> tuple[dict[str, tuple[int, str]], str]:
+    """Collect \\newcommand/\\def macros as {name: (args, body)}; returns them and the text without the definitions."""
+    macros: dict[str, tuple[int, str]] = {}
+    out = []
+    pos = 0
+    for m in NEWCOMMAND_RE.finditer(text):
+        if m.start() < pos:
+            continue
+        i = m.end()
+        group = read_group(text, i)
+        if group is not None:
+            name, i = group
+        else:
+            cm = COMMAND_RE.match(text, len(text[i:]) - len(text[i:].lstrip()) + i)
+            if cm is None:
+                continue
+            name, i = cm.group(), cm.end()
+        nargs = 0
+        opt = read_optional(text, i)
+        if opt is not None:
+            nargs = int(opt[0]) if opt[0].strip().isdigit() else 0
+            i = opt[1]
+            default = read_optional(text, i)
+            if default is not None:
+                i = default[1]
+        body = read_group(text, i)
+        if body is None:
+            continue
+        macros[name.strip().lstrip("\\")] = (nargs, body[0])
+        out.append(text[pos:m.start()])
+        pos = body[1]
+    out.append(text[pos:])
+    text = "".join(out)
+
+    out = []
+    pos = 0
+    for m in DEF_RE.finditer(text):
+        if m.start() < pos:
+            continue
+        body = read_group(text, m.end() - 1)
+        if body is None:
+            continue
+        macros[m.group(1)] = (0, body[0])
+        out.append(text[pos:m.start()])
+        pos = body[1]
+    out.append(text[pos:])
+    return macros, "".join(out)
+
+
+def expand_macros(text: str, macros: dict[str, tuple[int, str]]) -> str:
+    """Expand user macros, a few passes deep."""
+    if not macros:
+        return text
+    for _ in range(MACRO_PASSES):
+        out = []
+        pos = 0
+        expanded = False
+        for m in COMMAND_RE.finditer(text):
+            if m.start() < pos or m.group(1) not in macros:
+                continue
+            if m.start() > 0 and text[m.start() - 1] == "\\":
+                continue
+            nargs, body = macros[m.group(1)]
+            i = m.end()
+            for k in range(1, nargs + 1):
+                group = read_group(text, i)
+                if group is None:
+                    break
+                body = body.replace(f"#{k}", group[0])
+                i = group[1]
+            if nargs == 0 and i < len(text) and text[i] == " " and body[-1:].isalpha():
+                # "\method is" keeps its space
+                body += " "
+                i += 1
+            out.append(text[pos:m.start()])
+            out.append(body)
+            pos = i
+            expanded = True
+        out.append(text[pos:])
+        text = "".join(out)
+        if not expanded:
+            break
+    return text
+
+
+def number_labels(body: str) -> dict[str, str]:
+    """Label -> displayed number for sections, subsections, figures, tables and equations."""
+    labels: dict[str, str] = {}
+    counters = {"section": 0, "subsection": 0, "figure": 0, "table": 0, "equation": 0}
+    appendix = False
+    current: str | None = None
+    token_re = re.compile(
+        r"\\(section|subsection)(\*?)"
+        r"|\\begin\{(figure|table|wrapfigure|wraptable)\*?\}"
+        r"|\\begin\{(" + "|".join(re.escape(e) for e in MATH_ENVS) + r")\}"
+        r"|\\label\{([^}]*)\}"
+        r"|\\appendix\b"
+    )
+    skip_to = 0
+    for m in token_re.finditer(body):
+        if m.start() < skip_to:
+            continue
+        if m.group(1):
+            if m.group(2):
+                current = None
+                continue
+            if m.group(1) == "section":
+                counters["section"] += 1
+                counters["subsection"] = 0
+                current = section_number(counters["section"], appendix)
+            else:
+                counters["subsection"] += 1
+                current = f"{section_number(counters['section'], appendix)}.{counters['subsection']}"
+        elif m.group(3):
+            kind = "figure" if "figure" in m.group(3) else "table"
+            counters[kind] += 1
+            current = str(counters[kind])
+        elif m.group(4):
+            # Numbered rows: one per \\\\ line unless \nonumber/\notag
+            env = m.group(4)
+            math, skip_to = environment_body(body, m.end(), env)
+            if env.endswith("*") or env in ("displaymath", "math"):
+                continue
+            rows = math.split("\\\\") if env not in ("equation", "multline") else [math]
+            for row in rows:
+                if re.search(r"\\(?:nonumber|notag)\b", row):
+                    continue
+                counters["equation"] += 1
+                for label in re.findall(r"\\label\{([^}]*)\}", row):
+                    labels.setdefault(label.strip(), str(counters["equation"]))
+        elif m.group(5) is not None:
+            if current is not None:
+                labels.setdefault(m.group(5).strip(), current)
+        else:
+            appendix = True
+            counters["section"] = 0
+    return labels
+
+
+def section_number(n: int, appendix: bool) -> str:
+    if appendix:
+        return chr(ord("A") + n - 1) if 0 < n <= 26 else str(n)
+    return str(n)
+
+
+class Renderer:
+    """One pass over a document body, producing markdown."""
+
+    def __init__(self, labels: dict[str, str]) -> None:
+        self.labels = labels
+        self.section = 0
+        self.subsection = 0
+        self.subsubsection = 0
+        self.figures = 0
+        self.tables = 0
+        self.appendix = False
+
+    def render(self, text: str) -> str:
+        out: list[str] = []
+        i = 0
+        n = len(text)
+        while i < n:
+            c = text[i]
+            if c == "\\":
+                i = self.command(text, i, out)
+            elif c == "$":
+                i = self.dollar_math(text, i, out)
+            elif c == "{":
+                group = read_group(text, i)
+                out.append(self.render(group[0]))
+                i = group[1]
+            elif c == "}":
+                i += 1
+            elif c == "~":
+                out.append(" ")
+                i += 1
+            elif c == "`":
+                if text.startswith("``", i):
+                    out.append("\u201c")
+                    i += 2
+                else:
+                    out.append("\u2018")
+                    i += 1
+            elif c == "'":
+                if text.startswith("''", i):
+                    out.append("\u201d")
+                    i += 2
+                else:
+                    out.append("'")
+                    i += 1
+            elif c == "-":
+                if text.startswith("---", i):
+                    out.append("\u2014")
+                    i += 3
+                elif text.startswith("--", i):
+                    out.append("\u2013")
+                    i += 2
+                else:
+                    out.append("-")
+                    i += 1
+            elif c == "%":
+                # Only escaped % survive comment stripping; treat as text
+                out.append("%")
+                i += 1
+            else:
+                m = PLAIN_RUN_RE.match(text, i)
+                if m is None:
+                    out.append(c)
+                    i += 1
+                else:
+                    out.append(m.group())
+                    i = m.end()
+        return "".join(out)
+
+    def dollar_math(self, text: str, i: int, out: list[str]) -> int:
+        if text.startswith("$$", i):
+            end = text.find("$$", i + 2)
+            end = len(text) if end < 0 else end
+            out.append(display_math(text[i + 2:end]))
+            return end + 2
+        j = i + 1
+        while j < len(text):
+            if text[j] == "\\":
+                j += 2
+                continue
+            if text[j] == "$":
+                break
+            j += 1
+        out.append(f"${text[i + 1:j].strip()}$")
+        return j + 1
+
+    def command(self, text: str, i: int, out: list[str]) -> int:
+        n = len(text)
+        if i + 1 >= n:
+            return n
+        m = COMMAND_RE.match(text, i)
+        if m is None:
+            return self.symbol_command(text, i, out)
+
+        name = m.group(1)
+        i = m.end()
+        if i < n and text[i] == "*" and (name in SECTION_LEVELS or f"{name}*" in DROP_ARGS):
+            name += "*"
+            i += 1
+
+        if name == "begin":
+            return self.environment(text, i, out)
+        if name == "end":
+            group = read_group(text, i)
+            env = group[0].strip() if group else ""
+            if env in THEOREM_ENVS or env in ("abstract", "itemize", "enumerate", "description", "quote", "quotation"):
+                out.append("\n\n")
+            return group[1] if group else i
+        if name.rstrip("*") in SECTION_LEVELS:
+            return self.heading(text, i, name, out)
+        if name == "appendix":
+            self.appendix = True
+            self.section = 0
+            out.append("\n\n## Appendix\n\n")
+            return i
+        if name in ("item", "bibitem"):
+            opt = read_optional(text, i)
+            if name == "bibitem":
+                i = skip_args(text, i, 1)
+                out.append("\n\n")
+            elif opt is not None:
+                out.append(f"\n\n- **{self.inline(opt[0])}** ")
+                i = opt[1]
+            else:
+                out.append("\n\n- ")
+            return i
+        if CITE_RE.fullmatch(name):
+            i = skip_args(text, i, 1)
+            strip_trailing_space(out)
+            if i < n and (text[i].isalnum() or text[i] in "([$"):
+                out.append(" ")
+            return i
+        if name in REF_COMMANDS:
+            group = read_group(text, i)
+            if group is None:
+                return i
+            keys = [k.strip() for k in group[0].split(",")]
+            numbers = ", ".join(self.labels.get(k, "??") for k in keys)
+            out.append(f"({numbers})" if name == "eqref" else numbers)
+            return group[1]
+        if name in ("url", "nolinkurl"):
+            group = read_group(text, i)
+            if group is None:
+                return i
+            out.append(group[0])
+            return group[1]
+        if name == "href":
+            target = read_group(text, i)
+            if target is None:
+                return i
+            label = read_group(text, target[1])
+            if label is None:
+                return target[1]
+            out.append(self.render(label[0]))
+            return label[1]
+        if name in FORMATTING:
+            group = read_group(text, i)
+            if group is None:
+                return i
+            inner = self.inline(group[0]).strip()
+            if inner:
+                marker = FORMATTING[name]
+                out.append(f"{marker}{inner}{marker}")
+            return group[1]
+        if name in DROP_ARGS:
+            return skip_args(text, i, DROP_ARGS[name])
+        if name in SYMBOLS:
+            out.append(SYMBOLS[name])
+            # "\LaTeX{} is": the empty group only separates the command
+            if text.startswith("{}", i):
+                i += 2
+            return i
+        if name in ACCENTS and i < n and text[i] == "{":
+            group = read_group(text, i)
+            out.append(accent(name, self.inline(group[0])))
+            return group[1]
+
+        # Unknown command: keep the text of its arguments, drop the formatting
+        while (opt := read_optional(text, i)) is not None and text[i] in " [":
+            i = opt[1]
+        group = read_group(text, i) if i < n and text[i] == "{" else None
+        if group is not None:
+            out.append(self.render(group[0]))
+            return group[1]
+        return i
+
+    def symbol_command(self, text: str, i: int, out: list[str]) -> int:
+        """\\&, \\%, \\\\, \\[, accents on single characters, ..."""
+        c = text[i + 1]
+        if c == "[":
+            end = text.find("\\]", i + 2)
+            end = len(text) if end < 0 else end
+            out.append(display_math(text[i + 2:end]))
+            return end + 2
+        if c == "(":
+            end = text.find("\\)", i + 2)
+            end = len(text) if end < 0 else end
+            out.append(f"${text[i + 2:end].strip()}$")
+            return end + 2
+        if c == "\\":
+            out.append(" ")
+            i += 2
+            # \\[2pt] and \\* spacing arguments
+            if i < len(text) and text[i] == "*":
+                i += 1
+            opt = read_optional(text, i)
+            return opt[1] if opt is not None and text[i:i + 1] == "[" else i
+        if c in ACCENTS:
+            j = i + 2
+            if j < len(text) and text[j] == "{":
+                group = read_group(text, j)
+                out.append(accent(c, self.inline(group[0])))
+                return group[1]
+            if j < len(text):
+                out.append(accent(c, text[j]))
+                return j + 1
+            return j
+        if c in ESCAPED_CHARS:
+            out.append(c)
+        elif c in SPACE_COMMANDS:
+            out.append(" ")
+        return i + 2
+
+    def inline(self, text: str) -> str:
+        """Render text that must stay on one line (titles, labels)."""
+        return WHITESPACE_RE.sub(" ", self.render(text)).strip()
+
+    def heading(self, text: str, i: int, name: str, out: list[str]) -> int:
+        starred = name.endswith("*")
+        level = SECTION_LEVELS[name.rstrip("*")]
+        opt = read_optional(text, i)
+        if opt is not None:
+            i = opt[1]
+        group = read_group(text, i)
+        if group is None:
+            return i
+        title = self.inline(group[0])
+        i = group[1]
+
+        if level >= 4:
+            # Run-in paragraph title
+            out.append(f"\n\n*{title.rstrip('.')}.* ")
+            return i
+
+        number = ""
+        if not starred:
+            if level <= 1:
+                self.section += 1
+                self.subsection = self.subsubsection = 0
+            elif level == 2:
+                self.subsection += 1
+                self.subsubsection = 0
+            else:
+                self.subsubsection += 1
+            counters = (self.section, self.subsection, self.subsubsection)[:max(level, 1)]
+            number = ".".join([section_number(counters[0], self.appendix), *map(str, counters[1:])])
+
+        if self.appendix or level == 3:
+            # Not section boundaries: appendix sections stay inside the
+            # skipped Appendix, subsubsections inside their subsection.
+            # Bold titles carry a number so they never read as a known
+            # heading ("**Results**"); unnumbered ones are set in italics.
+            out.append(f"\n\n**{number} {title}**\n\n" if number else f"\n\n*{title}*\n\n")
+        elif level <= 1:
+            out.append(f"\n\n## {number} {title}\n\n" if number else f"\n\n## {title}\n\n")
+        else:
+            out.append(f"\n\n### {number} {title}\n\n" if number else f"\n\n*{title}*\n\n")
+        return i
+
+    def environment(self, text: str, i: int, out: list[str]) -> int:
+        group = read_group(text, i)
+        if group is None:
+            return i
+        env = group[0].strip()
+        i = group[1]
+
+        if env in MATH_ENVS:
+            body, i = environment_body(text, i, env)
+            body = re.sub(r"\\(?:label|tag)\{[^}]*\}|\\nonumber\b|\\notag\b", "", body)
+            if env.rstrip("*") in ("equation", "displaymath", "math"):
+                out.append(display_math(body))
+            else:
+                out.append(display_math(f"\\begin{{aligned}}\n{body.strip()}\n\\end{{aligned}}"))
+            return i
+        if env in FLOAT_ENVS:
+            body, i = environment_body(text, i, env)
+            kind = "Table" if "table" in env.lower() else "Figure"
+            if kind == "Table":
+                self.tables += 1
+                number = self.tables
+            else:
+                self.figures += 1
+                number = self.figures
+            caption = find_caption(body)
+            if caption is not None:
+                out.append(f"\n\n{kind} {number}: {self.inline(caption)}\n\n")
+            return i
+        if env in DROP_ENVS:
+            _, i = environment_body(text, i, env)
+            return i
+        if env in CODE_ENVS:
+            body, i = environment_body(text, i, env)
+            # [options] and minted's {language}
+            body = body[skip_args(body, 0, 1 if env == "minted" else 0):]
+            out.append(f"\n\n```\n{body.strip(chr(10))}\n```\n\n")
+            return i
+        if env == "abstract":
+            out.append("\n\n## Abstract\n\n")
+            return i
+        if env == "thebibliography":
+            out.append("\n\n## References\n\n")
+            return skip_args(text, i, 1)
+        if env in THEOREM_ENVS:
+            opt = read_optional(text, i)
+            label = env.capitalize()
+            if opt is not None:
+                label = f"{label} ({self.inline(opt[0])})"
+                i = opt[1]
+            out.append(f"\n\n*{label}.* ")
+            return i
+        if env in ("itemize", "enumerate", "description", "quote", "quotation"):
+            out.append("\n\n")
+            return skip_args(text, i, 0)
+        if env in ("minipage", "adjustbox"):
+            return skip_args(text, i, 1)
+        return skip_args(text, i, 0)
+
+
+def strip_trailing_space(out: list[str]) -> None:
+    while out and not out[-1].strip(" \t~"):
+        if "\n" in out[-1]:
+            return
+        out.pop()
+    if out:
+        out[-1] = out[-1].rstrip(" \t")
+
+
+def accent(command: str, base: str) -> str:
+    if not base:
+        return ""
+    return unicodedata.normalize("NFC", base[0] + ACCENTS[command] + base[1:])
+
+
+def display_math(body: str) -> str:
+    body = body.strip()
+    if not body:
+        return ""
+    return f"\n\n$$\n{body}\n$$\n\n"
+
+
+def environment_body(text: str, i: int, env: str) -> tuple[str, int]:
+    """Raw text up to the matching \\end{env}, and the index after it."""
+    begin = f"\\begin{{{env}}}"
+    end = f"\\end{{{env}}}"
+    depth = 1
+    j = i
+    while depth:
+        next_end = text.find(end, j)
+        if next_end < 0:
+            return text[i:], len(text)
+        next_begin = text.find(begin, j, next_end)
+        if next_begin >= 0:
+            depth += 1
+            j = next_begin + len(begin)
+        else:
+            depth -= 1
+            j = next_end + len(end)
+    return text[i:j - len(end)], j
+
+
+def find_caption(body: str) -> str | None:
+    m = re.search(r"\\caption\*?", body)
+    if m is None:
+        return None
+    i = m.end()
+    opt = read_optional(body, i)
+    if opt is not None:
+        i = opt[1]
+    group = read_group(body, i)
+    return group[0] if group is not None else None
+
+
+def tidy(markdown: str) -> str:
+    """One line per paragraph, blank lines between blocks; code and math blocks kept as is."""
+    blocks = []
+    for block in re.split(r"\n[ \t]*\n", markdown):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith(("$$", "```")):
+            blocks.append("\n".join(line.rstrip() for line in block.split("\n")))
+        else:
+            blocks.append(SPACE_BEFORE_PUNCT_RE.sub(r"\1", WHITESPACE_RE.sub(" ", block)))
+    return "\n\n".join(blocks) + "\n"
+
+
+def source_to_markdown(files: dict[str, str]) -> str:
+    """Render the main document of an e-print as markdown."""
+    main = find_main(files)
+    if main is None:
+        raise ValueError("no \\documentclass file in source")
+    text = expand_inputs(files, main)
+
+    bbl = ""
+    stem = PurePosixPath(main).with_suffix(".bbl")
+    bbl_names = [str(stem)] + sorted(name for name in files if name.endswith(".bbl"))
+    for name in bbl_names:
+        if name in files:
+            bbl = strip_comments(files[name])
+            break
+
+    macros, text = parse_macros(text)
+    begin = BEGIN_DOCUMENT_RE.search(text)
+    if begin is not None:
+        text = text[begin.end():]
+    end = END_DOCUMENT_RE.search(text)
+    if end is not None:
+        text = text[:end.start()]
+
+    # The bibliography comes from the compiled .bbl when there is one
+    # (biblatex .bbl files have no thebibliography environment)
+    references = "\\section*{References}\n" + bbl
+    if "\\begin{thebibliography}" in bbl:
+        references = bbl
+    m = BIBLIOGRAPHY_RE.search(text)
+    if m is not None:
+        text = text[:m.start()] + "\n" + references + "\n" + BIBLIOGRAPHY_RE.sub("", text[m.end():])
+    elif bbl and "\\begin{thebibliography}" not in text:
+        text += "\n" + references
+
+    text = expand_macros(text, macros)
+    return tidy(Renderer(number_labels(text)).render(text))
+
+
+def convert_source(path: Path) -> str | None:
+    """Markdown for an e-print file, or None if it is not LaTeX."""
+    files = read_source(path)
+    if files is None:
+        return None
+    return source_to_markdown(files)
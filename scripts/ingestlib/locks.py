@@ -0,0 +1,200 @@
+"""
+Cross-process single-flight locks for ingest artifacts.
+
+Two ingests of the same paper (two users, or a retry overlapping the
+original run) should not both download the PDF, extract it and write its
+sections files. Each artifact gets a lock file under a .locks directory,
+holding an exclusive flock while the artifact is being produced:
+
+    with ArtifactLock(output_dir / LOCK_DIR, f"arxiv-{safe_id}.pdf"):
+        if not pdf_path.exists():
+            download(...)
+
+The first process takes the lock and does the work; the others wait for
+it and, once they hold the lock, find the finished artifact and reuse it.
+If the first process failed, the next one simply does the work itself.
+
+A lock file records its holder (pid, host, start time) and is removed on
+release, so a lock file whose lock can be taken was left by a process that
+died while holding it; that is reported as a stale lock and taken over.
+flock locks die with their process, so a crashed holder never blocks
+anyone, with one exception: a child process that inherited the lock (a
+forked worker outliving its parent). A lock held by a process that is not
+the recorded holder, when that holder is no longer running on this host,
+is treated as stale too: its file is unlinked and waiters lock a new one.
+
+Without fcntl (Windows), locks are only shared within the process.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Lock files live in this subdirectory of the artifacts' directory
+LOCK_DIR = ".locks"
+
+# Seconds between attempts while another process holds the lock
+POLL_INTERVAL = 0.5
+
+# Process-local locks, used when fcntl is unavailable
+_local_locks: dict[Path, threading.Lock] = {}
+_local_guard = threading.Lock()
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # Exists but belongs to someone else (or cannot be checked)
+        return True
+    return True
+
+
+class ArtifactLock:
+    """An exclusive, cross-process lock on one artifact key.
+
+    After the block is entered, `contended` tells whether another holder
+    had to be waited for, `waited` is the time spent acquiring the lock
+    and `stale` is the record of a dead holder whose lock was taken over,
+    if any.
+    """
+
+    def __init__(
+        self,
+        lock_dir: Path,
+        key: str,
+        log: Callable[[str], None] = print,
+        poll_interval: float = POLL_INTERVAL,
+    ) -> None:
+        self.path = lock_dir / f"{key}.lock"
+        self.key = key
+        self.log = log
+        self.poll_interval = poll_interval
+        self.contended = False
+        self.waited = 0.0
+        self.stale: dict | None = None
+        self._fd: int | None = None
+        self._local: threading.Lock | None = None
+
+    def __enter__(self) -> "ArtifactLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def acquire(self) -> None:
+        if fcntl is None:
+            with _local_guard:
+                self._local = _local_locks.setdefault(self.path, threading.Lock())
+            start = time.monotonic()
+            if not self._local.acquire(blocking=False):
+                self.contended = True
+                self._local.acquire()
+            self.waited = time.monotonic() - start
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.monotonic()
+        announced = False
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                holder = self._read_holder(fd)
+                if holder is not None and self._orphaned(holder):
+                    self.log(
+                        f"Clearing stale lock on {self.key} "
+                        f"(pid {holder.get('pid')} is gone; the lock outlived it)"
+                    )
+                    self._unlink_if_same(fd)
+                    os.close(fd)
+                    continue
+                os.close(fd)
+                self.contended = True
+                if not announced:
+                    who = f"pid {holder.get('pid')} on {holder.get('host')}" if holder else "another process"
+                    self.log(f"Waiting for {who} to finish {self.key}...")
+                    announced = True
+                time.sleep(self.poll_interval)
+                continue
+
+            # The file may have been released (and unlinked) or cleared
+            # between open and flock; then this lock guards nothing.
+            if not self._same_file(fd):
+                os.close(fd)
+                continue
+
+            previous = self._read_holder(fd)
+            if previous is not None:
+                self.stale = previous
+                self.log(
+                    f"Cleared stale lock on {self.key} "
+                    f"(pid {previous.get('pid')} on {previous.get('host')} died holding it)"
+                )
+            record = json.dumps({
+                "pid": os.getpid(),
+                "host": socket.gethostname(),
+                "started": time.time(),
+            }).encode()
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, record)
+            self._fd = fd
+            self.waited = time.monotonic() - start
+            return
+
+    def release(self) -> None:
+        if self._local is not None:
+            self._local.release()
+            self._local = None
+            return
+        if self._fd is None:
+            return
+        # Unlink while still holding the lock: waiters notice the file is
+        # gone (inode check) and retry on a fresh one
+        self.path.unlink(missing_ok=True)
+        os.close(self._fd)
+        self._fd = None
+
+    @staticmethod
+    def _read_holder(fd: int) -> dict | None:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            raw = os.read(fd, 4096)
+            return json.loads(raw) if raw else None
+        except (OSError, ValueError):
+            return None
+
+    def _same_file(self, fd: int) -> bool:
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _unlink_if_same(self, fd: int) -> None:
+        if self._same_file(fd):
+            self.path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _orphaned(holder: dict) -> bool:
+        """The recorded holder is gone but its lock is still held (by a child)."""
+        pid = holder.get("pid")
+        return (
+            isinstance(pid, int)
+            and holder.get("host") == socket.gethostname()
+            and pid != os.getpid()
+            and not pid_alive(pid)
+        )
@@ -0,0 +1,201 @@
+"""
+Durable per-item, per-step progress for long ingest batches.
+
+A small SQLite database (WAL mode, one commit per update) records, for
+every item of a batch, each step it finished or failed in each run, and
+the item's overall state:
+
+  items(item_id, status, fingerprint, output, attempts, error, updated)
+  steps(run_id, item_id, step, status, seconds, error, finished)
+
+An item is "running" from the moment it is started until it is marked
+done or failed, so an item whose process was killed (OOM, SIGKILL) is
+still counted as an attempt on the next run. On restart, is_done() tells
+the batch which items can be skipped: finished with the same fingerprint
+(version and output settings) and with their output still on disk.
+Items that failed or crashed `max_attempts` times are given up on until
+their attempts are reset.
+
+Pass path=None for an in-memory manifest: no resume, but the same
+per-step statistics for the run.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+  run_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+  started  REAL NOT NULL,
+  finished REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+  item_id     TEXT PRIMARY KEY,
+  status      TEXT NOT NULL,
+  fingerprint TEXT,
+  output      TEXT,
+  attempts    INTEGER NOT NULL DEFAULT 0,
+  error       TEXT,
+  updated     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+  run_id   INTEGER NOT NULL,
+  item_id  TEXT NOT NULL,
+  step     TEXT NOT NULL,
+  status   TEXT NOT NULL,
+  seconds  REAL NOT NULL,
+  error    TEXT,
+  finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run_id, step);
+"""
+
+
+class BatchManifest:
+    """Checkpoint store for one output directory. Safe to share between threads."""
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(path) if path is not None else ":memory:",
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        with self._lock:
+            if path is not None:
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self.run_id = self._db.execute(
+                "INSERT INTO runs (started) VALUES (?)", (time.time(),)
+            ).lastrowid
+        self.started = time.time()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE runs SET finished = ? WHERE run_id = ?", (time.time(), self.run_id)
+            )
+            self._db.close()
+
+    def __enter__(self) -> "BatchManifest":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _item(self, item_id: str) -> tuple | None:
+        with self._lock:
+            return self._db.execute(
+                "SELECT status, fingerprint, output, attempts FROM items WHERE item_id = ?",
+                (item_id,),
+            ).fetchone()
+
+    def is_done(self, item_id: str, fingerprint: str) -> bool:
+        """Finished earlier with the same fingerprint, and its output still exists."""
+        row = self._item(item_id)
+        if row is None:
+            return False
+        status, done_fingerprint, output, _ = row
+        return (
+            status == "done"
+            and done_fingerprint == fingerprint
+            and output is not None
+            and Path(output).exists()
+        )
+
+    def attempts(self, item_id: str) -> int:
+        """Runs that started the item without finishing it since it last succeeded."""
+        row = self._item(item_id)
+        return row[3] if row is not None else 0
+
+    def reset_attempts(self, item_ids: list[str]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE items SET attempts = 0 WHERE item_id = ?", [(i,) for i in item_ids]
+            )
+
+    def start(self, item_id: str) -> None:
+        """Mark an item as in progress; counts as an attempt until it is done."""
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO items (item_id, status, attempts, updated)
+                VALUES (?, 'running', 1, ?)
+                ON CONFLICT (item_id) DO UPDATE SET
+                  status = 'running', attempts = attempts + 1, updated = excluded.updated
+                """,
+                (item_id, time.time()),
+            )
+
+    def finish(self, item_id: str, fingerprint: str, output: Path) -> None:
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE items SET status = 'done', fingerprint = ?, output = ?,
+                  attempts = 0, error = NULL, updated = ?
+                WHERE item_id = ?
+                """,
+                (fingerprint, str(output), time.time(), item_id),
+            )
+
+    def fail(self, item_id: str, error: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE items SET status = 'failed', error = ?, updated = ? WHERE item_id = ?",
+                (error, time.time(), item_id),
+            )
+
+    def record(
+        self, item_id: str, step: str, status: str, seconds: float, error: str | None = None
+    ) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.run_id, item_id, step, status, seconds, error, time.time()),
+            )
+
+    @contextmanager
+    def step(self, item_id: str, step: str) -> Iterator[None]:
+        """Time a step and record it as done, or as failed if the block raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.record(item_id, step, "failed", time.perf_counter() - start, str(e))
+            raise
+        self.record(item_id, step, "done", time.perf_counter() - start)
+
+    def step_stats(self) -> list[tuple[str, int, int, float]]:
+        """(step, done, failed, seconds spent) for this run, in first-seen order."""
+        with self._lock:
+            return self._db.execute(
+                """
+                SELECT step,
+                       count(*) FILTER (WHERE status = 'done'),
+                       count(*) FILTER (WHERE status = 'failed'),
+                       sum(seconds)
+                FROM steps WHERE run_id = ?
+                GROUP BY step ORDER BY min(rowid)
+                """,
+                (self.run_id,),
+            ).fetchall()
+
+    def report(self) -> list[str]:
+        """Per-step throughput and failure lines for this run."""
+        elapsed = time.time() - self.started
+        lines = []
+        for step, done, failed, seconds in self.step_stats():
+            rate = done / elapsed * 60 if elapsed > 0 else 0.0
+            avg = seconds / (done + failed) if done + failed else 0.0
+            lines.append(
+                f"{step:<9} {done:4d} done {failed:4d} failed  "
+                f"{avg:7.2f}s avg  {rate:6.1f}/min"
+            )
+        return lines
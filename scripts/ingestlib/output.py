@@ -0,0 +1,143 @@
+"""
+Incremental writers for *-sections files.
+
+Two formats are supported:
+
+  json    a pretty-printed JSON array (the default, what seed-sections.ts
+          and translate-chapter.py read)
+  ndjson  one compact JSON object per line, serialized with orjson when it
+          is installed
+
+Either can be compressed with gzip or zstd (zstd needs the zstandard
+package). Files are written to a temp file and renamed into place.
+"""
+
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import IO, Iterator
+
+from ingestlib.files import atomic_writer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("json", "ndjson")
+COMPRESSIONS = ("gzip", "zstd")
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def check_output_format(fmt: str, compression: str | None) -> str | None:
+    """Error message if the format cannot be written here, else None."""
+    if fmt not in FORMATS:
+        return f"unknown output format '{fmt}' (choose from {', '.join(FORMATS)})"
+    if compression is not None and compression not in COMPRESSIONS:
+        return f"unknown compression '{compression}' (choose from {', '.join(COMPRESSIONS)})"
+    if compression == "zstd" and zstandard is None:
+        return "zstd output needs: pip install zstandard"
+    return None
+
+
+def output_path(
+    output_dir: Path, stem: str, fmt: str = "json", compression: str | None = None
+) -> Path:
+    """{stem}.json, {stem}.ndjson, plus .gz/.zst when compressed."""
+    return output_dir / f"{stem}.{fmt}{SUFFIXES.get(compression, '')}"
+
+
+def dumps_line(row: dict) -> bytes:
+    """One NDJSON line: compact JSON, UTF-8, newline-terminated."""
+    if orjson is not None:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+def read_rows(path: Path) -> Iterator[dict]:
+    """Read back the rows of a sections file in any supported format."""
+    name = path.name
+    if name.endswith(".gz"):
+        f = gzip.open(path, "rb")
+    elif name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("reading .zst files needs: pip install zstandard")
+        # The zstd reader has no readline; buffer it for line iteration
+        f = io.BufferedReader(zstandard.open(path, "rb"))
+    else:
+        f = open(path, "rb")
+    with f:
+        if ".ndjson" in name:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.loads(f.read())
+
+
+class SectionWriter:
+    """Write section rows to a sections file one row at a time.
+
+    In the default json format, the file is byte-for-byte what
+    json.dumps(rows, indent=2, ensure_ascii=False) would produce, but rows
+    can be written as soon as they are ready and never have to be held
+    together in memory. The file is renamed into place when the block
+    exits without an error.
+
+        with SectionWriter(path) as writer:
+            for row in rows:
+                writer.write(row)
+    """
+
+    def __init__(
+        self, path: Path, fmt: str = "json", compression: str | None = None
+    ) -> None:
+        error = check_output_format(fmt, compression)
+        if error:
+            raise ValueError(error)
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.count = 0
+        self._writer = atomic_writer(path, binary=True)
+        self._file: IO[bytes] | None = None
+
+    def __enter__(self) -> "SectionWriter":
+        raw = self._writer.__enter__()
+        if self.compression == "gzip":
+            # mtime=0 keeps the output reproducible
+            self._file = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0)
+        elif self.compression == "zstd":
+            self._file = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        else:
+            self._file = raw
+        return self
+
+    def write(self, row: dict) -> None:
+        if self.fmt == "ndjson":
+            self._file.write(dumps_line(row))
+        else:
+            # Nested lines of the row gain one indent level inside the array;
+            # JSON strings never contain raw newlines, so this is safe.
+            item = json.dumps(row, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            self._file.write((("[\n  " if self.count == 0 else ",\n  ") + item).encode())
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb) -> bool | None:
+        try:
+            if exc_type is None and self.fmt == "json":
+                self._file.write(b"\n]" if self.count else b"[]")
+            # Flush the compressor's trailer into the temp file before renaming
+            if self.compression is not None:
+                self._file.close()
+        except BaseException as e:
+            self._writer.__exit__(type(e), e, e.__traceback__)
+            raise
+        return self._writer.__exit__(exc_type, exc, tb)
@@ -0,0 +1,196 @@
+"""
+Bulk loading of section rows into the resource_sections table.
+
+Rows are streamed with COPY into a temporary staging table, then merged
+into resource_sections with one INSERT ... ON CONFLICT statement on the
+table's unique key (resource_id, concept_id, sort_order). A file of
+thousands of sections costs a handful of round trips, and loading the same
+file twice leaves the table unchanged.
+
+Rows from the ingest scripts carry content_original but no translation.
+content_markdown (NOT NULL) starts out as a copy of content_original. A
+later load without content_markdown keeps a translation while the
+section's content_original is unchanged, and resets it to the new text
+when the source changed. Rows marked "change": "removed" (from a changes
+file) are deleted, and prune=True deletes every other section of the
+loaded resources, so the table matches the file exactly. Rows are matched
+by position, not content, and deletes cascade to the notes, annotations,
+translations and quizzes on a section (a concept card referencing one
+makes the load fail), so prune is off unless a caller asks for it.
+
+Requires psycopg 3 (pip install "psycopg[binary]").
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+INSTALL_HINT = 'loading into Postgres needs: pip install "psycopg[binary]"'
+
+# resource_sections columns that section rows can set
+COLUMNS = (
+    "resource_id",
+    "concept_id",
+    "section_title",
+    "sort_order",
+    "content_markdown",
+    "content_original",
+    "start_page",
+    "end_page",
+    "paragraph_range",
+    "segmentation_confidence",
+)
+
+CREATE_STAGE = """
+CREATE TEMP TABLE IF NOT EXISTS section_stage (
+  seq                     INTEGER,
+  removed                 BOOLEAN,
+  resource_id             TEXT,
+  concept_id              TEXT,
+  section_title           TEXT,
+  sort_order              INTEGER,
+  content_markdown        TEXT,
+  content_original        TEXT,
+  start_page              INTEGER,
+  end_page                INTEGER,
+  paragraph_range         INTEGER[],
+  segmentation_confidence REAL
+) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGE = f"COPY section_stage (seq, removed, {', '.join(COLUMNS)}) FROM STDIN"
+
+# Removed rows whose key is not reused by a row loaded in the same batch
+DELETE_REMOVED = """
+DELETE FROM resource_sections t
+USING section_stage s
+WHERE s.removed
+  AND (t.resource_id, t.concept_id, t.sort_order) = (s.resource_id, s.concept_id, s.sort_order)
+  AND NOT EXISTS (
+    SELECT 1 FROM section_stage u
+    WHERE NOT u.removed
+      AND (u.resource_id, u.concept_id, u.sort_order) = (s.resource_id, s.concept_id, s.sort_order)
+  )
+"""
+
+# Sections of the loaded resources that the batch no longer contains
+DELETE_PRUNED = """
+DELETE FROM resource_sections t
+WHERE (t.resource_id, t.concept_id) IN (
+    SELECT resource_id, concept_id FROM section_stage WHERE NOT removed
+  )
+  AND NOT EXISTS (
+    SELECT 1 FROM section_stage s
+    WHERE NOT s.removed
+      AND (s.resource_id, s.concept_id, s.sort_order) = (t.resource_id, t.concept_id, t.sort_order)
+  )
+"""
+
+# The last row wins when a batch repeats a key. Unchanged rows are not
+# rewritten, so they are neither counted nor given new row versions.
+UPSERT = """
+WITH upserted AS (
+  INSERT INTO resource_sections AS t (
+    resource_id, concept_id, section_title, sort_order, content_markdown,
+    content_original, start_page, end_page, paragraph_range, segmentation_confidence
+  )
+  SELECT DISTINCT ON (resource_id, concept_id, sort_order)
+    resource_id, concept_id, section_title, sort_order,
+    COALESCE(content_markdown, content_original, ''),
+    content_original, start_page, end_page, paragraph_range, segmentation_confidence
+  FROM section_stage
+  WHERE NOT removed
+  ORDER BY resource_id, concept_id, sort_order, seq DESC
+  ON CONFLICT (resource_id, concept_id, sort_order) DO UPDATE SET
+    section_title = EXCLUDED.section_title,
+    content_original = EXCLUDED.content_original,
+    content_markdown = CASE
+      WHEN EXCLUDED.content_markdown IS DISTINCT FROM EXCLUDED.content_original
+        OR EXCLUDED.content_original IS DISTINCT FROM t.content_original
+      THEN EXCLUDED.content_markdown
+      ELSE t.content_markdown
+    END,
+    start_page = EXCLUDED.start_page,
+    end_page = EXCLUDED.end_page,
+    paragraph_range = EXCLUDED.paragraph_range,
+    segmentation_confidence = EXCLUDED.segmentation_confidence
+  WHERE (t.section_title, t.content_original, t.start_page, t.end_page,
+         t.paragraph_range, t.segmentation_confidence)
+     IS DISTINCT FROM
+        (EXCLUDED.section_title, EXCLUDED.content_original, EXCLUDED.start_page,
+         EXCLUDED.end_page, EXCLUDED.paragraph_range, EXCLUDED.segmentation_confidence)
+     OR (EXCLUDED.content_markdown IS DISTINCT FROM EXCLUDED.content_original
+         AND EXCLUDED.content_markdown IS DISTINCT FROM t.content_markdown)
+  RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+FROM upserted
+"""
+
+
+@dataclass
+class LoadResult:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+    @property
+    def unchanged(self) -> int:
+        return self.rows - self.inserted - self.updated
+
+    def summary(self) -> str:
+        return (
+            f"{self.inserted} inserted, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.deleted} deleted"
+        )
+
+
+class SectionLoader:
+    """One Postgres connection that loads batches of section rows.
+
+        with SectionLoader(database_url) as loader:
+            result = loader.load(read_rows(path), prune=True)
+
+    Each load() runs in its own transaction: a batch is applied completely
+    or not at all.
+    """
+
+    def __init__(self, dsn: str) -> None:
+        if psycopg is None:
+            raise RuntimeError(INSTALL_HINT)
+        self.dsn = dsn
+        self.conn = None
+
+    def __enter__(self) -> "SectionLoader":
+        self.conn = psycopg.connect(self.dsn)
+        with self.conn.transaction():
+            self.conn.execute(CREATE_STAGE)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.close()
+
+    def load(self, rows: Iterable[dict], prune: bool = False) -> LoadResult:
+        """Upsert rows (deleting "removed" ones) in one transaction."""
+        result = LoadResult()
+        with self.conn.transaction(), self.conn.cursor() as cur:
+            with cur.copy(COPY_STAGE) as copy:
+                for seq, row in enumerate(rows):
+                    removed = row.get("change") == "removed"
+                    copy.write_row((seq, removed, *(row.get(c) for c in COLUMNS)))
+                    result.rows += not removed
+
+            cur.execute(DELETE_REMOVED)
+            result.deleted += cur.rowcount
+            if prune:
+                cur.execute(DELETE_PRUNED)
+                result.deleted += cur.rowcount
+
+            cur.execute(UPSERT)
+            result.inserted, result.updated = cur.fetchone()
+        return result
@@ -0,0 +1,127 @@
+"""
+Host-wide token-bucket rate limits for outgoing HTTP requests.
+
+Each bucket keeps its state (tokens left, last refill time) in a small file
+under the system temp directory, guarded by an exclusive flock, so every
+thread and every process on the host that uses the same bucket name draws
+from the same budget. A request that finds the bucket empty still takes
+its token (the balance goes negative) and sleeps until that token would
+have been refilled: callers queue up behind each other instead of
+failing. A 429/503 response drains the bucket for the Retry-After period,
+which pauses every client on the host rather than only the one that was
+throttled.
+
+Without fcntl (Windows), buckets are shared only within the process.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+STATE_DIR = Path(tempfile.gettempdir()) / "jarre-ingest-ratelimit"
+
+# Pause applied on 429/503 when the server sends no usable Retry-After
+DEFAULT_PAUSE = 5.0
+
+
+class TokenBucket:
+    """A rate limit of `rate` requests/second with bursts of up to `burst`."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float = 1.0,
+        state_dir: Path = STATE_DIR,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.path = state_dir / f"{name}.bucket"
+        self._lock = threading.Lock()
+        # Process-local state, used when fcntl is unavailable
+        self._tokens = self.capacity
+        self._updated = time.time()
+        # Counters for this process
+        self.requests = 0
+        self.waits = 0
+        self.waited = 0.0
+        if fcntl is not None:
+            state_dir.mkdir(parents=True, exist_ok=True)
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns seconds waited."""
+        wait = self._update(lambda tokens: tokens - 1) / self.rate
+        with self._lock:
+            self.requests += 1
+            if wait > 0:
+                self.waits += 1
+                self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds` (server asked us to back off)."""
+        self._update(lambda tokens: min(tokens, -seconds * self.rate))
+
+    def _update(self, change) -> float:
+        """Refill, apply change to the token count, store it. Returns the deficit."""
+        with self._lock:
+            if fcntl is None:
+                self._tokens, self._updated = self._refill(self._tokens, self._updated, change)
+                return max(0.0, -self._tokens)
+
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.read(fd, 64).split()
+                try:
+                    tokens, updated = float(raw[0]), float(raw[1])
+                except (IndexError, ValueError):
+                    tokens, updated = self.capacity, time.time()
+                tokens, updated = self._refill(tokens, updated, change)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, f"{tokens:.6f} {updated:.6f}".encode())
+                return max(0.0, -tokens)
+            finally:
+                os.close(fd)
+
+    def _refill(self, tokens: float, updated: float, change) -> tuple[float, float]:
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        return change(tokens), now
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}: {self.requests} request(s), "
+            f"waited {self.waited:.1f}s over {self.waits} wait(s)"
+        )
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token from `limiter` before every request."""
+
+    def __init__(self, limiter: TokenBucket, **kwargs) -> None:
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        response = super().send(request, **kwargs)
+        if response.status_code in (429, 503):
+            retry_after = response.headers.get("Retry-After", "")
+            self.limiter.pause(float(retry_after) if retry_after.isdigit() else DEFAULT_PAUSE)
+        return response
@@ -0,0 +1,161 @@
+"""
+Local stand-in for arXiv's export API and PDF server, for the check-*.py
+scripts.
+
+Serves an Atom feed for id_list queries at /api/query (pass api_url to
+make_client) and PDFs at /pdf/{id}, honoring Range requests. Failures are
+scripted per paper:
+
+  bad_ids      an id_list query naming any of these gets HTTP 400, as
+               arXiv answers a malformed ID
+  drop_after   {paper_id: bytes}: the first `drops` PDF responses for the
+               paper stop after that many bytes and close the connection
+
+Every request is recorded in `requests` as (path, query, Range header).
+"""
+
+import http.server
+import re
+import threading
+import urllib.parse
+
+VERSION_RE = re.compile(r"v\d+$")
+
+
+def atom_entry(paper_id: str, base_url: str) -> str:
+    """One feed entry with the fields arxiv.Result reads."""
+    base = VERSION_RE.sub("", paper_id)
+    return (
+        f"<entry><id>http://arxiv.org/abs/{paper_id}</id>"
+        f"<updated>2024-01-02T00:00:00Z</updated><published>2024-01-01T00:00:00Z</published>"
+        f"<title>Paper {base}</title><summary>Stand-in abstract.</summary>"
+        f"<author><name>A. Author</name></author>"
+        f'<arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.LG"/>'
+        f'<category term="cs.LG"/>'
+        f'<link href="{base_url}/abs/{paper_id}" rel="alternate" type="text/html"/>'
+        f'<link title="pdf" href="{base_url}/pdf/{paper_id}" rel="related" type="application/pdf"/>'
+        f"</entry>"
+    )
+
+
+class ArxivStandIn:
+    """A threaded HTTP server on 127.0.0.1, started and stopped with `with`.
+
+        with ArxivStandIn({"2401.00001v1": pdf_bytes}) as server:
+            client = make_client(server.api_url)
+    """
+
+    def __init__(
+        self,
+        papers: dict[str, bytes],
+        bad_ids: set[str] | None = None,
+        drop_after: dict[str, int] | None = None,
+        drops: int = 1,
+    ) -> None:
+        self.papers = papers
+        self.bad_ids = bad_ids or set()
+        self.drop_after = drop_after or {}
+        self.drops = drops
+        self.requests: list[tuple[str, str, str | None]] = []
+        self._dropped: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server: http.server.ThreadingHTTPServer | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/api/query"
+
+    def queries(self) -> list[list[str]]:
+        """The id_list of every API query received, in order."""
+        return [
+            urllib.parse.parse_qs(query).get("id_list", [""])[0].split(",")
+            for path, query, _ in self.requests
+            if path == "/api/query"
+        ]
+
+    def __enter__(self) -> "ArxivStandIn":
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                standin.handle(self)
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, request: http.server.BaseHTTPRequestHandler) -> None:
+        url = urllib.parse.urlparse(request.path)
+        range_header = request.headers.get("Range")
+        with self._lock:
+            self.requests.append((url.path, url.query, range_header))
+        if url.path == "/api/query":
+            self.serve_feed(request, urllib.parse.parse_qs(url.query))
+        elif url.path.startswith("/pdf/"):
+            self.serve_pdf(request, url.path[len("/pdf/"):], range_header)
+        else:
+            self.send(request, 404, b"")
+
+    def serve_feed(self, request, query: dict[str, list[str]]) -> None:
+        requested = [i for i in query.get("id_list", [""])[0].split(",") if i]
+        if any(i in self.bad_ids for i in requested):
+            self.send(request, 400, b"malformed id")
+            return
+        bases = {VERSION_RE.sub("", i) for i in requested}
+        start = int(query.get("start", ["0"])[0])
+        matches = [] if start else [k for k in self.papers if VERSION_RE.sub("", k) in bases]
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns="http://www.w3.org/2005/Atom" '
+            'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            f"<opensearch:totalResults>{len(matches)}</opensearch:totalResults>"
+            + "".join(atom_entry(k, self.base_url) for k in matches)
+            + "</feed>"
+        ).encode()
+        self.send(request, 200, body)
+
+    def serve_pdf(self, request, paper_id: str, range_header: str | None) -> None:
+        data = self.papers.get(paper_id)
+        if data is None:
+            self.send(request, 404, b"")
+            return
+        offset = int(range_header.split("=")[1].rstrip("-")) if range_header else 0
+        body = data[offset:]
+        if range_header:
+            request.send_response(206)
+            request.send_header("Content-Range", f"bytes {offset}-{len(data) - 1}/{len(data)}")
+        else:
+            request.send_response(200)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+
+        with self._lock:
+            drop = paper_id in self.drop_after and self._dropped.get(paper_id, 0) < self.drops
+            if drop:
+                self._dropped[paper_id] = self._dropped.get(paper_id, 0) + 1
+        if drop:
+            request.wfile.write(body[:self.drop_after[paper_id]])
+            request.wfile.flush()
+            request.close_connection = True
+            request.connection.shutdown(2)
+            return
+        request.wfile.write(body)
+
+    @staticmethod
+    def send(request, status: int, body: bytes) -> None:
+        request.send_response(status)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
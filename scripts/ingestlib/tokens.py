@@ -0,0 +1,161 @@
+"""
+Per-section LLM token estimates, computed in batches and cached by content hash.
+
+Two tokenizers are available:
+
+  tiktoken  exact cl100k_base counts (pip install tiktoken; the vocabulary
+            is downloaded once and cached by tiktoken)
+  estimate  a local estimator that needs nothing installed; it prices
+            each run of characters by kind (ASCII words, other scripts,
+            CJK, digits, symbols), so code-heavy and non-English text is
+            not undercounted the way word_count undercounts it
+
+"auto" uses tiktoken when its vocabulary can be loaded, else the
+estimator. Neither is DeepSeek's own tokenizer; both are close enough to
+budget with. Counts are cached per tokenizer in
+{cache_dir}/tokens-{tokenizer}.json, keyed by the section's content hash,
+so re-ingesting only counts sections whose text changed.
+"""
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from ingestlib.changes import content_hash
+from ingestlib.files import atomic_writer
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+TOKENIZERS = ("auto", "tiktoken", "estimate")
+TIKTOKEN_ENCODING = "cl100k_base"
+
+# Rows counted per batch (misses only; cache hits cost nothing)
+DEFAULT_BATCH_SIZE = 64
+
+# Estimator: characters per token for each kind of run
+ESTIMATE_PIECE_RE = re.compile(
+    r"(?P<cjk>[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+)"
+    r"|(?P<word>[^\W\d_]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<symbols>[^\w\s]+|_+)"
+    r"|(?P<newlines>\n+)"
+)
+ASCII_WORD_CHARS = 5.5
+OTHER_WORD_CHARS = 3.0
+DIGIT_CHARS = 3.0
+SYMBOL_CHARS = 2.0
+NEWLINE_CHARS = 2.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate cl100k-style token count of text without a vocabulary."""
+    tokens = 0
+    for m in ESTIMATE_PIECE_RE.finditer(text):
+        kind = m.lastgroup
+        n = m.end() - m.start()
+        if kind == "cjk":
+            tokens += n
+        elif kind == "word":
+            tokens += math.ceil(n / (ASCII_WORD_CHARS if m.group().isascii() else OTHER_WORD_CHARS))
+        elif kind == "digits":
+            tokens += math.ceil(n / DIGIT_CHARS)
+        elif kind == "symbols":
+            tokens += math.ceil(n / SYMBOL_CHARS)
+        else:
+            tokens += math.ceil(n / NEWLINE_CHARS)
+    return tokens
+
+
+def load_encoding(tokenizer: str):
+    """The tiktoken encoding to use, or None for the estimator.
+
+    Raises RuntimeError if tiktoken was asked for explicitly but cannot be
+    loaded (not installed, or its vocabulary cannot be downloaded).
+    """
+    if tokenizer == "estimate":
+        return None
+    try:
+        if tiktoken is None:
+            raise ImportError("pip install tiktoken")
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as e:
+        if tokenizer == "tiktoken":
+            raise RuntimeError(f"tiktoken {TIKTOKEN_ENCODING} unavailable: {e}") from e
+        return None
+
+
+class TokenEstimator:
+    """Count tokens for batches of texts, remembering counts by content hash."""
+
+    def __init__(self, tokenizer: str = "auto", cache_dir: Path | None = None) -> None:
+        self.encoding = load_encoding(tokenizer)
+        self.name = (
+            f"tiktoken-{TIKTOKEN_ENCODING}" if self.encoding is not None else "estimate-v1"
+        )
+        self.cache_path = cache_dir / f"tokens-{self.name}.json" if cache_dir else None
+        self.counts: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if self.cache_path is not None:
+            try:
+                self.counts = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                self.counts = {}
+
+    def count_batch(self, texts: list[str]) -> list[int]:
+        """Token counts for texts, in one tokenizer call."""
+        if self.encoding is not None:
+            return [len(ids) for ids in self.encoding.encode_ordinary_batch(texts)]
+        return [estimate_tokens(text) for text in texts]
+
+    def estimate_rows(self, rows: list[dict]) -> None:
+        """Set row["token_estimate"] on every row, counting cache misses in one batch.
+
+        Uses row["content_hash"] when present, else hashes content_original.
+        """
+        keys = [row.get("content_hash") or content_hash(row["content_original"]) for row in rows]
+        missing = [i for i, key in enumerate(keys) if key not in self.counts]
+        if missing:
+            counts = self.count_batch([rows[i]["content_original"] for i in missing])
+            for i, count in zip(missing, counts):
+                self.counts[keys[i]] = count
+            self._dirty = True
+        self.misses += len(missing)
+        self.hits += len(rows) - len(missing)
+        for row, key in zip(rows, keys):
+            row["token_estimate"] = self.counts[key]
+
+    def save(self) -> None:
+        """Write the count cache if anything was added."""
+        if self.cache_path is None or not self._dirty:
+            return
+        with atomic_writer(self.cache_path) as f:
+            f.write(json.dumps(self.counts, separators=(",", ":")))
+        self._dirty = False
+
+
+def with_token_estimates(
+    rows: Iterable[dict],
+    estimator: TokenEstimator,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[dict]:
+    """Yield rows with token_estimate set, counting them batch_size at a time.
+
+    Only one batch of rows is held at once, so this works on streamed rows.
+    """
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            estimator.estimate_rows(batch)
+            yield from batch
+            batch = []
+    if batch:
+        estimator.estimate_rows(batch)
+        yield from batch
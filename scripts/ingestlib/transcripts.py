@@ -0,0 +1,225 @@
+"""
+Compact transcript snippets, and an on-disk cache of transcript listings
+and snippets.
+
+Snippets stores a transcript column-wise: start times and durations in
+typed arrays, and all texts in one string with an offsets array. A long
+transcript costs about its text length plus 24 bytes per snippet, instead
+of a dict, a str and two floats per snippet.
+
+Fetching a transcript takes two requests: the listing of available
+transcripts, then the snippets of the chosen one. Both are cached as JSON
+files under one directory, so re-segmenting or re-cleaning a video (a new
+--chunk-size, a new cleaning rule) never goes back to the network:
+
+  {video_id}.listing.json                        available transcripts
+  {video_id}.{language_code}.{kind}.v{N}.json    snippets ("manual"/"generated"),
+                                                 stored column-wise like Snippets
+
+N is SNIPPETS_FORMAT; bumping it when the stored layout changes makes old
+entries plain misses.
+
+Every entry records when it was fetched. Entries older than the TTL are
+treated as misses (captions get edited, auto-captions get replaced by
+manual ones); ttl=None keeps them forever. refresh=True ignores every
+entry, and the fresh results replace them.
+"""
+
+import json
+import time
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from ingestlib.files import atomic_writer
+
+# Default lifetime of cached listings and snippets, in days
+DEFAULT_TTL_DAYS = 7.0
+
+# Version of the stored snippets layout (part of the file name)
+SNIPPETS_FORMAT = 2
+
+
+class Snippets:
+    """Transcript snippets (text, start, duration) in typed arrays and one text buffer.
+
+    Snippet i's text is text(i); starts and durations are array("d")s
+    (zero-copy with numpy.frombuffer). Indexing and iteration give
+    {"text", "start", "duration"} dicts, for code that takes one snippet
+    at a time.
+    """
+
+    __slots__ = ("starts", "durations", "_buffer", "_offsets")
+
+    def __init__(
+        self,
+        texts: Iterable[str] = (),
+        starts: Iterable[float] = (),
+        durations: Iterable[float] = (),
+    ) -> None:
+        parts: list[str] = []
+        self._offsets = array("q", [0])
+        position = 0
+        for text in texts:
+            parts.append(text)
+            position += len(text)
+            self._offsets.append(position)
+        self._buffer = "".join(parts)
+        self.starts = array("d", starts)
+        self.durations = array("d", durations)
+        if not len(self.starts) == len(self.durations) == len(self._offsets) - 1:
+            raise ValueError("texts, starts and durations differ in length")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "Snippets":
+        """From dicts or objects (e.g. FetchedTranscriptSnippet) with text, start, duration."""
+        texts: list[str] = []
+        starts = array("d")
+        durations = array("d")
+        for row in rows:
+            if isinstance(row, dict):
+                texts.append(row["text"])
+                starts.append(row["start"])
+                durations.append(row["duration"])
+            else:
+                texts.append(row.text)
+                starts.append(row.start)
+                durations.append(row.duration)
+        return cls(texts, starts, durations)
+
+    @classmethod
+    def coerce(cls, snippets) -> "Snippets":
+        return snippets if isinstance(snippets, Snippets) else cls.from_rows(snippets)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text(self, i: int) -> str:
+        return self._buffer[self._offsets[i]:self._offsets[i + 1]]
+
+    def texts(self) -> Iterator[str]:
+        buffer = self._buffer
+        offsets = self._offsets
+        for i in range(len(self.starts)):
+            yield buffer[offsets[i]:offsets[i + 1]]
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {"text": self.text(i), "start": self.starts[i], "duration": self.durations[i]}
+
+    def __iter__(self) -> Iterator[dict]:
+        for i, text in enumerate(self.texts()):
+            yield {"text": text, "start": self.starts[i], "duration": self.durations[i]}
+
+    def end_time(self) -> float:
+        """When the last snippet ends (0.0 if there are none)."""
+        return max(map(float.__add__, self.starts, self.durations), default=0.0)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the text buffer."""
+        return (
+            self._buffer.__sizeof__()
+            + self._offsets.__sizeof__()
+            + self.starts.__sizeof__()
+            + self.durations.__sizeof__()
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "text": self._buffer,
+            "offsets": self._offsets.tolist(),
+            "start": self.starts.tolist(),
+            "duration": self.durations.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, value: dict) -> "Snippets":
+        snippets = cls()
+        snippets._buffer = value["text"]
+        snippets._offsets = array("q", value["offsets"])
+        snippets.starts = array("d", value["start"])
+        snippets.durations = array("d", value["duration"])
+        if not len(snippets.starts) == len(snippets.durations) == len(snippets._offsets) - 1:
+            raise ValueError("inconsistent snippet columns")
+        return snippets
+
+
+def caption_kind(is_generated: bool) -> str:
+    return "generated" if is_generated else "manual"
+
+
+class TranscriptCache:
+    """Transcript listings and snippets for many videos, under one directory."""
+
+    def __init__(
+        self, root: Path, ttl: float | None = DEFAULT_TTL_DAYS * 86400, refresh: bool = False
+    ) -> None:
+        self.root = root
+        self.ttl = ttl
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def listing_path(self, video_id: str) -> Path:
+        return self.root / f"{video_id}.listing.json"
+
+    def snippets_path(self, video_id: str, language_code: str, is_generated: bool) -> Path:
+        return (
+            self.root
+            / f"{video_id}.{language_code}.{caption_kind(is_generated)}.v{SNIPPETS_FORMAT}.json"
+        )
+
+    def _read(self, path: Path):
+        """The cached value at path, or None if missing, stale or unreadable."""
+        if self.refresh:
+            self.misses += 1
+            return None
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            fetched = float(entry["fetched"])
+            value = entry["value"]
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.time() - fetched > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def _write(self, path: Path, value) -> None:
+        with atomic_writer(path) as f:
+            f.write(json.dumps({"fetched": time.time(), "value": value}, ensure_ascii=False))
+
+    def get_listing(self, video_id: str) -> list[dict] | None:
+        """Available transcripts: dicts with language, language_code, is_generated."""
+        return self._read(self.listing_path(video_id))
+
+    def put_listing(self, video_id: str, listing: list[dict]) -> None:
+        self._write(self.listing_path(video_id), listing)
+
+    def get_snippets(
+        self, video_id: str, language_code: str, is_generated: bool
+    ) -> Snippets | None:
+        """Snippets of one transcript."""
+        value = self._read(self.snippets_path(video_id, language_code, is_generated))
+        if value is None:
+            return None
+        try:
+            return Snippets.from_json(value)
+        except (KeyError, TypeError, ValueError):
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def put_snippets(
+        self, video_id: str, language_code: str, is_generated: bool, snippets: Snippets
+    ) -> None:
+        self._write(self.snippets_path(video_id, language_code, is_generated), snippets.to_json())
+
+    def summary(self) -> str:
+        return f"transcript cache: {self.hits} hit(s), {self.misses} miss(es)"